@@ -0,0 +1,47 @@
+"""Add geohash column and index to gyms
+
+Revision ID: 003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.geo import encode_geohash
+
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('gyms', sa.Column('geohash', sa.String(12), nullable=True))
+
+    # Backfill existing gyms
+    conn = op.get_bind()
+    gyms = sa.table(
+        'gyms',
+        sa.column('id', sa.String),
+        sa.column('latitude', sa.Float),
+        sa.column('longitude', sa.Float),
+        sa.column('geohash', sa.String),
+    )
+    rows = conn.execute(sa.select(gyms.c.id, gyms.c.latitude, gyms.c.longitude)).fetchall()
+    for row in rows:
+        conn.execute(
+            gyms.update()
+            .where(gyms.c.id == row.id)
+            .values(geohash=encode_geohash(row.latitude, row.longitude))
+        )
+
+    # Radius searches are range scans over geohash prefixes
+    op.create_index('ix_gyms_geohash', 'gyms', ['geohash'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_gyms_geohash', table_name='gyms')
+    op.drop_column('gyms', 'geohash')
@@ -0,0 +1,41 @@
+"""Add trigram indexes for gym name and address search
+
+Revision ID: 004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pg_trgm only exists on PostgreSQL; other databases use the in-process index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_gyms_name_trgm', 'gyms', ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_gyms_address_trgm', 'gyms', ['address'],
+        postgresql_using='gin',
+        postgresql_ops={'address': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_gyms_address_trgm', table_name='gyms')
+    op.drop_index('ix_gyms_name_trgm', table_name='gyms')
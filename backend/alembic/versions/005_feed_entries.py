@@ -0,0 +1,35 @@
+"""Add feed_entries table for precomputed session feeds
+
+Revision ID: 005
+Create Date: 2026-10-18
+
+Existing sessions are not fanned out here; populate the table with
+`python -m scripts.backfill_feed` after upgrading.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'feed_entries',
+        sa.Column('user_id', sa.String(36), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('session_id', sa.String(36), sa.ForeignKey('sessions.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('scheduled_at', sa.DateTime(), nullable=False),
+    )
+    # Feed reads are a range scan over one user's entries
+    op.create_index('ix_feed_entries_user_scheduled', 'feed_entries', ['user_id', 'scheduled_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_feed_entries_user_scheduled', table_name='feed_entries')
+    op.drop_table('feed_entries')
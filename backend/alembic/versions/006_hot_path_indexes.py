@@ -0,0 +1,51 @@
+"""Composite and partial indexes for participant, friendship and session filters
+
+Revision ID: 006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Concurrent joins could have created duplicate participants; keep one
+    op.execute(
+        "DELETE FROM session_participants WHERE id NOT IN ("
+        "SELECT MIN(id) FROM session_participants GROUP BY session_id, user_id)"
+    )
+    op.create_unique_constraint(
+        'uq_session_participants_session_user', 'session_participants', ['session_id', 'user_id']
+    )
+
+    # Friend lists OR requester/addressee, each side filtered by status
+    op.create_index('ix_friendships_requester_status', 'friendships', ['requester_id', 'status'])
+    op.create_index('ix_friendships_addressee_status', 'friendships', ['addressee_id', 'status'])
+
+    # Friend fan-out reads a creator's sessions by visibility
+    op.create_index(
+        'ix_sessions_creator_visibility', 'sessions',
+        ['creator_id', 'visibility', 'is_cancelled', 'scheduled_at']
+    )
+    # Public half of the feed only ever reads live sessions
+    op.create_index(
+        'ix_sessions_live_visibility_scheduled', 'sessions', ['visibility', 'scheduled_at', 'id'],
+        postgresql_where=sa.text('is_cancelled IS false'),
+        sqlite_where=sa.text('is_cancelled IS 0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_live_visibility_scheduled', table_name='sessions')
+    op.drop_index('ix_sessions_creator_visibility', table_name='sessions')
+    op.drop_index('ix_friendships_addressee_status', table_name='friendships')
+    op.drop_index('ix_friendships_requester_status', table_name='friendships')
+    op.drop_constraint('uq_session_participants_session_user', 'session_participants', type_='unique')
@@ -0,0 +1,44 @@
+"""Add notification_outbox table for asynchronous push delivery
+
+Revision ID: 007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('idempotency_key', sa.String(200), nullable=False, unique=True),
+        sa.Column('user_id', sa.String(36), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('title', sa.String(200), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('channel_id', sa.String(50), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),  # PENDING, SENT, FAILED
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+    )
+    # Dispatcher poll: due pending rows in order
+    op.create_index(
+        'ix_notification_outbox_status_next_attempt', 'notification_outbox', ['status', 'next_attempt_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_outbox_status_next_attempt', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
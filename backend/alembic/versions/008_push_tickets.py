@@ -0,0 +1,32 @@
+"""Add push_tickets table for Expo receipt polling
+
+Revision ID: 008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'push_tickets',
+        sa.Column('id', sa.String(100), primary_key=True),
+        sa.Column('token', sa.String(500), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    # Receipt poll: tickets old enough for Expo to have a receipt
+    op.create_index('ix_push_tickets_created_at', 'push_tickets', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_push_tickets_created_at', table_name='push_tickets')
+    op.drop_table('push_tickets')
@@ -0,0 +1,24 @@
+"""Index session exercises by session for the detail projection
+
+Revision ID: 009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Session detail: a session's exercises in display order
+    op.create_index('ix_session_exercises_session_order', 'session_exercises', ['session_id', 'order'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_session_exercises_session_order', table_name='session_exercises')
@@ -0,0 +1,39 @@
+"""Denormalized participant and going counts on sessions
+
+Revision ID: 010
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('participant_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('sessions', sa.Column('going_count', sa.Integer(), nullable=False, server_default='0'))
+    # rsvp_status holds the enum member name, as written by SQLAlchemy's Enum type
+    op.execute("""
+        UPDATE sessions SET
+            participant_count = (
+                SELECT COUNT(*) FROM session_participants
+                WHERE session_participants.session_id = sessions.id
+            ),
+            going_count = (
+                SELECT COUNT(*) FROM session_participants
+                WHERE session_participants.session_id = sessions.id
+                AND session_participants.rsvp_status = 'GOING'
+            )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('sessions', 'going_count')
+    op.drop_column('sessions', 'participant_count')
@@ -0,0 +1,74 @@
+"""Recurring session expansion: series end, feed flag and occurrence overrides
+
+Revision ID: 011
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.recurrence import last_occurrence
+
+
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sessions', sa.Column('recurs_until', sa.DateTime(), nullable=True))
+    op.add_column(
+        'feed_entries',
+        sa.Column('is_recurring', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+    op.create_table(
+        'session_occurrence_overrides',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('session_id', sa.String(36), sa.ForeignKey('sessions.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('occurrence_start', sa.DateTime(), nullable=False),
+        sa.Column('is_cancelled', sa.Boolean(), nullable=False),
+        sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('session_id', 'occurrence_start', name='uq_session_occurrence_overrides_start'),
+    )
+    # Public recurring series, expanded into the feed separately
+    op.create_index(
+        'ix_sessions_recurring_visibility_scheduled', 'sessions', ['visibility', 'scheduled_at'],
+        postgresql_where=sa.text('is_recurring IS true AND is_cancelled IS false'),
+        sqlite_where=sa.text('is_recurring IS 1 AND is_cancelled IS 0')
+    )
+
+    # Backfill existing series
+    conn = op.get_bind()
+    sessions = sa.table(
+        'sessions',
+        sa.column('id', sa.String),
+        sa.column('scheduled_at', sa.DateTime),
+        sa.column('is_recurring', sa.Boolean),
+        sa.column('recurrence_rule', sa.String),
+        sa.column('recurs_until', sa.DateTime),
+    )
+    rows = conn.execute(
+        sa.select(sessions.c.id, sessions.c.scheduled_at, sessions.c.recurrence_rule)
+        .where(sessions.c.is_recurring.is_(True))
+    ).fetchall()
+    for row in rows:
+        conn.execute(
+            sessions.update()
+            .where(sessions.c.id == row.id)
+            .values(recurs_until=last_occurrence(row.recurrence_rule, row.scheduled_at))
+        )
+    op.execute("""
+        UPDATE feed_entries SET is_recurring = sessions.is_recurring
+        FROM sessions WHERE sessions.id = feed_entries.session_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_recurring_visibility_scheduled', table_name='sessions')
+    op.drop_table('session_occurrence_overrides')
+    op.drop_column('feed_entries', 'is_recurring')
+    op.drop_column('sessions', 'recurs_until')
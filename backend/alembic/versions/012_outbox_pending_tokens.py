@@ -0,0 +1,24 @@
+"""Add notification_outbox.pending_tokens for retrying only missed devices
+
+Revision ID: 012
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_outbox', sa.Column('pending_tokens', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('notification_outbox', 'pending_tokens')
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.core.config import get_settings
 from app.core.security import verify_password, create_access_token, get_current_user
+from app.core.hashing import hashing_executor
 from app.crud.user import get_user_by_email, create_user
 from app.schemas.auth import Token, RegisterRequest
 from app.schemas.user import UserCreate, UserResponse
@@ -49,7 +50,8 @@ async def login(
             detail="Incorrect email or password"
         )
     
-    if not verify_password(form_data.password, user.hashed_password):
+    # bcrypt is CPU-bound; keep it off the event loop
+    if not await hashing_executor.run(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
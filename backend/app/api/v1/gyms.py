@@ -1,36 +1,93 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.security import get_current_user
+from app.core.pagination import decode_cursor, page_size, split_page, set_next_cursor
+from app.core.response_cache import CachedResponse, cached_response
 from app.crud.gym import (
     get_gym_by_id, create_gym, search_gyms,
     add_favorite_gym, remove_favorite_gym, get_favorite_gyms
 )
 from app.schemas.gym import GymCreate, GymResponse
 from app.models.user import User
+from app.services.gym_cache import CANDIDATE_FACTOR, GymSearch, gym_cache
 
 router = APIRouter(prefix="/gyms", tags=["gyms"])
 
+_gym_list = TypeAdapter(List[GymResponse])
+
 
 @router.get("", response_model=List[GymResponse])
 async def list_gyms(
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(None, description="Search query"),
     lat: Optional[float] = Query(None, description="Latitude"),
     lon: Optional[float] = Query(None, description="Longitude"),
     radius: float = Query(10.0, description="Search radius in km"),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Next-page cursor (browsing without q/lat/lon only)"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Search for gyms by name or location."""
-    gyms = await search_gyms(
-        db,
-        query=q,
-        latitude=lat,
-        longitude=lon,
-        radius_km=radius
-    )
-    return gyms
+    """
+    Search for gyms by name or location.
+    
+    Searches return one ranked page, cached and sent with an ETag (see
+    services.gym_cache). Browsing without q/lat/lon is cursor paged: the
+    next page's cursor is sent in the X-Next-Cursor header.
+    """
+    size = page_size(limit)
+    browsing = not q and (lat is None or lon is None)
+    if not browsing:
+        search = gym_cache.normalize_search(q, lat, lon, radius)
+        if search.cell is not None:
+            return await _located_search(request, db, search, size)
+        key = await gym_cache.search_key(search, size)
+        cached = await gym_cache.get_search(key)
+        if cached is None:
+            gyms = await search_gyms(db, query=search.query, limit=size)
+            body = to_json([GymResponse.model_validate(gym) for gym in gyms])
+            cached = await gym_cache.set_search(key, body)
+        return cached_response(request, cached, gym_cache.max_age)
+    
+    gyms = await search_gyms(db, limit=size + 1, after=decode_cursor(cursor))
+    page, next_cursor = split_page(gyms, size, "created_at")
+    set_next_cursor(response, next_cursor)
+    return page
+
+
+async def _located_search(request: Request, db: AsyncSession, search: GymSearch, size: int) -> Response:
+    """Pick the page from the cell's cached candidates, searching from the point when they can't tell."""
+    key = await gym_cache.search_key(search, size)
+    cached = await gym_cache.get_search(key)
+    if cached is None:
+        center_lat, center_lon = search.center
+        candidates = await search_gyms(
+            db,
+            query=search.query,
+            latitude=center_lat,
+            longitude=center_lon,
+            radius_km=search.radius_km + search.slack_km,
+            limit=size * CANDIDATE_FACTOR
+        )
+        cached = await gym_cache.set_search(key, to_json([GymResponse.model_validate(gym) for gym in candidates]))
+    
+    page = gym_cache.located_page(search, _gym_list.validate_json(cached.body), size)
+    if page is None:
+        gyms = await search_gyms(
+            db,
+            query=search.query,
+            latitude=search.latitude,
+            longitude=search.longitude,
+            radius_km=search.radius_km,
+            limit=size
+        )
+        page = [GymResponse.model_validate(gym) for gym in gyms]
+    return cached_response(request, CachedResponse.for_body(to_json(page)), gym_cache.max_age)
 
 
 @router.post("", response_model=GymResponse, status_code=status.HTTP_201_CREATED)
@@ -84,13 +141,17 @@ async def remove_gym_from_favorites(
 @router.get("/{gym_id}", response_model=GymResponse)
 async def get_gym(
     gym_id: str,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get a gym by ID."""
-    gym = await get_gym_by_id(db, gym_id)
-    if not gym:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Gym not found"
-        )
-    return gym
+    """Get a gym by ID. Cached, and sent with an ETag for If-None-Match revalidation."""
+    cached = await gym_cache.get_detail(gym_id)
+    if cached is None:
+        gym = await get_gym_by_id(db, gym_id)
+        if not gym:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Gym not found"
+            )
+        cached = await gym_cache.set_detail(gym_id, to_json(GymResponse.model_validate(gym)))
+    return cached_response(request, cached, gym_cache.max_age)
@@ -1,9 +1,11 @@
+from functools import partial
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import after_commit, get_db
 from app.core.security import get_current_user
+from app.core.token_cache import token_cache
 from app.crud.notification import (
     register_token,
     unregister_token,
@@ -83,8 +85,8 @@ async def update_notification_preferences(
     if prefs.notify_session_reminders is not None:
         current_user.notify_session_reminders = prefs.notify_session_reminders
     
-    await db.commit()
-    await db.refresh(current_user)
+    await db.flush()
+    after_commit(db, partial(token_cache.invalidate_user, current_user.id))
     
     return NotificationPreferences(
         notify_session_invites=current_user.notify_session_invites,
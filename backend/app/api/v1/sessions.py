@@ -3,22 +3,27 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.security import get_current_user
+from app.core.pagination import decode_cursor, page_size, split_page, set_next_cursor
+from app.core.recurrence import is_occurrence, parse_rule
+from app.core.responses import ORJSONResponse
 from app.crud.session import (
     get_session_by_id, create_session, update_session, delete_session,
-    get_session_feed, join_session, leave_session, check_in,
-    add_exercise_to_session
+    join_session, invite_participants, leave_session, check_in,
+    add_exercise_to_session, set_occurrence_override, delete_occurrence_override
 )
+from app.crud.notification import get_notification_targets
+from app.crud.projections import get_session_summaries, get_session_detail, session_detail_from_orm
 from app.crud.gym import get_gym_by_id
-from app.crud.user import get_user_by_id
 from app.schemas.session import (
     SessionCreate, SessionUpdate, SessionResponse, SessionDetailResponse,
-    SessionInvite, RSVPRequest, ExerciseCreate, ExerciseResponse
+    SessionInvite, RSVPRequest, ExerciseCreate, ExerciseResponse,
+    OccurrenceOverride, OccurrenceOverrideResponse
 )
 from app.models.user import User
 from app.models.session import RSVPStatus
-from app.services.push import send_session_invite_notification
+from app.services.push import queue_session_invite_notifications
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
@@ -28,39 +33,36 @@ async def list_sessions(
     from_date: Optional[datetime] = Query(None),
     to_date: Optional[datetime] = Query(None),
     include_public: bool = Query(True),
+    cursor: Optional[str] = Query(None, description="Next-page cursor"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get session feed (friends' sessions + public)."""
-    sessions = await get_session_feed(
-        db,
-        user_id=current_user.id,
-        from_date=from_date,
-        to_date=to_date,
-        include_public=include_public
-    )
+    """
+    Get session feed (friends' sessions + public).
     
-    # Add participant count
-    result = []
-    for session in sessions:
-        session_dict = {
-            "id": session.id,
-            "title": session.title,
-            "description": session.description,
-            "gym": session.gym,
-            "scheduled_at": session.scheduled_at,
-            "duration_minutes": session.duration_minutes,
-            "visibility": session.visibility,
-            "max_participants": session.max_participants,
-            "creator": session.creator,
-            "is_recurring": session.is_recurring,
-            "is_cancelled": session.is_cancelled,
-            "participant_count": len(session.participants),
-            "created_at": session.created_at
-        }
-        result.append(SessionResponse(**session_dict))
+    Ordered by scheduled time; the next page's cursor is sent in the
+    X-Next-Cursor header. Recurring sessions appear once per occurrence.
+    """
+    size = page_size(limit)
+    sessions, next_cursor = split_page(
+        await get_session_summaries(
+            db,
+            user_id=current_user.id,
+            from_date=from_date,
+            to_date=to_date,
+            include_public=include_public,
+            limit=size + 1,
+            after=decode_cursor(cursor)
+        ),
+        size,
+        "scheduled_at"
+    )
     
-    return result
+    # Built from typed columns: render directly instead of FastAPI re-validating
+    response = ORJSONResponse(sessions)
+    set_next_cursor(response, next_cursor)
+    return response
 
 
 @router.post("", response_model=SessionDetailResponse, status_code=status.HTTP_201_CREATED)
@@ -78,18 +80,27 @@ async def create_new_session(
             detail="Gym not found"
         )
     
+    if session_in.is_recurring and session_in.recurrence_rule:
+        try:
+            parse_rule(session_in.recurrence_rule, session_in.scheduled_at)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+    
     session = await create_session(db, current_user.id, session_in)
-    return _session_to_detail_response(session)
+    return ORJSONResponse(session_detail_from_orm(session), status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{session_id}", response_model=SessionDetailResponse)
 async def get_session(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a session by ID."""
-    session = await get_session_by_id(db, session_id)
+    session = await get_session_detail(db, session_id)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,7 +109,7 @@ async def get_session(
     
     # TODO: Check visibility permissions
     
-    return _session_to_detail_response(session)
+    return ORJSONResponse(session)
 
 
 @router.patch("/{session_id}", response_model=SessionDetailResponse)
@@ -122,8 +133,25 @@ async def update_session_info(
             detail="Only the creator can update this session"
         )
     
-    await update_session(db, session, session_in)
-    return _session_to_detail_response(await get_session_by_id(db, session_id))
+    if session.is_recurring and session.recurrence_rule and session_in.scheduled_at is not None:
+        # The rule's limits (e.g. how far UNTIL is) are relative to the first occurrence
+        try:
+            parse_rule(session.recurrence_rule, session_in.scheduled_at)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+    
+    try:
+        await update_session(db, session, session_in)
+    except ValueError as exc:
+        # max_participants below the number already going
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    return ORJSONResponse(session_detail_from_orm(await get_session_by_id(db, session_id)))
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -149,30 +177,28 @@ async def delete_session_endpoint(
     await delete_session(db, session)
 
 
-@router.post("/{session_id}/join", status_code=status.HTTP_204_NO_CONTENT)
+@router.post("/{session_id}/join")
 async def join_session_endpoint(
     session_id: str,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Join a session."""
-    session = await get_session_by_id(db, session_id)
+    """
+    Join a session.
+    
+    If the session is full the user is put on its waitlist instead
+    (rsvp_status "waitlisted") and moves to going when a seat frees up.
+    """
+    session = await get_session_by_id(db, session_id, load_relations=False)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
     
-    # Check capacity
-    if session.max_participants:
-        going_count = sum(1 for p in session.participants if p.rsvp_status == RSVPStatus.GOING)
-        if going_count >= session.max_participants:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Session is full"
-            )
-    
-    await join_session(db, session_id, current_user.id)
+    # Capacity is enforced atomically by join_session
+    participant = await join_session(db, session_id, current_user.id)
+    return {"rsvp_status": participant.rsvp_status}
 
 
 @router.post("/{session_id}/leave", status_code=status.HTTP_204_NO_CONTENT)
@@ -192,9 +218,14 @@ async def update_rsvp(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Update RSVP status."""
-    await join_session(db, session_id, current_user.id, rsvp_status=rsvp.status)
-    return {"status": "updated"}
+    """Update RSVP status; going on a full session joins its waitlist."""
+    if rsvp.status == RSVPStatus.WAITLISTED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="RSVP going to join the waitlist of a full session"
+        )
+    participant = await join_session(db, session_id, current_user.id, rsvp_status=rsvp.status)
+    return {"status": "updated", "rsvp_status": participant.rsvp_status}
 
 
 @router.post("/{session_id}/check-in")
@@ -221,33 +252,97 @@ async def invite_to_session(
     db: AsyncSession = Depends(get_db)
 ):
     """Invite users to a session."""
-    session = await get_session_by_id(db, session_id)
+    session = await get_session_by_id(db, session_id, load_relations=False)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
     
-    for user_id in invite.user_ids:
-        await join_session(
+    # One query for who exists, who wants invite pushes and their tokens,
+    # one INSERT for all new participants, one INSERT queueing their pushes
+    targets = await get_notification_targets(db, invite.user_ids, "notify_session_invites")
+    invited = await invite_participants(
+        db,
+        session_id,
+        list(targets),
+        invited_by_id=current_user.id,
+        invite_message=invite.message
+    )
+    recipients = {user_id: participant_id for user_id, participant_id in invited.items() if targets[user_id]}
+    if recipients:
+        await queue_session_invite_notifications(
             db,
-            session_id,
-            user_id,
-            rsvp_status=RSVPStatus.MAYBE,
-            invited_by_id=current_user.id,
-            invite_message=invite.message
+            recipients,
+            inviter_name=current_user.name,
+            session_title=session.title,
+            session_id=session_id
+        )
+
+
+async def _get_own_recurring_session(db: AsyncSession, session_id: str, user: User):
+    session = await get_session_by_id(db, session_id, load_relations=False)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+    if session.creator_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the creator can change occurrences"
+        )
+    if not session.is_recurring:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Session is not recurring"
+        )
+    return session
+
+
+@router.put("/{session_id}/occurrences", response_model=OccurrenceOverrideResponse)
+async def override_occurrence(
+    session_id: str,
+    override_in: OccurrenceOverride,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel or move one occurrence of a recurring session (creator only)."""
+    session = await _get_own_recurring_session(db, session_id, current_user)
+    if not is_occurrence(session.recurrence_rule, session.scheduled_at, override_in.occurrence_start):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No occurrence starts at occurrence_start"
+        )
+    if not override_in.is_cancelled and override_in.scheduled_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give a new scheduled_at or cancel the occurrence"
+        )
+    
+    return await set_occurrence_override(
+        db,
+        session_id,
+        override_in.occurrence_start,
+        is_cancelled=override_in.is_cancelled,
+        scheduled_at=override_in.scheduled_at
+    )
+
+
+@router.delete("/{session_id}/occurrences", status_code=status.HTTP_204_NO_CONTENT)
+async def restore_occurrence(
+    session_id: str,
+    occurrence_start: datetime = Query(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Undo an occurrence's cancellation or move (creator only)."""
+    await _get_own_recurring_session(db, session_id, current_user)
+    if not await delete_occurrence_override(db, session_id, occurrence_start):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Occurrence is not overridden"
         )
-        
-        # Send push notification
-        invitee = await get_user_by_id(db, user_id)
-        if invitee and getattr(invitee, 'notify_session_invites', True):
-            await send_session_invite_notification(
-                db=db,
-                invitee_id=user_id,
-                inviter_name=current_user.name,
-                session_title=session.title,
-                session_id=session_id
-            )
 
 
 @router.post("/{session_id}/exercises", response_model=ExerciseResponse)
@@ -275,25 +370,3 @@ async def add_exercise(
     
     exercise = await add_exercise_to_session(db, session_id, exercise_in)
     return exercise
-
-
-def _session_to_detail_response(session) -> SessionDetailResponse:
-    """Convert session model to detailed response."""
-    return SessionDetailResponse(
-        id=session.id,
-        title=session.title,
-        description=session.description,
-        gym=session.gym,
-        scheduled_at=session.scheduled_at,
-        duration_minutes=session.duration_minutes,
-        visibility=session.visibility,
-        max_participants=session.max_participants,
-        creator=session.creator,
-        is_recurring=session.is_recurring,
-        is_cancelled=session.is_cancelled,
-        participant_count=len(session.participants),
-        created_at=session.created_at,
-        participants=session.participants,
-        exercises=session.exercises,
-        group_id=session.group_id
-    )
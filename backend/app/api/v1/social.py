@@ -1,12 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.core.security import get_current_user
+from app.core.pagination import decode_cursor, page_size, split_page, set_next_cursor
 from app.crud.social import (
     get_friendship, create_friend_request, update_friendship_status,
-    get_friends, get_pending_requests,
+    get_friends_with_users, get_pending_requests,
     get_group_by_id, create_group, update_group, get_user_groups
 )
 from app.crud.user import get_user_by_id
@@ -16,7 +17,7 @@ from app.schemas.social import (
 )
 from app.models.user import User
 from app.models.social import FriendshipStatus
-from app.services.push import send_friend_request_notification
+from app.services.push import queue_friend_request_notification
 
 router = APIRouter(tags=["social"])
 
@@ -55,9 +56,9 @@ async def send_friend_request(
     
     friendship = await create_friend_request(db, current_user.id, request.addressee_id)
     
-    # Send push notification if user has it enabled
+    # Queue the push if the user has it enabled; it is sent after commit
     if getattr(addressee, 'notify_friend_requests', True):
-        await send_friend_request_notification(
+        await queue_friend_request_notification(
             db=db,
             addressee_id=addressee.id,
             requester_name=current_user.name,
@@ -69,24 +70,22 @@ async def send_friend_request(
 
 @router.get("/friends", response_model=List[FriendResponse])
 async def list_friends(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Next-page cursor"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get list of all friends."""
-    friendships = await get_friends(db, current_user.id)
+    """Get a page of friends; the next page's cursor is in X-Next-Cursor."""
+    size = page_size(limit)
+    rows = await get_friends_with_users(db, current_user.id, after=decode_cursor(cursor), limit=size + 1)
+    friendships, next_cursor = split_page([f for f, _ in rows], size, "created_at")
+    set_next_cursor(response, next_cursor)
     
-    friends = []
-    for f in friendships:
-        friend_id = f.addressee_id if f.requester_id == current_user.id else f.requester_id
-        friend_user = await get_user_by_id(db, friend_id)
-        if friend_user:
-            friends.append(FriendResponse(
-                user=friend_user,
-                friendship_id=f.id,
-                since=f.updated_at
-            ))
-    
-    return friends
+    return [
+        FriendResponse(user=friend_user, friendship_id=f.id, since=f.updated_at)
+        for f, friend_user in rows[:len(friendships)]
+    ]
 
 
 @router.get("/friends/requests", response_model=List[FriendshipResponse])
@@ -160,11 +159,20 @@ async def create_new_group(
 
 @router.get("/groups", response_model=List[GroupResponse])
 async def list_my_groups(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Next-page cursor"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get groups owned by current user."""
-    groups = await get_user_groups(db, current_user.id)
+    """Get a page of groups owned by current user; the next page's cursor is in X-Next-Cursor."""
+    size = page_size(limit)
+    groups, next_cursor = split_page(
+        await get_user_groups(db, current_user.id, after=decode_cursor(cursor), limit=size + 1),
+        size,
+        "created_at"
+    )
+    set_next_cursor(response, next_cursor)
     return groups
 
 
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.core.security import get_current_user
 from app.crud.user import get_user_by_id, update_user
 from app.schemas.user import UserResponse, UserPublicResponse, UserUpdate
@@ -31,7 +31,7 @@ async def update_current_user(
 async def get_user_profile(
     user_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a user's public profile."""
     user = await get_user_by_id(db, user_id)
@@ -0,0 +1,154 @@
+"""
+Geo helpers: geohash encoding and decoding, radius cell covering and Haversine distance.
+
+Gyms store a geohash of their coordinates in an indexed column. A radius
+search covers the circle's bounding box with a small number of geohash
+cells at the finest precision that keeps the count bounded, and each cell
+becomes a B-tree range condition on that column.
+"""
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~5m cells, plenty for gym locations
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180  # Same sphere as haversine_km, so boxes match distances
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a geohash string."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    longitude = ((longitude + 180.0) % 360.0) - 180.0
+
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size_degrees(precision: int) -> Tuple[float, float]:
+    """(height, width) of a geohash cell in degrees."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    """(latitude, longitude) of the centre of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+def cell_radius_km(geohash: str) -> float:
+    """Distance from the centre of a geohash cell to its farthest point."""
+    height, width = cell_size_degrees(len(geohash))
+    latitude, longitude = geohash_center(geohash)
+    # The corners nearer the equator are the widest apart
+    corner_lat = latitude - math.copysign(height / 2, latitude)
+    return haversine_km(latitude, longitude, corner_lat, longitude + width / 2)
+
+
+def next_prefix(prefix: str) -> Optional[str]:
+    """
+    Smallest geohash that sorts after every hash starting with prefix.
+
+    Returns None when there is no such string (prefix is all 'z').
+    """
+    chars = list(prefix)
+    while chars:
+        index = BASE32.index(chars[-1])
+        if index + 1 < len(BASE32):
+            chars[-1] = BASE32[index + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+
+def covering_cells(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    max_cells: int = 16
+) -> Optional[List[str]]:
+    """
+    Geohash prefixes whose union covers the circle around a point.
+
+    Uses the finest precision at which the circle's bounding box needs no
+    more than max_cells cells. Returns None when no precision qualifies
+    (very large radius), in which case callers should fall back to a plain
+    bounding box.
+    """
+    lat_range = radius_km / KM_PER_DEGREE
+    # Cells are narrowest (in km) at the poleward edge of the circle
+    extreme_lat = min(abs(latitude) + lat_range, 90.0)
+    lon_range = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(extreme_lat)), 1e-6))
+    if lon_range >= 180.0:
+        return None
+
+    lat_min = max(latitude - lat_range, -90.0)
+    lat_max = min(latitude + lat_range, 90.0 - 1e-9)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size_degrees(precision)
+        row_min = math.floor((lat_min + 90.0) / height)
+        row_max = math.floor((lat_max + 90.0) / height)
+        col_min = math.floor((longitude - lon_range + 180.0) / width)
+        col_max = math.floor((longitude + lon_range + 180.0) / width)
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > max_cells:
+            continue
+
+        cells = set()
+        for row in range(row_min, row_max + 1):
+            cell_lat = -90.0 + (row + 0.5) * height
+            for col in range(col_min, col_max + 1):
+                cell_lon = -180.0 + (col + 0.5) * width
+                cells.add(encode_geohash(cell_lat, cell_lon, precision))
+        return sorted(cells)
+    return None
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
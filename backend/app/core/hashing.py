@@ -0,0 +1,102 @@
+"""
+Bounded worker pool for password hashing.
+
+bcrypt is deliberately slow (~250 ms per call), so running it inline in an
+async handler stalls every other request on the worker. Hashing and
+verification are pushed onto a thread or process pool instead, and once the
+pool and its queue are full new requests are rejected with 503 + Retry-After
+rather than piling up behind each other.
+"""
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HashingExecutor:
+    """Runs CPU-bound hashing calls in a pool with a bounded backlog."""
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 32,
+        retry_after_seconds: int = 2
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after_seconds = retry_after_seconds
+        self._pool: Optional[Executor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Calls currently running or waiting for a worker."""
+        return self._pending
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._pool
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run func(*args) in the pool.
+
+        Raises:
+            HTTPException: 503 with Retry-After when the backlog is full
+        """
+        # All callers share one event loop, so a plain counter is enough
+        if self._pending >= self.capacity:
+            logger.warning(f"Password hash pool saturated ({self._pending} pending)")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": str(self.retry_after_seconds)}
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), func, *args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _build_executor() -> HashingExecutor:
+    settings = get_settings()
+    return HashingExecutor(
+        kind=settings.password_hash_executor,
+        max_workers=settings.password_hash_workers,
+        max_queue=settings.password_hash_max_queue,
+        retry_after_seconds=settings.password_hash_retry_after_seconds
+    )
+
+
+hashing_executor = _build_executor()
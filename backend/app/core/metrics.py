@@ -0,0 +1,203 @@
+"""
+Request and database metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and labels it with the route
+template (`/api/v1/sessions/{session_id}`, not the raw path), so one
+histogram series covers a route however many IDs it is called with.
+Cursor-execute hooks on every SQLAlchemy engine count the statements a
+request sends and the time it waits on them, attributed through a
+contextvar the middleware sets; statements outside a request (workers,
+startup) are not counted. A route whose query count grows with the size
+of its response is an N+1.
+
+Point-in-time values (pool usage, push outcomes) are passed to
+render_metrics at scrape time rather than tracked here.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "gymbuddy_"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# Requests that matched no route share one label instead of one per path
+UNMATCHED_ROUTE = "unmatched"
+
+
+@dataclass
+class RequestQueries:
+    """Statements sent while handling one request."""
+    count: int = 0
+    seconds: float = 0.0
+
+
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts with a final +Inf slot, [sum, count])
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+        counts, totals = series
+        counts[bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def count(self, labels: Tuple[str, ...]) -> int:
+        series = self._series.get(labels)
+        return int(series[1][1]) if series else 0
+
+    def clear(self) -> None:
+        self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, (total, observed)) in sorted(self._series.items()):
+            base = _labels(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = bound if isinstance(bound, str) else repr(float(bound))
+                lines.append(f'{self.name}_bucket{_labels(zip(self.label_names, labels), le=le)} {cumulative}')
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {int(observed)}")
+        return lines
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, Any]], **extra: Any) -> str:
+    items = [*pairs, *extra.items()]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def _samples(name: str, kind: str, documentation: str, samples: Iterable[Tuple[Mapping[str, Any], float]]) -> List[str]:
+    name = PREFIX + name
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels.items())} {value}" for labels, value in samples]
+    return lines
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Request latency by route.",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+request_queries = Histogram(
+    "http_request_db_queries", "Database statements sent per request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS
+)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Time per request spent waiting on database statements.",
+    ("method", "route"), LATENCY_BUCKETS
+)
+HISTOGRAMS = (request_latency, request_queries, request_db_time)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if current_queries.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    queries = current_queries.get()
+    started = conn.info.get("query_started")
+    if queries is None or not started:
+        return
+    queries.count += 1
+    queries.seconds += time.perf_counter() - started.pop()
+
+
+def instrument_queries() -> None:
+    """Count statements on every engine (including ones created later) against the current request."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """The matched route's path template; set on the scope by the router."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and database use per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        queries = RequestQueries()
+        token = current_queries.set(queries)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_queries.reset(token)
+            method, route = scope["method"], route_label(scope)
+            request_latency.observe((method, route, str(status_code)), elapsed)
+            request_queries.observe((method, route), queries.count)
+            request_db_time.observe((method, route), queries.seconds)
+
+
+def render_metrics(
+    pools: Mapping[str, Mapping[str, Any]],
+    push: Mapping[str, int]
+) -> str:
+    """
+    Everything in the Prometheus text format.
+
+    pools maps a database name to its pool_status(); push is the running
+    push totals (PushStats as a dict), exported as counters.
+    """
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    lines += _samples(
+        "db_pool_connections", "gauge", "Connections in each database pool, by state.",
+        (
+            ({"database": database, "state": state}, value)
+            for database, status in pools.items()
+            for state, value in status.items()
+            if isinstance(value, (int, float))
+        )
+    )
+    for field, value in push.items():
+        lines += _samples(f"push_{field}_total", "counter", f"Push {field.replace('_', ' ')}.", [({}, value)])
+    return "\n".join(lines) + "\n"
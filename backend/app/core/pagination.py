@@ -0,0 +1,77 @@
+"""
+Keyset (cursor) pagination helpers.
+
+List endpoints order rows by a (timestamp, id) pair and page with a
+`WHERE (timestamp, id) > (:ts, :id)` condition, so each page is an index
+range scan no matter how deep the client has scrolled. The position is
+handed to clients as an opaque cursor in the `X-Next-Cursor` response
+header and comes back as the `cursor` query parameter.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+
+from app.core.config import get_settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Cursor = Tuple[datetime, str]
+
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """Parse a cursor from a request, rejecting anything we did not issue."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), str(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def page_size(limit: Optional[int]) -> int:
+    """The requested page size, defaulted and capped by settings."""
+    settings = get_settings()
+    if limit is None:
+        return settings.default_page_size
+    return max(1, min(limit, settings.max_page_size))
+
+
+def keyset(stmt: Select, sort_column: Any, id_column: Any, after: Optional[Cursor]) -> Select:
+    """Order stmt by (sort_column, id_column), starting after the cursor."""
+    if after is not None:
+        stmt = stmt.where(tuple_(sort_column, id_column) > tuple_(*after))
+    return stmt.order_by(sort_column, id_column)
+
+
+def split_page(rows: Sequence[Any], limit: int, sort_attr: str) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim a look-ahead row and build the cursor for the next page.
+
+    Endpoints fetch limit + 1 rows; the extra row only signals that
+    another page exists.
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit:
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(getattr(last, sort_attr), last.id)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,205 @@
+"""
+On-demand sampling profiler for single requests.
+
+A request carrying `X-Profile: <profile_token>` is sampled every
+`profile_interval_ms` by a background thread for as long as it runs. Each
+sample is the request task's full stack at that moment:
+
+- while the task is suspended, its chain of awaiting coroutines down to
+  what it is waiting on (a database round trip shows up as SQLAlchemy's
+  greenlet_spawn awaiting a future), so time spent in `await` is counted;
+- while it runs, that chain plus the thread's current frames, including
+  SQLAlchemy's sync code running inside a greenlet.
+
+Profiles are in the collapsed-stack format read by flamegraph.pl,
+speedscope and inferno (`frame;frame;frame count` per line). With
+`profile_dir` set, they are written there and the response names the file
+in `X-Profile-File`. Without it, the profile replaces the response body and
+the original status goes in `X-Profiled-Status`.
+
+Sampling runs on a Python thread and so needs the GIL. A request that
+holds the GIL (CPU-bound work) is sampled at most once per
+sys.getswitchinterval(), which is 5 ms by default.
+"""
+import asyncio
+import hmac
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from typing import Any, List, Optional, Tuple
+from uuid import uuid4
+
+from app.core.metrics import route_label
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+PROFILED_STATUS_HEADER = "X-Profiled-Status"
+CONTENT_TYPE = "text/plain; charset=utf-8"
+
+# A request left running for minutes shouldn't grow the profile without bound
+MAX_SAMPLES = 100_000
+
+# Frames are labelled with paths relative to the first of these that contains them
+_ROOTS = (
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    *sorted({sysconfig.get_paths()[name] for name in ("purelib", "platlib", "stdlib")}, key=len, reverse=True),
+)
+
+
+def _filename(path: str) -> str:
+    for root in _ROOTS:
+        if path.startswith(root + os.sep):
+            return os.path.relpath(path, root)
+    return path
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({_filename(code.co_filename)}:{frame.f_lineno})"
+
+
+class TaskSampler:
+    """Samples one asyncio task's stack from a background thread."""
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.task = task
+        self.interval = interval
+        # The task's frames are on this thread whenever it is running
+        self.thread_id = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval) and self.samples < MAX_SAMPLES:
+            stack = self.sample()
+            # A sample taken while stop() waits for this thread is of stop() itself
+            if stack and not self._stop.is_set():
+                self.stacks[stack] += 1
+                self.samples += 1
+
+    def sample(self) -> Tuple[str, ...]:
+        """Outermost frame first, as the collapsed format expects."""
+        stack: List[str] = []
+        awaitable: Any = self.task.get_coro()
+        running_frame = None
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                # A future (or other frameless awaitable) the task is waiting on
+                stack.append(f"<await {type(awaitable).__name__}>")
+                break
+            stack.append(_label(frame))
+            inner = getattr(awaitable, "cr_await", None) if hasattr(awaitable, "cr_await") \
+                else getattr(awaitable, "gi_yieldfrom", None)
+            if inner is None and getattr(awaitable, "cr_running", getattr(awaitable, "gi_running", False)):
+                running_frame = frame
+            awaitable = inner
+
+        if running_frame is not None:
+            # Executing right now: the rest of the stack is on the thread
+            # (or on the greenlet SQLAlchemy switched to, which has no link
+            # back to the coroutine, so the walk simply runs out)
+            above: List[str] = []
+            frame = sys._current_frames().get(self.thread_id)
+            while frame is not None and frame is not running_frame:
+                above.append(_label(frame))
+                frame = frame.f_back
+            stack.extend(reversed(above))
+        return tuple(stack)
+
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware profiling requests that present the profile token."""
+
+    def __init__(self, app, token: str, interval: float = 0.005, directory: str = ""):
+        self.app = app
+        self.token = token.encode()
+        self.interval = interval
+        self.directory = directory
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.token or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = TaskSampler(asyncio.current_task(), self.interval)
+        if self.directory:
+            await self._profile_to_file(scope, receive, send, sampler)
+        else:
+            await self._profile_to_response(scope, receive, send, sampler)
+
+    async def _profile_to_file(self, scope, receive, send, sampler: TaskSampler) -> None:
+        filename = None
+
+        async def send_wrapper(message):
+            nonlocal filename
+            if message["type"] == "http.response.start":
+                # The router has matched by now, so the name can carry the route
+                route = re.sub(r"[^A-Za-z0-9]+", "_", route_label(scope)).strip("_")
+                filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{route}-{uuid4().hex[:8]}.collapsed"
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_FILE_HEADER.lower().encode(), filename.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            if filename:
+                await asyncio.to_thread(self._write, filename, sampler.collapsed())
+
+    def _write(self, filename: str, collapsed: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), "w") as f:
+            f.write(collapsed)
+
+    async def _profile_to_response(self, scope, receive, send, sampler: TaskSampler) -> None:
+        status_code = 500
+
+        async def swallow(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, swallow)
+        finally:
+            sampler.stop()
+        body = sampler.collapsed().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", CONTENT_TYPE.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (PROFILED_STATUS_HEADER.lower().encode(), str(status_code).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,256 @@
+"""
+Per-request statement audit for development and staging.
+
+QueryAuditMiddleware records every statement a request sends (through
+get_db, get_read_db or anything else) along with where in our code it
+came from. Once the request finishes it logs a report if it finds any of
+these:
+
+- an N+1: the same SQL run `repeat_threshold` or more times with different
+  parameters, usually one query per row of an earlier result;
+- a statement slower than `slow_seconds`;
+- more statements than the route's budget.
+
+With `enforce`, the statement that goes over the budget raises
+QueryBudgetExceeded instead of running, so the request fails loudly.
+
+Finding the call site means walking the stack on each new statement, so
+keep this off in production. The test suite wraps the app in the
+middleware for tests marked `@pytest.mark.max_queries(n)`.
+"""
+import logging
+import os
+import re
+import sys
+import sysconfig
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+# Statements, call sites and libraries outside these are "ours"
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()[name] for name in ("stdlib", "purelib", "platlib")})
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Distinct parameter sets kept per statement; enough to tell "N+1" from "same query N times"
+MAX_PARAMETER_SETS = 100
+STATEMENT_PREVIEW = 160
+
+
+class QueryBudgetExceeded(Exception):
+    """A request sent more statements than its route's budget."""
+
+
+@dataclass
+class StatementStats:
+    """Every execution of one SQL string within a request."""
+    origin: str
+    count: int = 0
+    seconds: float = 0.0
+    slowest: float = 0.0
+    parameter_sets: Set[str] = field(default_factory=set)
+
+
+class QueryAudit:
+    """The statements one request has sent, keyed by SQL."""
+
+    def __init__(
+        self,
+        scope: Dict[str, Any],
+        budget: Optional[int] = None,
+        route_budgets: Optional[Mapping[str, int]] = None,
+        enforce: bool = False
+    ):
+        self.scope = scope
+        self.default_budget = budget
+        self.route_budgets = route_budgets or {}
+        self.enforce = enforce
+        self.count = 0
+        self.statements: Dict[str, StatementStats] = {}
+
+    @property
+    def route(self) -> str:
+        return f"{self.scope['method']} {route_label(self.scope)}"
+
+    @property
+    def budget(self) -> Optional[int]:
+        # The router adds the matched route to the scope before any dependency runs
+        return self.route_budgets.get(self.route, self.default_budget)
+
+    def check_budget(self) -> None:
+        """Called before each statement; raises if it would go over an enforced budget."""
+        self.count += 1
+        if self.enforce and self.budget is not None and self.count > self.budget:
+            raise QueryBudgetExceeded(
+                f"{self.route} sent more than {self.budget} statements\n{self.report(include_top=True)}"
+            )
+
+    def record(self, statement: str, parameters: Any, seconds: float) -> None:
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats(origin=call_site())
+        stats.count += 1
+        stats.seconds += seconds
+        stats.slowest = max(stats.slowest, seconds)
+        if len(stats.parameter_sets) < MAX_PARAMETER_SETS:
+            stats.parameter_sets.add(repr(parameters))
+
+    def repeated(self, threshold: int) -> Dict[str, StatementStats]:
+        """N+1 suspects: run `threshold` or more times, with more than one parameter set."""
+        return {
+            sql: stats for sql, stats in self.statements.items()
+            if stats.count >= threshold and len(stats.parameter_sets) > 1
+        }
+
+    def slow(self, seconds: float) -> Dict[str, StatementStats]:
+        return {sql: stats for sql, stats in self.statements.items() if stats.slowest >= seconds}
+
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def top(self, limit: int = 5) -> List[str]:
+        """SQL strings by how often, then how long, they ran."""
+        ranked = sorted(self.statements, key=lambda sql: (self.statements[sql].count, self.statements[sql].seconds))
+        return ranked[::-1][:limit]
+
+    def report(self, repeat_threshold: Optional[int] = None, slow_seconds: Optional[float] = None,
+               include_top: bool = False) -> str:
+        """One line for the request, then one per offending or top statement."""
+        repeated = self.repeated(repeat_threshold) if repeat_threshold else {}
+        slow = self.slow(slow_seconds) if slow_seconds is not None else {}
+        total_ms = sum(stats.seconds for stats in self.statements.values()) * 1000
+        budget = f" (budget {self.budget})" if self.budget is not None else ""
+        lines = [f"{self.route}: {self.count} statements, {total_ms:.1f} ms{budget}"]
+        shown = list(repeated) + [sql for sql in slow if sql not in repeated]
+        if include_top or self.over_budget() or not shown:
+            shown += [sql for sql in self.top() if sql not in shown]
+        for sql in shown:
+            stats = self.statements[sql]
+            kind = "N+1" if sql in repeated else "slow" if sql in slow else "top"
+            lines.append(
+                f"  {kind}: {stats.count}x ({len(stats.parameter_sets)} parameter sets), "
+                f"{stats.seconds * 1000:.1f} ms, slowest {stats.slowest * 1000:.1f} ms "
+                f"at {stats.origin}: {_preview(sql)}"
+            )
+        return "\n".join(lines)
+
+
+current_audit: ContextVar[Optional[QueryAudit]] = ContextVar("current_audit", default=None)
+
+
+def _preview(sql: str) -> str:
+    sql = re.sub(r"\s+", " ", sql).strip()
+    return sql if len(sql) <= STATEMENT_PREVIEW else sql[:STATEMENT_PREVIEW] + "..."
+
+
+def _is_ours(filename: str) -> bool:
+    return filename != __file__ and not filename.startswith(_LIBRARY_PATHS) and not filename.startswith("<")
+
+
+def call_site() -> str:
+    """
+    The innermost frame outside libraries that led to the current statement.
+
+    Under the async engine the statement runs in a greenlet whose stack ends
+    at SQLAlchemy's greenlet_spawn; the awaiting coroutine's frames are on
+    the parent greenlet, so the walk continues there.
+    """
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while frame is not None or current is not None:
+        while frame is not None:
+            if _is_ours(frame.f_code.co_filename):
+                filename = os.path.relpath(frame.f_code.co_filename, _ROOT)
+                return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+            frame = frame.f_back
+        current = current.parent if current is not None else None
+        frame = current.gr_frame if current is not None else None
+    return "unknown"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    audit = current_audit.get()
+    if audit is not None:
+        audit.check_budget()
+        conn.info.setdefault("audit_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    audit = current_audit.get()
+    started = conn.info.get("audit_started")
+    if audit is None or not started:
+        return
+    audit.record(statement, parameters, time.perf_counter() - started.pop())
+
+
+def instrument_queries() -> None:
+    """Audit statements on every engine against the current request."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        # First, so a statement refused for its budget isn't half-counted by other hooks
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute, insert=True)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """
+    Route budgets from "METHOD /route/template=N" entries separated by commas,
+    e.g. "GET /api/v1/friends=2,POST /api/v1/sessions/{session_id}/invite=6".
+    """
+    budgets = {}
+    for entry in (entry.strip() for entry in spec.split(",")):
+        if not entry:
+            continue
+        route, _, budget = entry.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        if not path or not budget.strip().isdigit():
+            raise ValueError(f"Invalid query budget {entry!r}, expected 'METHOD /path=N'")
+        budgets[f"{method.upper()} {path.strip()}"] = int(budget)
+    return budgets
+
+
+class QueryAuditMiddleware:
+    """Pure ASGI middleware auditing each request's statements."""
+
+    def __init__(
+        self,
+        app,
+        budget: Optional[int] = None,
+        route_budgets: Optional[Mapping[str, int]] = None,
+        enforce: bool = False,
+        repeat_threshold: int = 5,
+        slow_seconds: float = 0.1
+    ):
+        self.app = app
+        self.budget = budget
+        self.route_budgets = dict(route_budgets or {})
+        self.enforce = enforce
+        self.repeat_threshold = repeat_threshold
+        self.slow_seconds = slow_seconds
+        instrument_queries()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        audit = QueryAudit(scope, self.budget, self.route_budgets, self.enforce)
+        token = current_audit.set(audit)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_audit.reset(token)
+            if (
+                audit.over_budget()
+                or audit.repeated(self.repeat_threshold)
+                or audit.slow(self.slow_seconds)
+            ):
+                logger.warning(f"Query audit: {audit.report(self.repeat_threshold, self.slow_seconds)}")
+
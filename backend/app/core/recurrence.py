@@ -0,0 +1,153 @@
+"""
+Recurring session schedules.
+
+A recurring session stores its first occurrence in scheduled_at and an
+RFC 5545 RRULE (e.g. "FREQ=WEEKLY;BYDAY=MO,WE") in recurrence_rule.
+Occurrences are never stored; readers expand the rule lazily over the
+window they need, and per-occurrence changes live in
+session_occurrence_overrides.
+
+dateutil always iterates from a rule's start, which for a daily class
+that has run for two years means stepping through 700 past occurrences
+to reach today. For daily and weekly rules without COUNT (the shape of
+almost every gym class), expansion instead re-anchors the rule whole
+periods forward, just short of the window. Parsed and re-anchored rules
+are kept in LRU caches with dateutil's occurrence cache switched on, so
+expanding a window that was read before walks a list instead of
+recomputing the rule.
+
+Every rule is expanded on the event loop, so parse_rule only accepts
+rules whose expansion stays small: at most daily, a few times a day,
+and a COUNT or UNTIL no more than a few years out. Rules that repeat
+forever are fine; they are only ever expanded over a bounded window.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from dateutil.rrule import DAILY, WEEKLY, rrule, rrulestr
+
+RULE_CACHE_SIZE = 4096
+
+# Limits on what a rule may expand to (see parse_rule)
+MAX_RULE_LENGTH = 100  # sessions.recurrence_rule is String(100)
+MAX_TIMES_PER_DAY = 4
+MAX_COUNT = 1000
+MAX_SPAN = timedelta(days=5 * 366)
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def parse_rule(rule: str, dtstart: datetime) -> rrule:
+    """
+    Parse an RRULE starting at dtstart.
+
+    Raises ValueError if it is not a single valid rule, or if it is
+    outside the limits above: more often than daily, more than
+    MAX_TIMES_PER_DAY times a day, a COUNT over MAX_COUNT or an UNTIL
+    more than MAX_SPAN after dtstart.
+    """
+    if len(rule) > MAX_RULE_LENGTH:
+        raise ValueError(f"Recurrence rule longer than {MAX_RULE_LENGTH} characters")
+    try:
+        parsed = rrulestr(rule, dtstart=dtstart, cache=True)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid recurrence rule: {rule!r}") from exc
+    if not isinstance(parsed, rrule):
+        # EXDATE/RDATE sets; per-occurrence changes are overrides instead
+        raise ValueError(f"Unsupported recurrence rule: {rule!r}")
+    # dateutil's frequencies run YEARLY (0) to SECONDLY (6)
+    if parsed._freq > DAILY:
+        raise ValueError("Recurrence rules may repeat at most daily")
+    times_per_day = len(parsed._byhour or ()) * len(parsed._byminute or ()) * len(parsed._bysecond or ())
+    if times_per_day > MAX_TIMES_PER_DAY:
+        raise ValueError(f"Recurrence rules may repeat at most {MAX_TIMES_PER_DAY} times a day")
+    if parsed._count is not None and parsed._count > MAX_COUNT:
+        raise ValueError(f"Recurrence COUNT may be at most {MAX_COUNT}")
+    if parsed._until is not None and parsed._until - dtstart > MAX_SPAN:
+        raise ValueError(f"Recurrence UNTIL may be at most {MAX_SPAN.days} days after the first occurrence")
+    return parsed
+
+
+def _period(parsed: rrule) -> Optional[timedelta]:
+    """The rule's repeat period, if shifting its start by whole periods keeps it identical."""
+    # COUNT is counted from the very first occurrence, so those rules can't move
+    if parsed._count is not None:
+        return None
+    if parsed._freq == DAILY:
+        return timedelta(days=parsed._interval)
+    if parsed._freq == WEEKLY:
+        return timedelta(weeks=parsed._interval)
+    return None
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def _anchored(rule: str, dtstart: datetime, periods: int) -> rrule:
+    parsed = parse_rule(rule, dtstart)
+    return parsed.replace(dtstart=dtstart + periods * _period(parsed))
+
+
+def occurrences(
+    rule: Optional[str],
+    dtstart: datetime,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Iterator[datetime]:
+    """
+    Occurrence start times between start and end (both inclusive), in order.
+
+    Lazy: an open-ended rule with no end yields for as long as the caller
+    keeps reading. A missing or unparseable rule yields just dtstart.
+    """
+    try:
+        parsed = parse_rule(rule, dtstart) if rule else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        if (start is None or dtstart >= start) and (end is None or dtstart <= end):
+            yield dtstart
+        return
+
+    if start is None or start <= dtstart:
+        iterator = iter(parsed)
+    else:
+        period = _period(parsed)
+        if period is not None:
+            # One period short of the window: occurrences that share the new
+            # anchor's period but come before it are all earlier than start
+            periods = (start - dtstart) // period - 1
+            if periods > 0:
+                parsed = _anchored(rule, dtstart, periods)
+        iterator = parsed.xafter(start, inc=True)
+    for occurrence in iterator:
+        if end is not None and occurrence > end:
+            return
+        yield occurrence
+
+
+def last_occurrence(rule: Optional[str], dtstart: datetime) -> Optional[datetime]:
+    """
+    When the series ends, as a bound for feed queries: UNTIL itself for
+    UNTIL rules (no occurrence comes after it), the final occurrence for
+    COUNT rules and None for rules that repeat forever. A series with no
+    (valid) rule is just its first occurrence.
+    """
+    try:
+        parsed = parse_rule(rule, dtstart) if rule else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        return dtstart
+    if parsed._until is not None:
+        return max(parsed._until, dtstart)
+    if parsed._count is None:
+        return None
+    # At most MAX_COUNT steps
+    last = dtstart
+    for last in parsed:
+        pass
+    return last
+
+
+def is_occurrence(rule: Optional[str], dtstart: datetime, when: datetime) -> bool:
+    """Whether the series has an occurrence starting exactly at `when`."""
+    return next(occurrences(rule, dtstart, when, when), None) == when
@@ -0,0 +1,200 @@
+"""
+Shared cache of rendered JSON responses, with ETag revalidation.
+
+Entries are the response body plus its ETag, so a hit is served without
+touching the database or re-serializing anything. Backends:
+
+- MemoryCacheBackend: TTL + LRU in this process. Each worker has its own,
+  so an invalidation only reaches the worker that made the change; the
+  others catch up when their entry expires.
+- RedisCacheBackend: shared by every worker, so invalidation is immediate
+  everywhere. Requires the `redis` package. Redis errors are logged and
+  treated as misses, so an outage slows requests down but doesn't fail them.
+- NullCacheBackend: never stores anything. ETags and 304s still work.
+
+cached_response() answers a request whose If-None-Match matches the ETag
+with an empty 304, and anything else with the body, its ETag and a
+Cache-Control max-age, so clients can reuse or revalidate what they have.
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+ETAG_HEADER = "ETag"
+JSON_CONTENT_TYPE = "application/json"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+
+    def pack(self) -> bytes:
+        return self.etag.encode() + b"\n" + self.body
+
+    @classmethod
+    def unpack(cls, value: bytes) -> "CachedResponse":
+        etag, _, body = value.partition(b"\n")
+        return cls(etag=etag.decode(), body=body)
+
+    @classmethod
+    def for_body(cls, body: bytes) -> "CachedResponse":
+        return cls(etag=etag_for(body), body=body)
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the body, so equal responses share one."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match semantics: weak comparison against any listed tag, or `*`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cached_response(request: Request, cached: CachedResponse, max_age: int) -> Response:
+    headers = {ETAG_HEADER: cached.etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=JSON_CONTENT_TYPE, headers=headers)
+
+
+class CacheBackend:
+    """Byte-string store with per-key expiry."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int]) -> None:
+        """Store value; a ttl_seconds of None keeps it until it is deleted or evicted."""
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class NullCacheBackend(CacheBackend):
+    """Caching turned off."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int]) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """TTL + LRU cache local to this process."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int]) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by every worker through Redis (or anything speaking its protocol)."""
+
+    def __init__(self, client, prefix: str = "gymbuddy:"):
+        from redis.exceptions import RedisError
+
+        self.client = client
+        self.prefix = prefix
+        self._errors = (RedisError, OSError)
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "gymbuddy:") -> "RedisCacheBackend":
+        import redis.asyncio
+
+        return cls(redis.asyncio.Redis.from_url(url), prefix)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(self.prefix + key)
+        except self._errors as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[int]) -> None:
+        try:
+            await self.client.set(self.prefix + key, value, ex=ttl_seconds)
+        except self._errors as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self.client.delete(*(self.prefix + key for key in keys))
+        except self._errors as e:
+            logger.warning(f"Response cache invalidation failed: {e}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def build_backend(kind: str, redis_url: str = "", max_entries: int = 10000) -> CacheBackend:
+    if kind == "memory":
+        return MemoryCacheBackend(max_entries)
+    if kind == "redis":
+        return RedisCacheBackend.from_url(redis_url)
+    if kind == "none":
+        return NullCacheBackend()
+    raise ValueError(f"Unknown cache backend {kind!r}, expected 'memory', 'redis' or 'none'")
@@ -0,0 +1,36 @@
+"""
+JSON responses rendered with orjson.
+
+ORJSONResponse is the app's default response class. Plain data (dicts,
+lists, whatever FastAPI produced from a response_model) is encoded with
+orjson instead of the stdlib json module.
+
+FastAPI also validates a handler's return value against its
+response_model and serializes it again, even when the handler already
+built that exact model. Hot endpoints skip that second pass by returning
+`ORJSONResponse(models)` themselves. Pydantic models (or lists of them)
+are rendered by pydantic-core's serializer, which is compiled for the
+schema and emits the same JSON FastAPI would. The route's response_model
+still documents the schema.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+def _is_models(content: Any) -> bool:
+    if isinstance(content, BaseModel):
+        return True
+    return isinstance(content, list) and bool(content) and isinstance(content[0], BaseModel)
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """orjson for plain data; pydantic-core for already-validated models."""
+
+    def render(self, content: Any) -> bytes:
+        if _is_models(content):
+            return to_json(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
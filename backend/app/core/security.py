@@ -7,6 +7,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
+from app.core.token_cache import token_cache
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import TokenData
@@ -40,6 +41,12 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    
+    # Verified before and not yet expired: skip the decode and the SELECT
+    cached = token_cache.get(token)
+    if cached is not None:
+        return await db.merge(cached.user, load=False)
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         user_id: str = payload.get("sub")
@@ -51,6 +58,8 @@ async def get_current_user(
     
     from app.crud.user import get_user_by_id
     user = await get_user_by_id(db, token_data.user_id)
-    if user is None:
+    if user is None or not user.is_active:
         raise credentials_exception
+    
+    token_cache.set(token, payload, user)
     return user
@@ -0,0 +1,130 @@
+"""
+In-process cache of verified access tokens.
+
+get_current_user runs on every authenticated request. Without a cache each
+one decodes the JWT and SELECTs the user row. Entries are keyed by the token
+signature and hold the decoded claims plus a detached snapshot of the user,
+so a hit costs neither. Entries expire at the earlier of the cache TTL and
+the token's own `exp`, and are dropped explicitly whenever the user row
+changes (profile update, notification preferences, deactivation).
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import get_settings
+from app.models.user import User
+
+
+@dataclass
+class CachedToken:
+    claims: Dict[str, Any]
+    user: User
+    expires_at: float
+
+
+def token_signature(token: str) -> str:
+    """The JWT signature segment, which uniquely identifies a signed token."""
+    return token.rsplit(".", 1)[-1]
+
+
+def snapshot_user(user: User) -> User:
+    """
+    Copy a loaded user's column values into a new detached instance.
+
+    The snapshot can be attached to any request's session with
+    `session.merge(snapshot, load=False)`, which does not emit a SELECT.
+    """
+    data = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    snapshot = User(**data)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+class TokenCache:
+    """TTL + LRU cache of verified tokens with per-user invalidation."""
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CachedToken]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = Lock()
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        key = token_signature(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, token: str, claims: Dict[str, Any], user: User) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+
+        key = token_signature(token)
+        entry = CachedToken(claims=claims, user=snapshot_user(user), expires_at=expires_at)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token belonging to a user."""
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry.user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry.user.id]
+
+
+def _build_cache() -> TokenCache:
+    settings = get_settings()
+    return TokenCache(
+        ttl_seconds=settings.token_cache_ttl_seconds,
+        max_entries=settings.token_cache_max_entries
+    )
+
+
+token_cache = _build_cache()
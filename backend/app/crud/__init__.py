@@ -1,9 +1,10 @@
 from app.crud.user import (
-    get_user_by_id, get_user_by_email, create_user, update_user, create_oauth_user
+    get_user_by_id, get_user_by_email, create_user, update_user, deactivate_user,
+    create_oauth_user
 )
 from app.crud.social import (
     get_friendship, create_friend_request, update_friendship_status,
-    get_friends, get_pending_requests,
+    get_friends, get_friends_with_users, get_pending_requests,
     get_group_by_id, create_group, update_group, get_user_groups
 )
 from app.crud.gym import (
@@ -15,13 +16,21 @@ from app.crud.session import (
     get_session_feed, join_session, leave_session, check_in,
     add_exercise_to_session
 )
+from app.crud.feed import (
+    fan_out_session, link_friend_feeds, unlink_friend_feeds, backfill_feed
+)
+from app.crud.outbox import (
+    enqueue_notifications, claim_due_notifications, mark_notifications_sent,
+    reschedule_notifications, purge_sent_notifications
+)
 
 __all__ = [
     # user
-    "get_user_by_id", "get_user_by_email", "create_user", "update_user", "create_oauth_user",
+    "get_user_by_id", "get_user_by_email", "create_user", "update_user", "deactivate_user",
+    "create_oauth_user",
     # social
     "get_friendship", "create_friend_request", "update_friendship_status",
-    "get_friends", "get_pending_requests",
+    "get_friends", "get_friends_with_users", "get_pending_requests",
     "get_group_by_id", "create_group", "update_group", "get_user_groups",
     # gym
     "get_gym_by_id", "create_gym", "update_gym", "search_gyms",
@@ -30,4 +39,9 @@ __all__ = [
     "get_session_by_id", "create_session", "update_session", "delete_session",
     "get_session_feed", "join_session", "leave_session", "check_in",
     "add_exercise_to_session",
+    # feed
+    "fan_out_session", "link_friend_feeds", "unlink_friend_feeds", "backfill_feed",
+    # outbox
+    "enqueue_notifications", "claim_due_notifications", "mark_notifications_sent",
+    "reschedule_notifications", "purge_sent_notifications",
 ]
@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional, Set
+from sqlalchemy import select, insert, delete, literal, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.feed import FeedEntry
+from app.models.session import Session, SessionVisibility
+from app.models.social import Friendship, FriendshipStatus, Group, group_members
+
+# Visibilities that reach the creator's friends
+FRIEND_VISIBILITIES = (SessionVisibility.FRIENDS, SessionVisibility.PUBLIC)
+
+
+async def get_friend_ids(db: AsyncSession, user_id: str) -> List[str]:
+    result = await db.execute(
+        select(Friendship.requester_id, Friendship.addressee_id).where(
+            and_(
+                or_(
+                    Friendship.requester_id == user_id,
+                    Friendship.addressee_id == user_id
+                ),
+                Friendship.status == FriendshipStatus.ACCEPTED
+            )
+        )
+    )
+    return [
+        addressee_id if requester_id == user_id else requester_id
+        for requester_id, addressee_id in result.all()
+    ]
+
+
+async def get_feed_recipients(
+    db: AsyncSession,
+    session: Session,
+    friends_cache: Optional[Dict[str, List[str]]] = None
+) -> Set[str]:
+    """Users whose feed should contain the session."""
+    if session.is_cancelled:
+        return set()
+
+    recipients = {session.creator_id}
+    if session.visibility in FRIEND_VISIBILITIES:
+        if friends_cache is None:
+            recipients.update(await get_friend_ids(db, session.creator_id))
+        else:
+            if session.creator_id not in friends_cache:
+                friends_cache[session.creator_id] = await get_friend_ids(db, session.creator_id)
+            recipients.update(friends_cache[session.creator_id])
+    elif session.visibility == SessionVisibility.GROUP and session.group_id:
+        members = await db.execute(
+            select(group_members.c.user_id).where(group_members.c.group_id == session.group_id)
+        )
+        recipients.update(members.scalars().all())
+        owner = await db.execute(select(Group.owner_id).where(Group.id == session.group_id))
+        recipients.update(owner.scalars().all())
+    return recipients
+
+
+async def fan_out_session(
+    db: AsyncSession,
+    session: Session,
+    friends_cache: Optional[Dict[str, List[str]]] = None
+) -> None:
+    """Rewrite a session's feed entries from its current state."""
+    await db.execute(delete(FeedEntry).where(FeedEntry.session_id == session.id))
+    recipients = await get_feed_recipients(db, session, friends_cache)
+    if recipients:
+        await db.execute(
+            insert(FeedEntry),
+            [
+                {
+                    "user_id": user_id, "session_id": session.id,
+                    "scheduled_at": session.scheduled_at, "is_recurring": session.is_recurring
+                }
+                for user_id in recipients
+            ]
+        )
+
+
+async def remove_session_from_feeds(db: AsyncSession, session_id: str) -> None:
+    await db.execute(delete(FeedEntry).where(FeedEntry.session_id == session_id))
+
+
+async def link_friend_feeds(db: AsyncSession, user_id: str, friend_id: str) -> None:
+    """Copy each new friend's friend-visible sessions into the other's feed."""
+    for reader_id, creator_id in ((user_id, friend_id), (friend_id, user_id)):
+        already_in_feed = select(FeedEntry.session_id).where(FeedEntry.user_id == reader_id)
+        await db.execute(
+            insert(FeedEntry).from_select(
+                ["user_id", "session_id", "scheduled_at", "is_recurring"],
+                select(literal(reader_id), Session.id, Session.scheduled_at, Session.is_recurring).where(
+                    Session.creator_id == creator_id,
+                    Session.visibility.in_(FRIEND_VISIBILITIES),
+                    Session.is_cancelled.is_(False),
+                    Session.id.not_in(already_in_feed)
+                )
+            )
+        )
+
+
+async def unlink_friend_feeds(db: AsyncSession, user_id: str, friend_id: str) -> None:
+    """Drop former friends' friend-visible sessions from each other's feed."""
+    for reader_id, creator_id in ((user_id, friend_id), (friend_id, user_id)):
+        await db.execute(
+            delete(FeedEntry).where(
+                FeedEntry.user_id == reader_id,
+                FeedEntry.session_id.in_(
+                    select(Session.id).where(
+                        Session.creator_id == creator_id,
+                        Session.visibility.in_(FRIEND_VISIBILITIES)
+                    )
+                )
+            )
+        )
+
+
+async def backfill_feed(db: AsyncSession, batch_size: int = 500) -> int:
+    """
+    Rebuild feed entries for every session.
+
+    Safe to re-run: each session's entries are rewritten in place. Commits
+    after each batch and returns the number of sessions processed.
+    """
+    friends_cache: Dict[str, List[str]] = {}
+    processed = 0
+    last_id = ""
+    while True:
+        result = await db.execute(
+            select(Session).where(Session.id > last_id).order_by(Session.id).limit(batch_size)
+        )
+        sessions = result.scalars().all()
+        if not sessions:
+            return processed
+        for session in sessions:
+            await fan_out_session(db, session, friends_cache)
+        await db.commit()
+        processed += len(sessions)
+        last_id = sessions[-1].id
+        db.expunge_all()
@@ -1,11 +1,18 @@
+import math
+from functools import partial
 from typing import List, Optional
 from uuid import uuid4
-from sqlalchemy import select, func
+from sqlalchemy import select, and_, case, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.geo import KM_PER_DEGREE, covering_cells, encode_geohash, haversine_km, next_prefix
+from app.core.pagination import Cursor, keyset
+from app.db.session import after_commit
 from app.models.gym import Gym
 from app.models.user import UserFavoriteGym
 from app.schemas.gym import GymCreate, GymUpdate
+from app.services.gym_cache import gym_cache
+from app.services.gym_search import get_search_backend
 
 
 async def get_gym_by_id(db: AsyncSession, gym_id: str) -> Optional[Gym]:
@@ -18,11 +25,14 @@ async def create_gym(db: AsyncSession, gym_in: GymCreate, created_by_id: Optiona
         id=str(uuid4()),
         is_custom=created_by_id is not None,
         created_by_id=created_by_id,
+        geohash=encode_geohash(gym_in.latitude, gym_in.longitude),
         **gym_in.model_dump()
     )
     db.add(gym)
     await db.flush()
     await db.refresh(gym)
+    after_commit(db, partial(get_search_backend(db).on_gym_changed, gym))
+    after_commit(db, partial(gym_cache.invalidate, gym.id))
     return gym
 
 
@@ -30,38 +40,109 @@ async def update_gym(db: AsyncSession, gym: Gym, gym_in: GymUpdate) -> Gym:
     update_data = gym_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(gym, field, value)
+    if "latitude" in update_data or "longitude" in update_data:
+        gym.geohash = encode_geohash(gym.latitude, gym.longitude)
     await db.flush()
     await db.refresh(gym)
+    after_commit(db, partial(get_search_backend(db).on_gym_changed, gym))
+    after_commit(db, partial(gym_cache.invalidate, gym.id))
     return gym
 
 
+def _geohash_filter(latitude: float, longitude: float, radius_km: float):
+    """Index-backed range conditions on Gym.geohash covering the search circle."""
+    cells = covering_cells(latitude, longitude, radius_km)
+    if not cells:
+        return None
+    ranges = []
+    for cell in cells:
+        upper = next_prefix(cell)
+        if upper is None:
+            ranges.append(Gym.geohash >= cell)
+        else:
+            ranges.append(and_(Gym.geohash >= cell, Gym.geohash < upper))
+    return or_(*ranges)
+
+
+def _longitude_filter(longitude: float, lon_range: float):
+    """Longitude condition for the bounding box, split in two where it crosses ±180°."""
+    if lon_range >= 180.0:
+        return None
+    lon_min, lon_max = longitude - lon_range, longitude + lon_range
+    if lon_min < -180.0:
+        return or_(Gym.longitude >= lon_min + 360.0, Gym.longitude <= lon_max)
+    if lon_max > 180.0:
+        return or_(Gym.longitude >= lon_min, Gym.longitude <= lon_max - 360.0)
+    return Gym.longitude.between(lon_min, lon_max)
+
+
 async def search_gyms(
     db: AsyncSession,
     query: Optional[str] = None,
     latitude: Optional[float] = None,
     longitude: Optional[float] = None,
     radius_km: float = 10.0,
-    limit: int = 20
+    limit: int = 20,
+    after: Optional[Cursor] = None
 ) -> List[Gym]:
+    """
+    Search gyms by name/address and/or location.
+    
+    Text queries are matched and ranked by the configured search backend
+    (pg_trgm on PostgreSQL). Location searches are answered from the
+    geohash index and limited to the true radius, with each gym's Haversine
+    distance set as `distance_km`. Results are ordered by relevance when
+    there is a text query, otherwise by distance. With neither, gyms are
+    listed by (created_at, id), starting after the `after` cursor.
+    """
     stmt = select(Gym)
     
+    located = latitude is not None and longitude is not None
     if query:
-        stmt = stmt.where(Gym.name.ilike(f"%{query}%"))
+        stmt = await get_search_backend(db).apply(db, stmt, query, None if located else limit)
     
-    if latitude is not None and longitude is not None:
-        # Simple distance calculation (Haversine would be more accurate)
-        # This is a rough approximation for nearby filtering
-        lat_range = radius_km / 111.0  # ~111km per degree latitude
-        lon_range = radius_km / (111.0 * abs(func.cos(func.radians(latitude))))
-        
-        stmt = stmt.where(
-            Gym.latitude.between(latitude - lat_range, latitude + lat_range),
-            Gym.longitude.between(longitude - lon_range, longitude + lon_range)
-        )
+    if not located:
+        if not query:
+            stmt = keyset(stmt, Gym.created_at, Gym.id, after)
+        stmt = stmt.limit(limit)
+        result = await db.execute(stmt)
+        return result.scalars().all()
+    
+    geohash_filter = _geohash_filter(latitude, longitude, radius_km)
+    if geohash_filter is not None:
+        stmt = stmt.where(geohash_filter)
+    
+    # Bounding box trims the corners of the covering cells
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lat_range = radius_km / KM_PER_DEGREE
+    lon_range = radius_km / (KM_PER_DEGREE * cos_lat)
+    stmt = stmt.where(Gym.latitude.between(latitude - lat_range, latitude + lat_range))
+    longitude_filter = _longitude_filter(longitude, lon_range)
+    if longitude_filter is not None:
+        stmt = stmt.where(longitude_filter)
+    
+    # Equirectangular distance is plain arithmetic (portable across
+    # databases) and orders nearby points the same way Haversine does.
+    # The longitude difference is wrapped so gyms across ±180° sort as near.
+    d_lat = Gym.latitude - latitude
+    raw_d_lon = Gym.longitude - longitude
+    d_lon = case(
+        (raw_d_lon > 180.0, raw_d_lon - 360.0),
+        (raw_d_lon < -180.0, raw_d_lon + 360.0),
+        else_=raw_d_lon
+    ) * cos_lat
+    stmt = stmt.order_by(d_lat * d_lat + d_lon * d_lon).limit(limit)
     
-    stmt = stmt.limit(limit)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    gyms = []
+    for gym in result.scalars().all():
+        distance = haversine_km(latitude, longitude, gym.latitude, gym.longitude)
+        if distance <= radius_km:
+            gym.distance_km = round(distance, 3)
+            gyms.append(gym)
+    if not query:
+        gyms.sort(key=lambda g: g.distance_km)
+    return gyms
 
 
 async def add_favorite_gym(db: AsyncSession, user_id: str, gym_id: str) -> UserFavoriteGym:
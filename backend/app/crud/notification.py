@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 from datetime import datetime
-from sqlalchemy import select, delete
+from sqlalchemy import String, select, delete, update, insert, and_, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.notification import NotificationToken
+from app.models.notification import NotificationToken, PushTicket
+from app.models.user import User
 from app.schemas.notification import NotificationTokenCreate
 
 
@@ -41,8 +43,7 @@ async def register_token(
         existing.device_type = token_in.device_type
         existing.is_active = True
         existing.updated_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(existing)
+        await db.flush()
         return existing
     
     # Create new token
@@ -56,8 +57,7 @@ async def register_token(
         updated_at=datetime.utcnow()
     )
     db.add(token)
-    await db.commit()
-    await db.refresh(token)
+    await db.flush()
     return token
 
 
@@ -66,19 +66,30 @@ async def unregister_token(db: AsyncSession, token: str) -> bool:
     result = await db.execute(
         delete(NotificationToken).where(NotificationToken.token == token)
     )
-    await db.commit()
     return result.rowcount > 0
 
 
-async def deactivate_token(db: AsyncSession, token: str) -> bool:
-    """Mark a token as inactive (for failed deliveries)."""
-    existing = await get_token_by_value(db, token)
-    if existing:
-        existing.is_active = False
-        existing.updated_at = datetime.utcnow()
-        await db.commit()
-        return True
-    return False
+async def deactivate_tokens(db: AsyncSession, tokens: List[str]) -> int:
+    """
+    Mark many tokens inactive in one UPDATE; returns how many were active.
+    
+    Does not commit; the caller's transaction does.
+    """
+    if not tokens:
+        return 0
+    tokens = list(set(tokens))
+    if db.get_bind().dialect.name == "postgresql":
+        # token = ANY(:tokens): one array parameter however many tokens
+        matches = NotificationToken.token == any_(bindparam("tokens", tokens, type_=ARRAY(String)))
+    else:
+        matches = NotificationToken.token.in_(tokens)
+    result = await db.execute(
+        update(NotificationToken)
+        .where(matches, NotificationToken.is_active.is_(True))
+        .values(is_active=False, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
 
 
 async def get_tokens_for_users(
@@ -92,3 +103,64 @@ async def get_tokens_for_users(
         .where(NotificationToken.is_active.is_(True))
     )
     return list(result.scalars().all())
+
+
+async def get_notification_targets(
+    db: AsyncSession,
+    user_ids: List[str],
+    preference: str
+) -> Dict[str, List[str]]:
+    """
+    Active push tokens for each of the given users, in one query.
+    
+    Keys are the user IDs that exist; users who turned off the `preference`
+    column (e.g. "notify_session_invites") map to an empty list.
+    """
+    wants_push = getattr(User, preference)
+    result = await db.execute(
+        select(User.id, wants_push, NotificationToken.token)
+        .outerjoin(
+            NotificationToken,
+            and_(
+                NotificationToken.user_id == User.id,
+                NotificationToken.is_active.is_(True)
+            )
+        )
+        .where(User.id.in_(user_ids))
+    )
+    targets: Dict[str, List[str]] = {}
+    for user_id, enabled, token in result.all():
+        tokens = targets.setdefault(user_id, [])
+        if token and enabled is not False:
+            tokens.append(token)
+    return targets
+
+
+async def record_push_tickets(db: AsyncSession, tickets: List[Tuple[str, str]]) -> None:
+    """Store (ticket_id, token) pairs so their receipts can be polled later."""
+    if tickets:
+        now = datetime.utcnow()
+        await db.execute(
+            insert(PushTicket),
+            [{"id": ticket_id, "token": token, "created_at": now} for ticket_id, token in tickets]
+        )
+
+
+async def get_due_push_tickets(
+    db: AsyncSession,
+    issued_before: datetime,
+    limit: int
+) -> List[PushTicket]:
+    """Oldest tickets issued before the cutoff, i.e. whose receipts should be ready."""
+    result = await db.execute(
+        select(PushTicket)
+        .where(PushTicket.created_at <= issued_before)
+        .order_by(PushTicket.created_at)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def delete_push_tickets(db: AsyncSession, ticket_ids: List[str]) -> None:
+    if ticket_ids:
+        await db.execute(delete(PushTicket).where(PushTicket.id.in_(ticket_ids)))
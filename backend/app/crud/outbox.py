@@ -0,0 +1,167 @@
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.notification import NotificationOutbox, OutboxStatus
+
+
+async def enqueue_notifications(
+    db: AsyncSession,
+    notifications: List[Dict[str, Any]]
+) -> None:
+    """
+    Queue push notifications in the caller's transaction.
+
+    Each dict holds idempotency_key, user_id, title, body and optionally
+    data and channel_id. Keys that are already queued are skipped, so
+    retried requests don't notify twice. Nothing is committed here; the
+    rows become visible to the dispatcher when the request commits.
+    """
+    if not notifications:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": str(uuid4()),
+            "data": None,
+            "channel_id": "default",
+            **notification,
+            "status": OutboxStatus.PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for notification in notifications
+    ]
+    dialect_insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    await db.execute(
+        dialect_insert(NotificationOutbox).on_conflict_do_nothing(index_elements=["idempotency_key"]),
+        rows
+    )
+
+
+async def claim_due_notifications(
+    db: AsyncSession,
+    limit: int,
+    lease_seconds: float
+) -> List[NotificationOutbox]:
+    """
+    Claim up to `limit` due notifications for sending.
+
+    Claimed rows get their attempt counted and next_attempt_at pushed out
+    by the lease, so a dispatcher that dies mid-send leaves them to be
+    picked up again once the lease runs out. SKIP LOCKED lets several
+    dispatchers claim disjoint batches. The caller commits the claim.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(NotificationOutbox)
+        .where(
+            NotificationOutbox.status == OutboxStatus.PENDING,
+            NotificationOutbox.next_attempt_at <= now
+        )
+        .order_by(NotificationOutbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = list(result.scalars().all())
+    if claimed:
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_([row.id for row in claimed]))
+            .values(
+                attempts=NotificationOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        for row in claimed:
+            row.attempts += 1
+    return claimed
+
+
+async def extend_lease(db: AsyncSession, ids: List[str], lease_seconds: float) -> None:
+    """Push claimed rows' next_attempt_at out to lease_seconds from now."""
+    if ids:
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(ids))
+            .values(next_attempt_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def set_pending_tokens(db: AsyncSession, pending: Dict[str, List[str]]) -> None:
+    """Limit each row's next attempt to the given tokens (row id -> tokens)."""
+    for row_id, tokens in pending.items():
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == row_id)
+            .values(pending_tokens=tokens)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def mark_notifications_sent(db: AsyncSession, ids: List[str]) -> None:
+    if ids:
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(ids))
+            .values(status=OutboxStatus.SENT, sent_at=datetime.utcnow(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def retry_delay(attempts: int, base_seconds: float, max_seconds: float) -> float:
+    """Exponential backoff after the given number of attempts."""
+    return min(base_seconds * 2 ** max(attempts - 1, 0), max_seconds)
+
+
+async def reschedule_notifications(
+    db: AsyncSession,
+    rows: List[NotificationOutbox],
+    error: str,
+    max_attempts: int,
+    base_seconds: float,
+    max_seconds: float
+) -> None:
+    """Back failed rows off exponentially, or give up after max_attempts."""
+    now = datetime.utcnow()
+    # One UPDATE per distinct attempt count rather than per row
+    by_attempts: Dict[int, List[str]] = {}
+    for row in rows:
+        by_attempts.setdefault(row.attempts, []).append(row.id)
+    for attempts, ids in by_attempts.items():
+        if attempts >= max_attempts:
+            values = {"status": OutboxStatus.FAILED, "last_error": error}
+        else:
+            delay = retry_delay(attempts, base_seconds, max_seconds)
+            values = {"next_attempt_at": now + timedelta(seconds=delay), "last_error": error}
+        await db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def purge_sent_notifications(db: AsyncSession, older_than: datetime) -> int:
+    """Delete delivered rows past retention; returns the number removed."""
+    result = await db.execute(
+        delete(NotificationOutbox).where(
+            NotificationOutbox.status == OutboxStatus.SENT,
+            NotificationOutbox.sent_at < older_than
+        )
+    )
+    return result.rowcount
+
+
+async def get_outbox_entry(db: AsyncSession, idempotency_key: str) -> Optional[NotificationOutbox]:
+    result = await db.execute(
+        select(NotificationOutbox).where(NotificationOutbox.idempotency_key == idempotency_key)
+    )
+    return result.scalar_one_or_none()
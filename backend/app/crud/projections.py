@@ -0,0 +1,251 @@
+"""
+Column projections for session responses.
+
+The session list and detail endpoints only need a handful of columns from
+sessions, gyms and users (participant counts are kept on the sessions
+row). Loading them as ORM objects and then validating
+GymResponse/UserPublicResponse out of those objects costs far more than
+the data is worth. These queries select exactly the response fields in
+one joined statement and build the response models with model_construct: the values come straight from typed
+columns, so there is nothing left to validate. session_detail_from_orm does
+the same for a session the write endpoints have already loaded.
+
+Recurring series appear in the feed once per occurrence: their rules are
+expanded lazily over the requested window (app.core.recurrence), with
+overrides applied, and merged in order with the one-off sessions.
+"""
+import heapq
+from datetime import datetime, timezone
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.pagination import Cursor
+from app.core.recurrence import occurrences
+from app.crud.session import feed_session_ids, get_occurrence_overrides, recurring_series_ids
+from app.models.gym import Gym
+from app.models.session import Session, SessionExercise, SessionOccurrenceOverride, SessionParticipant
+from app.models.user import User
+from app.schemas.gym import GymResponse
+from app.schemas.session import (
+    ExerciseResponse, SessionDetailResponse, SessionParticipantResponse, SessionResponse
+)
+from app.schemas.user import UserPublicResponse
+
+SESSION_FIELDS = (
+    "id", "title", "description", "scheduled_at", "duration_minutes", "visibility",
+    "max_participants", "is_recurring", "is_cancelled", "participant_count", "going_count",
+    "created_at"
+)
+# distance_km is only filled in by radius search
+GYM_FIELDS = tuple(name for name in GymResponse.model_fields if name != "distance_km")
+USER_FIELDS = tuple(UserPublicResponse.model_fields)
+PARTICIPANT_FIELDS = ("id", "rsvp_status", "checked_in", "checked_in_at")
+EXERCISE_FIELDS = tuple(ExerciseResponse.model_fields)
+
+Creator = aliased(User, name="creator")
+
+# (scheduled_at, session id, occurrence_start) of one occurrence of a series
+Occurrence = Tuple[datetime, str, datetime]
+_feed_position = itemgetter(0, 1)
+
+
+def _columns(entity: Any, fields: tuple, prefix: str = "") -> list:
+    return [getattr(entity, name).label(prefix + name) for name in fields]
+
+
+def _pick(row: Mapping[str, Any], fields: tuple, prefix: str = "") -> Dict[str, Any]:
+    return {name: row[prefix + name] for name in fields}
+
+
+def _attrs(obj: Any, fields: tuple) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in fields}
+
+
+def _summary_select(*extra: Any) -> Select:
+    return (
+        select(
+            *_columns(Session, SESSION_FIELDS),
+            *_columns(Gym, GYM_FIELDS, "gym_"),
+            *_columns(Creator, USER_FIELDS, "creator_"),
+            *extra
+        )
+        .join(Gym, Gym.id == Session.gym_id)
+        .join(Creator, Creator.id == Session.creator_id)
+    )
+
+
+def _summary_fields(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        **_pick(row, SESSION_FIELDS),
+        "gym": GymResponse.model_construct(**_pick(row, GYM_FIELDS, "gym_")),
+        "creator": UserPublicResponse.model_construct(**_pick(row, USER_FIELDS, "creator_")),
+    }
+
+
+async def get_session_summaries(
+    db: AsyncSession,
+    user_id: str,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    include_public: bool = True,
+    limit: int = 50,
+    after: Optional[Cursor] = None
+) -> List[SessionResponse]:
+    """
+    The user's session feed (see get_session_feed) as SessionResponse
+    models, with each recurring series expanded into its occurrences.
+    
+    One query for the one-off sessions, one for the recurring series and
+    one for their overrides.
+    """
+    stmt = (
+        _summary_select()
+        .where(Session.id.in_(feed_session_ids(
+            user_id, from_date, to_date, include_public, limit, after, include_recurring=False
+        )))
+        .order_by(Session.scheduled_at, Session.id)
+    )
+    result = await db.execute(stmt)
+    one_offs = [SessionResponse.model_construct(**_summary_fields(row)) for row in result.mappings()]
+    series, upcoming = await _series_occurrences(db, user_id, from_date, to_date, include_public, after)
+    if not series:
+        return one_offs
+    
+    # Merge on (scheduled_at, id, one-off summary or occurrence_start) and
+    # only build models for the occurrences that make the page
+    merged = heapq.merge(
+        ((summary.scheduled_at, summary.id, summary) for summary in one_offs), upcoming, key=_feed_position
+    )
+    series_fields: Dict[str, Dict[str, Any]] = {}
+    page = []
+    for scheduled_at, session_id, item in islice(merged, limit):
+        if isinstance(item, SessionResponse):
+            page.append(item)
+            continue
+        if session_id not in series_fields:
+            series_fields[session_id] = _summary_fields(series[session_id])
+        page.append(SessionResponse.model_construct(
+            **{**series_fields[session_id], "scheduled_at": scheduled_at, "occurrence_start": item}
+        ))
+    return page
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Session times are stored as naive UTC; query parameters may carry an offset."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _series_occurrences(
+    db: AsyncSession,
+    user_id: str,
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+    include_public: bool,
+    after: Optional[Cursor]
+) -> Tuple[Dict[str, Mapping[str, Any]], Iterator[Occurrence]]:
+    """
+    The user's recurring series that may have occurrences in the window,
+    by ID, and their occurrences in feed order, generated as they are read.
+    """
+    since = max((value for value in (_naive_utc(from_date), after and after[0]) if value), default=None)
+    until = _naive_utc(to_date)
+    result = await db.execute(
+        _summary_select(Session.recurrence_rule.label("recurrence_rule"))
+        .where(Session.id.in_(recurring_series_ids(user_id, since, until, include_public)))
+    )
+    series = {row["id"]: row for row in result.mappings()}
+    if not series:
+        return series, iter(())
+    overrides = await get_occurrence_overrides(db, list(series), since)
+    upcoming = heapq.merge(
+        *(_expand(row, overrides.get(session_id, ()), since, until, after) for session_id, row in series.items()),
+        key=_feed_position
+    )
+    return series, upcoming
+
+
+def _expand(
+    row: Mapping[str, Any],
+    overrides: Iterable[SessionOccurrenceOverride],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    after: Optional[Cursor]
+) -> Iterator[Occurrence]:
+    """One series' occurrences between since and until, with cancelled ones dropped and moved ones re-slotted."""
+    session_id = row["id"]
+    replaced = {override.occurrence_start for override in overrides}
+    moved = sorted(
+        (override.scheduled_at, override.occurrence_start)
+        for override in overrides
+        if override.scheduled_at is not None and not override.is_cancelled
+        and (since is None or override.scheduled_at >= since)
+        and (until is None or override.scheduled_at <= until)
+    )
+    regular = (
+        (start, start)
+        for start in occurrences(row["recurrence_rule"], row["scheduled_at"], since, until)
+        if start not in replaced
+    )
+    for scheduled_at, occurrence_start in heapq.merge(regular, moved):
+        if after is not None and (scheduled_at, session_id) <= after:
+            continue
+        yield scheduled_at, session_id, occurrence_start
+
+
+async def get_session_detail(db: AsyncSession, session_id: str) -> Optional[SessionDetailResponse]:
+    """A session with its participants and exercises, in three column-only queries."""
+    result = await db.execute(
+        _summary_select(Session.group_id.label("group_id")).where(Session.id == session_id)
+    )
+    row = result.mappings().one_or_none()
+    if row is None:
+        return None
+
+    participants = await db.execute(
+        select(*_columns(SessionParticipant, PARTICIPANT_FIELDS), *_columns(User, USER_FIELDS, "user_"))
+        .join(User, User.id == SessionParticipant.user_id)
+        .where(SessionParticipant.session_id == session_id)
+        .order_by(SessionParticipant.created_at, SessionParticipant.id)
+    )
+    exercises = await db.execute(
+        select(*_columns(SessionExercise, EXERCISE_FIELDS))
+        .where(SessionExercise.session_id == session_id)
+        .order_by(SessionExercise.order, SessionExercise.id)
+    )
+    return SessionDetailResponse.model_construct(
+        **_summary_fields(row),
+        group_id=row["group_id"],
+        participants=[
+            SessionParticipantResponse.model_construct(
+                **_pick(participant, PARTICIPANT_FIELDS),
+                user=UserPublicResponse.model_construct(**_pick(participant, USER_FIELDS, "user_"))
+            )
+            for participant in participants.mappings()
+        ],
+        exercises=[ExerciseResponse.model_construct(**exercise) for exercise in exercises.mappings()]
+    )
+
+
+def session_detail_from_orm(session: Session) -> SessionDetailResponse:
+    """Detail response for a Session loaded by get_session_by_id, without re-validating it."""
+    return SessionDetailResponse.model_construct(
+        **_attrs(session, SESSION_FIELDS),
+        gym=GymResponse.model_construct(**_attrs(session.gym, GYM_FIELDS)),
+        creator=UserPublicResponse.model_construct(**_attrs(session.creator, USER_FIELDS)),
+        group_id=session.group_id,
+        participants=[
+            SessionParticipantResponse.model_construct(
+                **_attrs(participant, PARTICIPANT_FIELDS),
+                user=UserPublicResponse.model_construct(**_attrs(participant.user, USER_FIELDS))
+            )
+            for participant in session.participants
+        ],
+        exercises=[ExerciseResponse.model_construct(**_attrs(exercise, EXERCISE_FIELDS)) for exercise in session.exercises]
+    )
@@ -1,27 +1,156 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import uuid4
 from datetime import datetime
-from sqlalchemy import select, and_, or_
+from sqlalchemy import Select, delete, or_, select, union, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.session import Session, SessionParticipant, SessionExercise, SessionVisibility, RSVPStatus
-from app.models.social import Friendship, FriendshipStatus
+from app.models.session import (
+    Session, SessionParticipant, SessionExercise, SessionOccurrenceOverride, SessionVisibility, RSVPStatus
+)
+from app.models.feed import FeedEntry
+from app.core.pagination import Cursor, keyset
+from app.core.recurrence import last_occurrence
+from app.crud.feed import fan_out_session, remove_session_from_feeds
 from app.schemas.session import SessionCreate, SessionUpdate, ExerciseCreate
 
 
-async def get_session_by_id(db: AsyncSession, session_id: str) -> Optional[Session]:
-    result = await db.execute(
-        select(Session)
-        .options(
+async def get_session_by_id(
+    db: AsyncSession,
+    session_id: str,
+    load_relations: bool = True
+) -> Optional[Session]:
+    """
+    Get a session, by default with creator, gym, participants and exercises.
+    
+    Pass load_relations=False when only the session's own columns
+    (including its participant counts) are needed.
+    """
+    stmt = select(Session).where(Session.id == session_id)
+    if load_relations:
+        stmt = stmt.options(
             selectinload(Session.creator),
             selectinload(Session.gym),
             selectinload(Session.participants).selectinload(SessionParticipant.user),
             selectinload(Session.exercises)
         )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def adjust_participant_counts(
+    db: AsyncSession,
+    session_id: str,
+    participants: int = 0,
+    going: int = 0
+) -> None:
+    """Apply deltas to a session's denormalized counts in one atomic UPDATE."""
+    if not participants and not going:
+        return
+    await db.execute(
+        update(Session)
         .where(Session.id == session_id)
+        .values(
+            participant_count=Session.participant_count + participants,
+            going_count=Session.going_count + going
+        )
     )
-    return result.scalar_one_or_none()
+
+
+async def claim_seat(db: AsyncSession, session_id: str) -> bool:
+    """
+    Take one GOING seat if the session has room; returns whether it did.
+    
+    Capacity is checked in the UPDATE's own WHERE clause, so concurrent
+    claims serialize on the session row and each one re-checks against
+    the count the previous one committed: going_count can never pass
+    max_participants, however many joins arrive at once.
+    """
+    result = await db.execute(
+        update(Session)
+        .where(
+            Session.id == session_id,
+            or_(Session.max_participants.is_(None), Session.going_count < Session.max_participants)
+        )
+        .values(going_count=Session.going_count + 1)
+        .returning(Session.id)
+        .execution_options(synchronize_session="fetch")
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def release_seat(db: AsyncSession, session_id: str) -> Optional[str]:
+    """
+    Give up a GOING seat: it passes to the longest-waiting WAITLISTED
+    participant, or back to the session if nobody is waiting.
+    
+    Returns the user ID of the promoted participant, if any.
+    """
+    result = await db.execute(
+        select(SessionParticipant)
+        .where(
+            SessionParticipant.session_id == session_id,
+            SessionParticipant.rsvp_status == RSVPStatus.WAITLISTED
+        )
+        .order_by(SessionParticipant.created_at, SessionParticipant.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    promoted = result.scalar_one_or_none()
+    if promoted is None:
+        await adjust_participant_counts(db, session_id, going=-1)
+        return None
+    promoted.rsvp_status = RSVPStatus.GOING
+    await db.flush()
+    return promoted.user_id
+
+
+async def set_max_participants(db: AsyncSession, session_id: str, max_participants: Optional[int]) -> List[str]:
+    """
+    Change a session's capacity and fill any new seats from the waitlist.
+    
+    A cap below the seats already taken raises ValueError. The check is in
+    the UPDATE's own WHERE clause, as in claim_seat, so a concurrent join
+    can't slip in between. Each freed seat is then claimed with claim_seat
+    for the longest-waiting WAITLISTED participant. Returns the user IDs
+    of the promoted participants.
+    """
+    conditions = [Session.id == session_id]
+    if max_participants is not None:
+        conditions.append(Session.going_count <= max_participants)
+    result = await db.execute(
+        update(Session)
+        .where(*conditions)
+        .values(max_participants=max_participants)
+        .returning(Session.going_count)
+        .execution_options(synchronize_session="fetch")
+    )
+    going_count = result.scalar_one_or_none()
+    if going_count is None:
+        raise ValueError("max_participants can't be lower than the number of participants going")
+    
+    waiting = (
+        select(SessionParticipant)
+        .where(
+            SessionParticipant.session_id == session_id,
+            SessionParticipant.rsvp_status == RSVPStatus.WAITLISTED
+        )
+        .order_by(SessionParticipant.created_at, SessionParticipant.id)
+        .with_for_update(skip_locked=True)
+    )
+    if max_participants is not None:
+        waiting = waiting.limit(max(max_participants - going_count, 0))
+    promoted = []
+    for participant in (await db.execute(waiting)).scalars().all():
+        if not await claim_seat(db, session_id):
+            break
+        participant.rsvp_status = RSVPStatus.GOING
+        promoted.append(participant.user_id)
+    await db.flush()
+    return promoted
 
 
 async def create_session(db: AsyncSession, creator_id: str, session_in: SessionCreate) -> Session:
@@ -37,7 +166,14 @@ async def create_session(db: AsyncSession, creator_id: str, session_in: SessionC
         group_id=session_in.group_id,
         max_participants=session_in.max_participants,
         is_recurring=session_in.is_recurring,
-        recurrence_rule=session_in.recurrence_rule
+        recurrence_rule=session_in.recurrence_rule,
+        recurs_until=(
+            last_occurrence(session_in.recurrence_rule, session_in.scheduled_at)
+            if session_in.is_recurring else None
+        ),
+        # The creator joins as GOING below
+        participant_count=1,
+        going_count=1
     )
     db.add(session)
     
@@ -65,111 +201,266 @@ async def create_session(db: AsyncSession, creator_id: str, session_in: SessionC
     db.add(participant)
     
     await db.flush()
+    await fan_out_session(db, session)
     return await get_session_by_id(db, session.id)
 
 
 async def update_session(db: AsyncSession, session: Session, session_in: SessionUpdate) -> Session:
+    """
+    Apply a partial update. A new max_participants goes through
+    set_max_participants, so it raises ValueError if below going_count.
+    """
     update_data = session_in.model_dump(exclude_unset=True)
+    if "max_participants" in update_data:
+        await set_max_participants(db, session.id, update_data.pop("max_participants"))
     for field, value in update_data.items():
         setattr(session, field, value)
+    if session.is_recurring and "scheduled_at" in update_data:
+        # Overrides name occurrences of the old schedule
+        session.recurs_until = last_occurrence(session.recurrence_rule, session.scheduled_at)
+        await db.execute(
+            delete(SessionOccurrenceOverride).where(SessionOccurrenceOverride.session_id == session.id)
+        )
     await db.flush()
     await db.refresh(session)
+    await fan_out_session(db, session)
     return session
 
 
 async def delete_session(db: AsyncSession, session: Session) -> bool:
+    await remove_session_from_feeds(db, session.id)
+    await db.execute(
+        delete(SessionOccurrenceOverride).where(SessionOccurrenceOverride.session_id == session.id)
+    )
     await db.delete(session)
     await db.flush()
     return True
 
 
-async def get_session_feed(
-    db: AsyncSession,
+def feed_session_ids(
     user_id: str,
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None,
     include_public: bool = True,
-    limit: int = 50
-) -> List[Session]:
-    """Get sessions visible to user (friends' sessions + public)"""
-    
-    # Get user's friend IDs
-    friends_result = await db.execute(
-        select(Friendship).where(
-            and_(
-                or_(
-                    Friendship.requester_id == user_id,
-                    Friendship.addressee_id == user_id
-                ),
-                Friendship.status == FriendshipStatus.ACCEPTED
-            )
-        )
-    )
-    friendships = friends_result.scalars().all()
-    friend_ids = [
-        f.addressee_id if f.requester_id == user_id else f.requester_id
-        for f in friendships
-    ]
-    
-    # Build query
-    stmt = select(Session).options(
-        selectinload(Session.creator),
-        selectinload(Session.gym),
-        selectinload(Session.participants)
-    )
-    
-    # Visibility conditions
-    visibility_conditions = [
-        Session.creator_id == user_id,  # Own sessions
-    ]
-    
-    if friend_ids:
-        visibility_conditions.append(
-            and_(
-                Session.creator_id.in_(friend_ids),
-                Session.visibility.in_([SessionVisibility.FRIENDS, SessionVisibility.PUBLIC])
-            )
-        )
+    limit: int = 50,
+    after: Optional[Cursor] = None,
+    include_recurring: bool = True
+) -> Select:
+    """
+    IDs of the sessions visible to a user, one feed page's worth.
     
-    if include_public:
-        visibility_conditions.append(Session.visibility == SessionVisibility.PUBLIC)
+    Own, friends' and group sessions come from the user's precomputed
+    feed entries (see app.crud.feed); public sessions are merged in from
+    the sessions table. Ordered by (scheduled_at, id), starting after the
+    `after` cursor position when given. Recurring series are ranged by
+    their first occurrence; pass include_recurring=False to leave them
+    to recurring_series_ids.
+    """
+    entries = select(
+        FeedEntry.session_id.label("session_id"),
+        FeedEntry.scheduled_at.label("scheduled_at")
+    ).where(FeedEntry.user_id == user_id)
+    if not include_recurring:
+        entries = entries.where(FeedEntry.is_recurring.is_(False))
+    if from_date:
+        entries = entries.where(FeedEntry.scheduled_at >= from_date)
+    if to_date:
+        entries = entries.where(FeedEntry.scheduled_at <= to_date)
+    candidates = keyset(entries, FeedEntry.scheduled_at, FeedEntry.session_id, after).limit(limit)
     
-    stmt = stmt.where(
-        and_(
-            or_(*visibility_conditions),
+    if include_public:
+        public = select(
+            Session.id.label("session_id"),
+            Session.scheduled_at.label("scheduled_at")
+        ).where(
+            Session.visibility == SessionVisibility.PUBLIC,
             Session.is_cancelled.is_(False)
         )
+        if not include_recurring:
+            public = public.where(Session.is_recurring.is_(False))
+        if from_date:
+            public = public.where(Session.scheduled_at >= from_date)
+        if to_date:
+            public = public.where(Session.scheduled_at <= to_date)
+        public = keyset(public, Session.scheduled_at, Session.id, after).limit(limit)
+        
+        merged = union(
+            select(candidates.subquery()),
+            select(public.subquery())
+        ).subquery()
+        candidates = select(merged.c.session_id, merged.c.scheduled_at).order_by(
+            merged.c.scheduled_at, merged.c.session_id
+        ).limit(limit)
+    
+    return select(candidates.subquery().c.session_id)
+
+
+def recurring_series_ids(
+    user_id: str,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    include_public: bool = True
+) -> Select:
+    """
+    IDs of the recurring series visible to a user with occurrences that
+    may fall between from_date and to_date: started by to_date and not
+    ended before from_date.
+    """
+    series = select(FeedEntry.session_id.label("session_id")).where(
+        FeedEntry.user_id == user_id,
+        FeedEntry.is_recurring.is_(True)
     )
+    if to_date:
+        series = series.where(FeedEntry.scheduled_at <= to_date)
+    if include_public:
+        public = select(Session.id.label("session_id")).where(
+            Session.visibility == SessionVisibility.PUBLIC,
+            Session.is_recurring.is_(True),
+            Session.is_cancelled.is_(False)
+        )
+        if to_date:
+            public = public.where(Session.scheduled_at <= to_date)
+        series = union(series, public)
     
+    stmt = select(Session.id).where(Session.id.in_(series))
     if from_date:
-        stmt = stmt.where(Session.scheduled_at >= from_date)
-    if to_date:
-        stmt = stmt.where(Session.scheduled_at <= to_date)
+        stmt = stmt.where(or_(Session.recurs_until.is_(None), Session.recurs_until >= from_date))
+    return stmt
+
+
+async def get_occurrence_overrides(
+    db: AsyncSession,
+    session_ids: List[str],
+    since: Optional[datetime] = None
+) -> Dict[str, List[SessionOccurrenceOverride]]:
+    """Overrides of the given series, by session ID, that can affect occurrences from `since` on."""
+    if not session_ids:
+        return {}
+    stmt = select(SessionOccurrenceOverride).where(SessionOccurrenceOverride.session_id.in_(session_ids))
+    if since:
+        stmt = stmt.where(or_(
+            SessionOccurrenceOverride.occurrence_start >= since,
+            SessionOccurrenceOverride.scheduled_at >= since
+        ))
+    result = await db.execute(stmt)
+    overrides: Dict[str, List[SessionOccurrenceOverride]] = {}
+    for override in result.scalars():
+        overrides.setdefault(override.session_id, []).append(override)
+    return overrides
+
+
+async def set_occurrence_override(
+    db: AsyncSession,
+    session_id: str,
+    occurrence_start: datetime,
+    is_cancelled: bool = False,
+    scheduled_at: Optional[datetime] = None
+) -> SessionOccurrenceOverride:
+    """Cancel or move one occurrence of a recurring session, replacing any earlier override."""
+    result = await db.execute(
+        select(SessionOccurrenceOverride).where(
+            SessionOccurrenceOverride.session_id == session_id,
+            SessionOccurrenceOverride.occurrence_start == occurrence_start
+        )
+    )
+    override = result.scalar_one_or_none()
+    if override is None:
+        override = SessionOccurrenceOverride(
+            id=str(uuid4()), session_id=session_id, occurrence_start=occurrence_start
+        )
+        db.add(override)
+    override.is_cancelled = is_cancelled
+    override.scheduled_at = None if is_cancelled else scheduled_at
+    await db.flush()
+    return override
+
+
+async def delete_occurrence_override(db: AsyncSession, session_id: str, occurrence_start: datetime) -> bool:
+    """Restore an occurrence to its regular schedule."""
+    result = await db.execute(
+        delete(SessionOccurrenceOverride).where(
+            SessionOccurrenceOverride.session_id == session_id,
+            SessionOccurrenceOverride.occurrence_start == occurrence_start
+        )
+    )
+    return result.rowcount > 0
+
+
+async def get_session_feed(
+    db: AsyncSession,
+    user_id: str,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    include_public: bool = True,
+    limit: int = 50,
+    after: Optional[Cursor] = None
+) -> List[Session]:
+    """
+    Get sessions visible to user (own + friends' sessions + public).
     
-    stmt = stmt.order_by(Session.scheduled_at).limit(limit)
+    Loads full Session objects with creator and gym; the feed endpoint
+    reads app.crud.projections.get_session_summaries instead.
+    """
+    stmt = (
+        select(Session)
+        .options(
+            selectinload(Session.creator),
+            selectinload(Session.gym)
+        )
+        .where(Session.id.in_(feed_session_ids(user_id, from_date, to_date, include_public, limit, after)))
+        .order_by(Session.scheduled_at, Session.id)
+    )
     
     result = await db.execute(stmt)
     return result.scalars().all()
 
 
+def is_participant_conflict(error: IntegrityError) -> bool:
+    """True if error is the unique (session_id, user_id) violation, not e.g. a foreign key."""
+    message = str(error.orig)
+    return (
+        "uq_session_participants_session_user" in message  # PostgreSQL names the constraint
+        or "UNIQUE constraint failed: session_participants.session_id, session_participants.user_id" in message
+    )
+
+
 async def join_session(
     db: AsyncSession,
     session_id: str,
     user_id: str,
     rsvp_status: RSVPStatus = RSVPStatus.GOING,
     invited_by_id: Optional[str] = None,
-    invite_message: Optional[str] = None
+    invite_message: Optional[str] = None,
+    retry_on_conflict: bool = True
 ) -> SessionParticipant:
-    # Check if already participant
+    """
+    Add a participant, or change an existing participant's RSVP.
+    
+    Going takes a seat with claim_seat; when the session is full the
+    participant is WAITLISTED instead (and keeps their place in line if
+    they were already waiting). Leaving GOING releases the seat to the
+    waitlist. The session's counts change in the same transaction.
+    
+    A concurrent join of the same user that wins the insert is retried
+    once as an RSVP change; any other IntegrityError is raised.
+    """
+    # Check if already participant; the row lock keeps the old RSVP stable
+    # until this transaction commits
     result = await db.execute(
         select(SessionParticipant).where(
             SessionParticipant.session_id == session_id,
             SessionParticipant.user_id == user_id
-        )
+        ).with_for_update()
     )
     existing = result.scalar_one_or_none()
     
     if existing:
+        was_going = existing.rsvp_status == RSVPStatus.GOING
+        if rsvp_status == RSVPStatus.GOING and not was_going:
+            if not await claim_seat(db, session_id):
+                rsvp_status = RSVPStatus.WAITLISTED
+        elif was_going and rsvp_status != RSVPStatus.GOING:
+            await release_seat(db, session_id)
         existing.rsvp_status = rsvp_status
         await db.flush()
         await db.refresh(existing)
@@ -183,23 +474,82 @@ async def join_session(
         invited_by_id=invited_by_id,
         invite_message=invite_message
     )
-    db.add(participant)
-    await db.flush()
+    try:
+        # The seat is claimed inside the savepoint so a lost insert race gives it back
+        async with db.begin_nested():
+            if rsvp_status == RSVPStatus.GOING and not await claim_seat(db, session_id):
+                participant.rsvp_status = RSVPStatus.WAITLISTED
+            db.add(participant)
+    except IntegrityError as e:
+        if not retry_on_conflict or not is_participant_conflict(e):
+            raise
+        # A concurrent join won the unique (session_id, user_id) race
+        return await join_session(
+            db, session_id, user_id, rsvp_status, invited_by_id, invite_message, retry_on_conflict=False
+        )
+    await adjust_participant_counts(db, session_id, participants=1)
     await db.refresh(participant)
     return participant
 
 
+async def invite_participants(
+    db: AsyncSession,
+    session_id: str,
+    user_ids: List[str],
+    invited_by_id: str,
+    invite_message: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Add invitees as MAYBE participants in a single INSERT.
+    
+    Users who already participate are left untouched (ON CONFLICT DO
+    NOTHING on the unique (session_id, user_id)), and the session's
+    participant_count grows by the number actually inserted. Returns the
+    newly invited users' IDs mapped to their new participant row IDs.
+    """
+    if not user_ids:
+        return {}
+    dialect_insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    stmt = (
+        dialect_insert(SessionParticipant)
+        .values([
+            {
+                "id": str(uuid4()),
+                "session_id": session_id,
+                "user_id": user_id,
+                "rsvp_status": RSVPStatus.MAYBE,
+                "checked_in": False,
+                "invited_by_id": invited_by_id,
+                "invite_message": invite_message,
+                "created_at": now,
+            }
+            for user_id in dict.fromkeys(user_ids)
+        ])
+        .on_conflict_do_nothing(index_elements=["session_id", "user_id"])
+        .returning(SessionParticipant.user_id, SessionParticipant.id)
+    )
+    result = await db.execute(stmt)
+    invited = dict(result.all())
+    await adjust_participant_counts(db, session_id, participants=len(invited))
+    return invited
+
+
 async def leave_session(db: AsyncSession, session_id: str, user_id: str) -> bool:
     result = await db.execute(
         select(SessionParticipant).where(
             SessionParticipant.session_id == session_id,
             SessionParticipant.user_id == user_id
-        )
+        ).with_for_update()
     )
     participant = result.scalar_one_or_none()
     if participant:
+        was_going = participant.rsvp_status == RSVPStatus.GOING
         await db.delete(participant)
         await db.flush()
+        await adjust_participant_counts(db, session_id, participants=-1)
+        if was_going:
+            await release_seat(db, session_id)
         return True
     return False
 
@@ -1,9 +1,12 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import uuid4
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select, or_, and_, case
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.social import Friendship, FriendshipStatus, Group
+from app.models.user import User
+from app.crud.feed import link_friend_feeds, unlink_friend_feeds
+from app.core.pagination import Cursor, keyset
 from app.schemas.social import GroupCreate, GroupUpdate
 
 
@@ -46,15 +49,60 @@ async def update_friendship_status(
     friendship: Friendship,
     status: FriendshipStatus
 ) -> Friendship:
+    was_accepted = friendship.status == FriendshipStatus.ACCEPTED
     friendship.status = status
     await db.flush()
     await db.refresh(friendship)
+    
+    # Keep both users' precomputed feeds in step with the friendship
+    is_accepted = status == FriendshipStatus.ACCEPTED
+    if is_accepted and not was_accepted:
+        await link_friend_feeds(db, friendship.requester_id, friendship.addressee_id)
+    elif was_accepted and not is_accepted:
+        await unlink_friend_feeds(db, friendship.requester_id, friendship.addressee_id)
     return friendship
 
 
-async def get_friends(db: AsyncSession, user_id: str) -> List[Friendship]:
-    result = await db.execute(
-        select(Friendship).where(
+async def get_friends(
+    db: AsyncSession,
+    user_id: str,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None
+) -> List[Friendship]:
+    stmt = select(Friendship).where(
+        and_(
+            or_(
+                Friendship.requester_id == user_id,
+                Friendship.addressee_id == user_id
+            ),
+            Friendship.status == FriendshipStatus.ACCEPTED
+        )
+    )
+    stmt = keyset(stmt, Friendship.created_at, Friendship.id, after).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def get_friends_with_users(
+    db: AsyncSession,
+    user_id: str,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None
+) -> List[Tuple[Friendship, User]]:
+    """
+    Accepted friendships paired with the other user's row, in one query.
+    
+    The friend is whichever side of the friendship is not user_id; the
+    join resolves that in SQL. Ordered like get_friends.
+    """
+    friend_id = case(
+        (Friendship.requester_id == user_id, Friendship.addressee_id),
+        else_=Friendship.requester_id
+    )
+    stmt = (
+        select(Friendship, User)
+        .join(User, User.id == friend_id)
+        .where(
             and_(
                 or_(
                     Friendship.requester_id == user_id,
@@ -64,7 +112,9 @@ async def get_friends(db: AsyncSession, user_id: str) -> List[Friendship]:
             )
         )
     )
-    return result.scalars().all()
+    stmt = keyset(stmt, Friendship.created_at, Friendship.id, after).limit(limit)
+    result = await db.execute(stmt)
+    return [(friendship, user) for friendship, user in result.all()]
 
 
 async def get_pending_requests(db: AsyncSession, user_id: str) -> List[Friendship]:
@@ -106,8 +156,12 @@ async def update_group(db: AsyncSession, group: Group, group_in: GroupUpdate) ->
     return group
 
 
-async def get_user_groups(db: AsyncSession, user_id: str) -> List[Group]:
-    result = await db.execute(
-        select(Group).where(Group.owner_id == user_id)
-    )
+async def get_user_groups(
+    db: AsyncSession,
+    user_id: str,
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None
+) -> List[Group]:
+    stmt = keyset(select(Group).where(Group.owner_id == user_id), Group.created_at, Group.id, after)
+    result = await db.execute(stmt.limit(limit))
     return result.scalars().all()
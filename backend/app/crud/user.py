@@ -1,3 +1,4 @@
+from functools import partial
 from typing import Optional
 from uuid import uuid4
 from sqlalchemy import select
@@ -6,6 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import hash_password
+from app.core.hashing import hashing_executor
+from app.core.token_cache import token_cache
+from app.db.session import after_commit
 
 
 async def get_user_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
@@ -22,7 +26,7 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     user = User(
         id=str(uuid4()),
         email=user_in.email,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await hashing_executor.run(hash_password, user_in.password),
         name=user_in.name,
         training_level=user_in.training_level,
         visibility=user_in.visibility
@@ -39,6 +43,15 @@ async def update_user(db: AsyncSession, user: User, user_in: UserUpdate) -> User
         setattr(user, field, value)
     await db.flush()
     await db.refresh(user)
+    after_commit(db, partial(token_cache.invalidate_user, user.id))
+    return user
+
+
+async def deactivate_user(db: AsyncSession, user: User) -> User:
+    user.is_active = False
+    await db.flush()
+    await db.refresh(user)
+    after_commit(db, partial(token_cache.invalidate_user, user.id))
     return user
 
 
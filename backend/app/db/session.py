@@ -1,19 +1,125 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
 
-from app.core.config import get_settings
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session, SessionTransaction
+from sqlalchemy.util import await_only
+
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True
-)
+
+def engine_options(settings: Settings, database_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Keyword arguments for create_async_engine from settings.
+
+    Pool sizing only applies to server databases; SQLite picks its own pool.
+    """
+    options: Dict[str, Any] = {"echo": settings.sql_echo}
+    url = make_url(database_url or settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping
+    )
+    if url.get_driver_name() == "asyncpg":
+        if settings.db_pgbouncer:
+            # PgBouncer in transaction mode hands each transaction to any
+            # server connection, so named prepared statements can't be
+            # cached across them: disable both caches and use unique names
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        else:
+            options["connect_args"] = {"statement_cache_size": settings.db_statement_cache_size}
+    return options
+
+
+class UnitOfWorkSession(Session):
+    """
+    Session that remembers whether it has written anything.
+
+    A flush with changes or any non-SELECT statement sets `info["wrote"]`;
+    get_db uses it to decide whether the request needs a COMMIT at all.
+    """
+
+
+@event.listens_for(UnitOfWorkSession, "after_flush")
+def _record_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(UnitOfWorkSession, "do_orm_execute")
+def _record_statement(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Optional[Awaitable[None]]]) -> None:
+    """
+    Call callback (and await what it returns, if anything) once the
+    session's current transaction commits.
+
+    For cache invalidation: dropping an entry at flush leaves a window,
+    until the commit, in which a concurrent request reads the old committed
+    row and caches it again. Register after the write, inside the
+    transaction it belongs to. Callbacks are discarded if the transaction
+    rolls back or the session closes without committing.
+    """
+    session.sync_session.info.setdefault("after_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    # Runs inside AsyncSession.commit()'s greenlet, so it can await on the loop
+    for callback in session.info.pop("after_commit", []):
+        result = callback()
+        if inspect.isawaitable(result):
+            await_only(result)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_commit(session: Session, transaction: SessionTransaction) -> None:
+    # Only the outermost transaction commits; a savepoint ending changes nothing
+    if transaction.parent is None:
+        session.info.pop("after_commit", None)
+
+
+def has_writes(session: AsyncSession) -> bool:
+    """True if the session wrote, or holds changes a commit would flush."""
+    sync_session = session.sync_session
+    return bool(
+        sync_session.info.get("wrote")
+        or sync_session.new
+        or sync_session.dirty
+        or sync_session.deleted
+    )
+
+
+engine = create_async_engine(settings.database_url, **engine_options(settings))
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=UnitOfWorkSession,
     expire_on_commit=False
 )
 
@@ -22,13 +128,161 @@ class Base(DeclarativeBase):
     pass
 
 
-async def get_db() -> AsyncSession:
+class ReplicaRouter:
+    """
+    Chooses the database for read-only requests.
+
+    Reads rotate round-robin over the replicas. A replica that fails to
+    connect is skipped for `retry_seconds`, and with none left reads go to
+    the primary. A client that has just written (keyed by its Authorization
+    header) reads from the primary for `sticky_seconds`, so it sees its own
+    writes despite replication lag. Stickiness is tracked per process.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replica_engines: List[AsyncEngine],
+        sticky_seconds: float = 5.0,
+        retry_seconds: float = 30.0
+    ):
+        self.primary = primary
+        self.replica_engines = replica_engines
+        self.replicas = [
+            async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)
+            for replica in replica_engines
+        ]
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self._next = 0
+        self._down_until: Dict[int, float] = {}
+        self._recent_writers: Dict[str, float] = {}
+
+    def candidates(self, client_key: Optional[str] = None) -> List[async_sessionmaker]:
+        """Session factories to try, in order; the primary is always last."""
+        now = time.monotonic()
+        if not self.replicas or (client_key and self._recent_writers.get(client_key, 0) > now):
+            return [self.primary]
+        start = self._next
+        self._next = (self._next + 1) % len(self.replicas)
+        order = [(start + i) % len(self.replicas) for i in range(len(self.replicas))]
+        healthy = [self.replicas[i] for i in order if self._down_until.get(i, 0) <= now]
+        return healthy + [self.primary]
+
+    def mark_down(self, factory: async_sessionmaker) -> None:
+        index = self.replicas.index(factory)
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def record_write(self, client_key: Optional[str]) -> None:
+        if not self.replicas or not client_key:
+            return
+        now = time.monotonic()
+        if len(self._recent_writers) > 10000:
+            self._recent_writers = {k: t for k, t in self._recent_writers.items() if t > now}
+        self._recent_writers[client_key] = now + self.sticky_seconds
+
+    def status(self) -> Dict[str, int]:
+        now = time.monotonic()
+        down = sum(1 for until in self._down_until.values() if until > now)
+        return {"replicas": len(self.replicas), "replicas_healthy": len(self.replicas) - down}
+
+    async def dispose(self) -> None:
+        for replica in self.replica_engines:
+            await replica.dispose()
+
+
+replica_router = ReplicaRouter(
+    AsyncSessionLocal,
+    [
+        create_async_engine(url, **engine_options(settings, url))
+        for url in (url.strip() for url in settings.database_replica_urls.split(","))
+        if url
+    ],
+    sticky_seconds=settings.replica_sticky_seconds,
+    retry_seconds=settings.replica_retry_seconds
+)
+
+# Requests with these methods don't write, so they don't make a client sticky
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+async def get_db(request: Request) -> AsyncSession:
+    """
+    Per-request unit of work on the primary.
+
+    The session checks out a connection on its first query, and CRUD
+    functions only flush; the one commit happens here, after the handler,
+    and only if something was written. Read-only requests and requests
+    rejected before touching the database just close the session.
+    """
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            wrote = has_writes(session)
+            if wrote:
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+    if wrote and request.method not in SAFE_METHODS:
+        replica_router.record_write(request.headers.get("authorization"))
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Read-only session for GET endpoints, on a replica when one is available.
+    
+    Nothing is committed. Falls back to the next replica, then the primary,
+    if a replica can't be reached.
+    """
+    for factory in replica_router.candidates(request.headers.get("authorization")):
+        session = factory()
+        if factory is replica_router.primary:
+            break
+        try:
+            # Connect now so an unreachable replica fails before the handler runs
+            await session.connection()
+            break
+        except (DBAPIError, OSError) as e:
+            await session.close()
+            replica_router.mark_down(factory)
+            logger.warning(f"Read replica unavailable, failing over: {e}")
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Open `connections` pooled connections up front so the first requests
+    after a deploy don't each pay for a connect (and TLS/auth) round trip.
+
+    Returns how many connections were opened; failures are logged, not
+    raised, so the app still starts while the database is unreachable.
+    """
+    async def connect():
+        try:
+            conn = await engine.connect()
+            await conn.execute(text("SELECT 1"))
+            return conn
+        except Exception as e:
+            logger.warning(f"Database pool warm-up connection failed: {e}")
+            return None
+
+    # Hold every connection until all are open so the pool really grows
+    opened = [conn for conn in await asyncio.gather(*(connect() for _ in range(connections))) if conn]
+    await asyncio.gather(*(conn.close() for conn in opened))
+    return len(opened)
+
+
+def pool_status(engine: AsyncEngine) -> Dict[str, Any]:
+    """Checked-out/overflow gauges for the engine's connection pool."""
+    pool = engine.sync_engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    for gauge in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, gauge):
+            status[gauge] = getattr(pool, gauge)()
+    return status
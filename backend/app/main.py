@@ -1,17 +1,60 @@
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
 
 from app.core.config import get_settings
+from app.core.hashing import hashing_executor
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_queries, render_metrics
+from app.core.profiler import ProfilerMiddleware
+from app.core.query_audit import QueryAuditMiddleware, parse_budgets
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import ORJSONResponse
+from app.core.response_cache import ETAG_HEADER
+from app.db.session import engine, replica_router, warm_up_pool, pool_status
+from app.services.gym_cache import gym_cache
+from app.services.push import push_stats
+from app.services.push_transport import push_transport
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.receipt_poller import receipt_poller
 from app.api.v1 import router as api_router
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start up and tear down app-lifetime resources."""
+    if settings.db_pool_warmup:
+        await warm_up_pool(engine, min(settings.db_pool_warmup, settings.db_pool_size))
+    await push_transport.start()
+    if settings.notification_dispatcher == "asyncio":
+        notification_dispatcher.start()
+        receipt_poller.start()
+    yield
+    await notification_dispatcher.stop()
+    await receipt_poller.stop()
+    await push_transport.close()
+    await gym_cache.close()
+    hashing_executor.shutdown()
+    await replica_router.dispose()
+    await engine.dispose()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="Social fitness app for scheduling and sharing gym sessions",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -21,8 +64,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
 
+if settings.query_audit_enabled:
+    app.add_middleware(
+        QueryAuditMiddleware,
+        budget=settings.query_audit_budget or None,
+        route_budgets=parse_budgets(settings.query_audit_route_budgets),
+        enforce=settings.query_audit_enforce,
+        repeat_threshold=settings.query_audit_repeat_threshold,
+        slow_seconds=settings.query_audit_slow_ms / 1000
+    )
+
+# Around the other middleware, so the timings include them
+if settings.metrics_enabled:
+    instrument_queries()
+    app.add_middleware(MetricsMiddleware)
+
+# Outermost, so a profile covers everything the request went through
+if settings.profile_token:
+    app.add_middleware(
+        ProfilerMiddleware,
+        token=settings.profile_token,
+        interval=settings.profile_interval_ms / 1000,
+        directory=settings.profile_dir
+    )
+
 # Include routers
 app.include_router(api_router)
 
@@ -33,6 +101,35 @@ async def health_check():
     return {"status": "healthy", "app": settings.app_name}
 
 
+@app.get("/health/db")
+async def database_health_check():
+    """Database round trip plus connection pool gauges."""
+    report = {**pool_status(engine), **replica_router.status()}
+    started = time.perf_counter()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception:
+        # The exception can name the database host, user or DSN; keep it in the logs
+        logger.exception("Database health check failed")
+        return ORJSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "error": "database unreachable", **report}
+        )
+    report["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return {"status": "healthy", **report}
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint."""
+        pools = {"primary": pool_status(engine)}
+        for i, replica in enumerate(replica_router.replica_engines):
+            pools[f"replica{i}"] = pool_status(replica)
+        return PlainTextResponse(render_metrics(pools, asdict(push_stats)), media_type=CONTENT_TYPE)
+
+
 @app.get("/")
 async def root():
     return {
@@ -2,16 +2,18 @@ from app.models.user import User, UserFavoriteGym, TrainingLevel, ProfileVisibil
 from app.models.social import Friendship, FriendshipStatus, Group, GroupRole
 from app.models.gym import Gym
 from app.models.session import (
-    Session, SessionParticipant, SessionExercise,
+    Session, SessionParticipant, SessionExercise, SessionOccurrenceOverride,
     SessionVisibility, RSVPStatus
 )
-from app.models.notification import NotificationToken
+from app.models.notification import NotificationToken, NotificationOutbox, OutboxStatus, PushTicket
+from app.models.feed import FeedEntry
 
 __all__ = [
     "User", "UserFavoriteGym", "TrainingLevel", "ProfileVisibility",
     "Friendship", "FriendshipStatus", "Group", "GroupRole",
     "Gym",
-    "Session", "SessionParticipant", "SessionExercise",
+    "Session", "SessionParticipant", "SessionExercise", "SessionOccurrenceOverride",
     "SessionVisibility", "RSVPStatus",
-    "NotificationToken"
+    "NotificationToken", "NotificationOutbox", "OutboxStatus", "PushTicket",
+    "FeedEntry"
 ]
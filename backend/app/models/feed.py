@@ -0,0 +1,31 @@
+from datetime import datetime
+from sqlalchemy import Boolean, String, ForeignKey, DateTime, Index, false
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+
+class FeedEntry(Base):
+    """
+    A session precomputed into one user's feed.
+
+    Rows are written when a session is created or updated (fan-out on
+    write) and when a friendship is accepted, so reading a feed is a range
+    scan over (user_id, scheduled_at). Public sessions are not fanned out;
+    the feed read adds them separately.
+    """
+    __tablename__ = "feed_entries"
+    __table_args__ = (
+        Index("ix_feed_entries_user_scheduled", "user_id", "scheduled_at"),
+    )
+
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    session_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Copied from the session so the feed can be ranged without a join
+    scheduled_at: Mapped[datetime] = mapped_column(DateTime)
+    # Recurring series are expanded rather than ranged by scheduled_at
+    is_recurring: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
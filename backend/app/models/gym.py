@@ -19,6 +19,7 @@ class Gym(Base):
     # Geo coordinates
     latitude: Mapped[float] = mapped_column(Float)
     longitude: Mapped[float] = mapped_column(Float)
+    geohash: Mapped[Optional[str]] = mapped_column(String(12), nullable=True, index=True)
     
     # Optional details
     phone: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
@@ -42,6 +43,9 @@ class Gym(Base):
     # Relationships
     favorited_by: Mapped[List["UserFavoriteGym"]] = relationship(back_populates="gym")
     sessions: Mapped[List["Session"]] = relationship(back_populates="gym")
+    
+    # Not persisted - filled in by location searches
+    distance_km = None
 
 
 # Import at end to avoid circular imports - required by SQLAlchemy
@@ -1,7 +1,10 @@
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import String, Boolean, ForeignKey, DateTime
+from sqlalchemy import (
+    String, Text, Boolean, ForeignKey, DateTime, Integer, JSON, Enum as SQLEnum, Index
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+import enum
 
 from app.db.session import Base
 
@@ -29,3 +32,69 @@ class NotificationToken(Base):
     
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="notification_tokens")
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"    # Gave up after the maximum number of attempts
+
+
+class NotificationOutbox(Base):
+    """
+    A push notification waiting to be delivered.
+
+    Rows are written in the same transaction as the change that triggers
+    them, so a notification exists exactly when that change committed.
+    The dispatcher (services.notification_dispatcher) claims due rows,
+    sends them to Expo in batches and retries failures with backoff.
+    Device tokens are resolved at send time. When only some of a user's
+    devices got the push, the retry goes to the rest (pending_tokens).
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # Dispatcher poll: due pending rows in order
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    # e.g. "friend_request:<friendship_id>"; enqueueing the same key twice is a no-op
+    idempotency_key: Mapped[str] = mapped_column(String(200), unique=True)
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id", ondelete="CASCADE")
+    )
+    
+    # Message
+    title: Mapped[str] = mapped_column(String(200))
+    body: Mapped[str] = mapped_column(Text)
+    data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    channel_id: Mapped[str] = mapped_column(String(50), default="default")
+    
+    # Delivery
+    status: Mapped[OutboxStatus] = mapped_column(
+        SQLEnum(OutboxStatus), default=OutboxStatus.PENDING
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Set after a partial failure: the tokens that still need the push
+    pending_tokens: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class PushTicket(Base):
+    """
+    An Expo push ticket awaiting its receipt.
+
+    Expo accepts a message with a ticket but only reports delivery problems
+    (such as an uninstalled app) in a receipt that becomes available later.
+    The receipt poller (services.receipt_poller) checks these in bulk and
+    prunes tokens Expo says are dead.
+    """
+    __tablename__ = "push_tickets"
+    
+    id: Mapped[str] = mapped_column(String(100), primary_key=True)  # Expo ticket ID
+    token: Mapped[str] = mapped_column(String(500))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
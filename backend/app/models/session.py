@@ -1,6 +1,9 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import String, Text, Boolean, ForeignKey, DateTime, Integer, Enum as SQLEnum
+from sqlalchemy import (
+    String, Text, Boolean, ForeignKey, DateTime, Integer, Enum as SQLEnum,
+    Index, UniqueConstraint, text
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -22,10 +25,27 @@ class RSVPStatus(str, enum.Enum):
     GOING = "going"
     MAYBE = "maybe"
     NOT_GOING = "not_going"
+    WAITLISTED = "waitlisted"  # Asked to go while the session was full
 
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Friend fan-out: a creator's sessions by visibility
+        Index("ix_sessions_creator_visibility", "creator_id", "visibility", "is_cancelled", "scheduled_at"),
+        # Public half of the feed: live public sessions in (scheduled_at, id) order
+        Index(
+            "ix_sessions_live_visibility_scheduled", "visibility", "scheduled_at", "id",
+            postgresql_where=text("is_cancelled IS false"),
+            sqlite_where=text("is_cancelled IS 0")
+        ),
+        # Public recurring series, expanded into the feed separately
+        Index(
+            "ix_sessions_recurring_visibility_scheduled", "visibility", "scheduled_at",
+            postgresql_where=text("is_recurring IS true AND is_cancelled IS false"),
+            sqlite_where=text("is_recurring IS 1 AND is_cancelled IS 0")
+        ),
+    )
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     title: Mapped[str] = mapped_column(String(200))
@@ -50,13 +70,21 @@ class Session(Base):
     # Creator
     creator_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"))
     
-    # Recurring
+    # Recurring: scheduled_at is the first occurrence, recurrence_rule an
+    # RRULE expanded by app.core.recurrence
     is_recurring: Mapped[bool] = mapped_column(Boolean, default=False)
     recurrence_rule: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    # Start of the last occurrence; NULL while the series repeats forever
+    recurs_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     # Status
     is_cancelled: Mapped[bool] = mapped_column(Boolean, default=False)
     
+    # Denormalized from session_participants; adjusted in the same
+    # transaction as every join, leave, RSVP change and invite
+    participant_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    going_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -72,6 +100,10 @@ class Session(Base):
 
 class SessionParticipant(Base):
     __tablename__ = "session_participants"
+    __table_args__ = (
+        # One row per user per session, also the lookup for join/leave/check-in
+        UniqueConstraint("session_id", "user_id", name="uq_session_participants_session_user"),
+    )
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     session_id: Mapped[str] = mapped_column(String(36), ForeignKey("sessions.id"))
@@ -98,6 +130,10 @@ class SessionParticipant(Base):
 
 class SessionExercise(Base):
     __tablename__ = "session_exercises"
+    __table_args__ = (
+        # A session's exercises in display order
+        Index("ix_session_exercises_session_order", "session_id", "order"),
+    )
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     session_id: Mapped[str] = mapped_column(String(36), ForeignKey("sessions.id"))
@@ -115,6 +151,26 @@ class SessionExercise(Base):
     session: Mapped["Session"] = relationship(back_populates="exercises")
 
 
+class SessionOccurrenceOverride(Base):
+    """One occurrence of a recurring session cancelled or moved."""
+    __tablename__ = "session_occurrence_overrides"
+    __table_args__ = (
+        # One override per occurrence, also the lookup when expanding a series
+        UniqueConstraint("session_id", "occurrence_start", name="uq_session_occurrence_overrides_start"),
+    )
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    session_id: Mapped[str] = mapped_column(String(36), ForeignKey("sessions.id", ondelete="CASCADE"))
+    
+    # The start the rule generates for this occurrence
+    occurrence_start: Mapped[datetime] = mapped_column(DateTime)
+    is_cancelled: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Where the occurrence was moved to, if it was
+    scheduled_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
 # Imports at end to avoid circular imports - required by SQLAlchemy
 from app.models.user import User  # noqa: E402
 from app.models.gym import Gym  # noqa: E402
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import String, Boolean, ForeignKey, DateTime, Table, Column
+from sqlalchemy import String, Boolean, ForeignKey, DateTime, Table, Column, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -31,6 +31,11 @@ class FriendshipStatus(str, enum.Enum):
 
 class Friendship(Base):
     __tablename__ = "friendships"
+    __table_args__ = (
+        # Friend lists OR the two sides together, each filtered by status
+        Index("ix_friendships_requester_status", "requester_id", "status"),
+        Index("ix_friendships_addressee_status", "addressee_id", "status"),
+    )
     
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     requester_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"))
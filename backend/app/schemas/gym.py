@@ -35,6 +35,7 @@ class GymResponse(BaseModel):
     photo_url: Optional[str] = None
     is_custom: bool
     created_at: datetime
+    distance_km: Optional[float] = None
 
     class Config:
         from_attributes = True
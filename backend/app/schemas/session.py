@@ -78,7 +78,11 @@ class SessionResponse(BaseModel):
     is_recurring: bool
     is_cancelled: bool
     participant_count: int = 0
+    going_count: int = 0
     created_at: datetime
+    # For an occurrence of a recurring session in the feed: the start its
+    # rule gives it (scheduled_at differs when the occurrence was moved)
+    occurrence_start: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -96,6 +100,20 @@ class SessionInvite(BaseModel):
     exercise_ids: Optional[List[str]] = None  # For targeted exercise invites
 
 
+class OccurrenceOverride(BaseModel):
+    """Cancel, or move to scheduled_at, the occurrence starting at occurrence_start."""
+    occurrence_start: datetime
+    is_cancelled: bool = False
+    scheduled_at: Optional[datetime] = None
+
+
+class OccurrenceOverrideResponse(OccurrenceOverride):
+    id: str
+
+    class Config:
+        from_attributes = True
+
+
 class RSVPRequest(BaseModel):
     status: RSVPStatus
 
@@ -1,3 +1,9 @@
-from app.services.push import send_push_notification, send_push_to_user
+from app.services.push import (
+    send_push_notification, send_push_to_user, send_push_to_tokens,
+    queue_session_invite_notifications, queue_friend_request_notification
+)
 
-__all__ = ["send_push_notification", "send_push_to_user"]
+__all__ = [
+    "send_push_notification", "send_push_to_user", "send_push_to_tokens",
+    "queue_session_invite_notifications", "queue_friend_request_notification",
+]
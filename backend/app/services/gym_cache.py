@@ -0,0 +1,204 @@
+"""
+Response cache for the public gym endpoints.
+
+GET /gyms/{gym_id} is cached under the gym's id. Searches are cached
+under a normalized (q, geocell, radius, limit) key:
+
+- q is lower-cased with whitespace collapsed;
+- the search point is mapped to its geohash cell
+  (`gym_cache_geohash_precision`, ~150 m at 7), so nearby clients share
+  entries.
+
+A text-only search caches the response itself. A located search caches
+candidates instead: up to CANDIDATE_FACTOR pages of gyms found from the
+cell's centre out to the radius plus the centre-to-corner distance, which
+includes every gym within the radius of any point in the cell.
+located_page() then measures distance_km from the client's own point,
+applies the real radius and picks the page. When the candidates can't
+prove which gyms belong on it, the caller searches from the point
+directly.
+
+create_gym and update_gym call invalidate() once their transaction
+commits (db.session.after_commit), so a request can't re-cache the old
+rows in between. That deletes the gym's
+detail entry and bumps a generation number that every search key
+includes, so all cached searches are dropped at once without having to
+find them: a changed gym can enter or leave any of them. A search that
+read the old generation before the bump writes its result under the old
+key, where nothing will read it.
+
+Misses are filled from read replicas, which may not have a change yet
+when its invalidation runs. For `settle_seconds` after an invalidation
+(REPLICA_STICKY_SECONDS when replicas are configured, else 0) responses
+are built but not stored, so a lagging replica can't re-cache the old
+gym. The window is read from the shared generation, so it covers every
+worker.
+"""
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.geo import cell_radius_km, encode_geohash, geohash_center, haversine_km
+from app.core.response_cache import CacheBackend, CachedResponse, MemoryCacheBackend, build_backend
+from app.schemas.gym import GymResponse
+
+GENERATION_KEY = "gyms:generation"
+CANDIDATE_FACTOR = 2  # Candidates cached per result, so most points in a cell can be answered
+
+
+@dataclass(frozen=True)
+class GymSearch:
+    """
+    Normalized search parameters; cell is None when there is no location.
+
+    latitude/longitude are the client's own point. Candidates are searched
+    from center out to radius_km + slack_km.
+    """
+    query: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    radius_km: float
+    cell: Optional[str]
+    center: Optional[Tuple[float, float]] = None
+    slack_km: float = 0.0
+
+
+class GymCache:
+    """Detail and search responses for gyms, with change-driven invalidation."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl_seconds: int = 300,
+        max_age: int = 60,
+        geohash_precision: int = 7,
+        settle_seconds: float = 0.0
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_age = max_age
+        self.geohash_precision = geohash_precision
+        self.settle_seconds = settle_seconds
+
+    def normalize_search(
+        self,
+        query: Optional[str],
+        latitude: Optional[float],
+        longitude: Optional[float],
+        radius_km: float
+    ) -> GymSearch:
+        query = " ".join(query.lower().split()) if query else None
+        if latitude is None or longitude is None:
+            return GymSearch(query or None, None, None, radius_km, None)
+        cell = encode_geohash(latitude, longitude, self.geohash_precision)
+        return GymSearch(
+            query or None, latitude, longitude, radius_km, cell,
+            center=geohash_center(cell),
+            slack_km=cell_radius_km(cell)
+        )
+
+    def located_page(
+        self,
+        search: GymSearch,
+        candidates: List[GymResponse],
+        limit: int
+    ) -> Optional[List[GymResponse]]:
+        """
+        The page for search's own point, picked from its cell's candidates.
+
+        Returns None when the candidate search hit its limit and a gym it
+        left out could still belong on the page.
+        """
+        measured = []
+        for gym in candidates:
+            distance = haversine_km(search.latitude, search.longitude, gym.latitude, gym.longitude)
+            if distance <= search.radius_km:
+                measured.append((distance, gym))
+        if not search.query:
+            measured.sort(key=lambda item: item[0])
+        measured = measured[:limit]
+
+        # Short of the limit, every gym within reach of the cell is a candidate
+        if len(candidates) >= limit * CANDIDATE_FACTOR:
+            if search.query:
+                # Relevance doesn't depend on the point: a full page can't be outranked
+                if len(measured) < limit:
+                    return None
+            else:
+                # A left-out gym is at least as far from the centre as every
+                # candidate, so at most slack_km nearer the point than that
+                reach = measured[-1][0] if len(measured) == limit else search.radius_km
+                farthest = max(haversine_km(*search.center, g.latitude, g.longitude) for g in candidates)
+                if reach + search.slack_km > farthest:
+                    return None
+        return [gym.model_copy(update={"distance_km": round(distance, 3)}) for distance, gym in measured]
+
+    async def get_detail(self, gym_id: str) -> Optional[CachedResponse]:
+        return await self._get(f"gym:{gym_id}")
+
+    async def set_detail(self, gym_id: str, body: bytes) -> CachedResponse:
+        return await self._set(f"gym:{gym_id}", body)
+
+    async def search_key(self, search: GymSearch, limit: int) -> str:
+        generation = await self._generation()
+        return f"gyms:{generation}:{search.query or ''}:{search.cell or ''}:{search.radius_km!r}:{limit}"
+
+    async def get_search(self, key: str) -> Optional[CachedResponse]:
+        return await self._get(key)
+
+    async def set_search(self, key: str, body: bytes) -> CachedResponse:
+        return await self._set(key, body)
+
+    async def invalidate(self, gym_id: str) -> None:
+        """Drop a gym's detail entry and every cached search."""
+        await self.backend.delete(f"gym:{gym_id}")
+        await self.backend.set(GENERATION_KEY, str(time.time_ns()).encode(), None)
+
+    def clear(self) -> None:
+        if isinstance(self.backend, MemoryCacheBackend):
+            self.backend.clear()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    async def _generation(self) -> str:
+        generation = await self.backend.get(GENERATION_KEY)
+        if generation is None:
+            # Missing or evicted: start a new one, which orphans anything cached before
+            generation = str(time.time_ns()).encode()
+            await self.backend.set(GENERATION_KEY, generation, None)
+        return generation.decode()
+
+    async def _get(self, key: str) -> Optional[CachedResponse]:
+        value = await self.backend.get(key)
+        return CachedResponse.unpack(value) if value is not None else None
+
+    async def _settling(self) -> bool:
+        """Whether gyms changed so recently that a replica may not have the change yet."""
+        if not self.settle_seconds:
+            return False
+        generation = await self.backend.get(GENERATION_KEY)
+        if generation is None:
+            return False
+        return time.time_ns() - int(generation) < self.settle_seconds * 1e9
+
+    async def _set(self, key: str, body: bytes) -> CachedResponse:
+        cached = CachedResponse.for_body(body)
+        if not await self._settling():
+            await self.backend.set(key, cached.pack(), self.ttl_seconds)
+        return cached
+
+
+def _build_cache() -> GymCache:
+    settings = get_settings()
+    return GymCache(
+        build_backend(settings.gym_cache_backend, settings.redis_url, settings.gym_cache_max_entries),
+        ttl_seconds=settings.gym_cache_ttl_seconds,
+        max_age=settings.gym_cache_max_age_seconds,
+        geohash_precision=settings.gym_cache_geohash_precision,
+        settle_seconds=settings.replica_sticky_seconds if settings.database_replica_urls.strip() else 0.0
+    )
+
+
+gym_cache = _build_cache()
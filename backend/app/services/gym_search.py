@@ -0,0 +1,261 @@
+"""
+Gym name/address search backends.
+
+A leading-wildcard ILIKE cannot use the B-tree on gyms.name, so typeahead
+search used to scan the whole table on every keystroke. On PostgreSQL the
+search runs against pg_trgm GIN indexes (see migration 004); elsewhere
+(SQLite test runs) an in-process trigram index built from the gyms table
+stands in for it. Both rank by relevance: prefix matches first, then
+substring matches, then fuzzy trigram similarity over name and address.
+"""
+import heapq
+import math
+import re
+import weakref
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Select, case, false, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.gym import Gym
+
+ADDRESS_WEIGHT = 0.5
+# pg_trgm's default word_similarity_threshold, used by the %> operator
+WORD_SIMILARITY_THRESHOLD = 0.6
+NGRAM_CANDIDATE_LIMIT = 1000
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two spaces before, one after."""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+LIKE_ESCAPE = "/"
+
+
+def escape_like(text: str) -> str:
+    return (
+        text.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+class GymSearchBackend(ABC):
+    """Adds a relevance-ranked text filter to a gym SELECT."""
+
+    @abstractmethod
+    async def apply(self, db: AsyncSession, stmt: Select, query: str, limit: Optional[int] = None) -> Select:
+        """
+        Filter and order stmt by relevance to query.
+
+        limit is the number of rows the caller will read when nothing else
+        filters the statement afterwards.
+        """
+
+    def on_gym_changed(self, gym: Gym) -> None:
+        """Hook for backends that keep their own index."""
+
+
+class TrigramSearchBackend(GymSearchBackend):
+    """PostgreSQL pg_trgm search served by GIN indexes on name and address."""
+
+    async def apply(self, db: AsyncSession, stmt: Select, query: str, limit: Optional[int] = None) -> Select:
+        pattern = f"%{escape_like(query)}%"
+        prefix = f"{escape_like(query)}%"
+        score = (
+            case((Gym.name.ilike(prefix, escape=LIKE_ESCAPE), 2.0), else_=0.0)
+            + case((Gym.name.ilike(pattern, escape=LIKE_ESCAPE), 1.0), else_=0.0)
+            + func.greatest(
+                func.word_similarity(query, Gym.name),
+                func.similarity(Gym.address, query) * ADDRESS_WEIGHT
+            )
+        )
+        return stmt.where(
+            or_(
+                Gym.name.ilike(pattern, escape=LIKE_ESCAPE),
+                Gym.address.ilike(pattern, escape=LIKE_ESCAPE),
+                Gym.name.op("%>")(query),
+            )
+        ).order_by(score.desc(), Gym.name)
+
+
+class _TextPostings:
+    """Trigram postings over the distinct normalized values of one field."""
+
+    def __init__(self):
+        self.gyms: Dict[str, Set[str]] = {}
+        self.grams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def add(self, text: str, gym_id: str) -> None:
+        if text not in self.gyms:
+            self.gyms[text] = set()
+            self.grams[text] = trigrams(text)
+            for gram in self.grams[text]:
+                self._postings[gram].add(text)
+        self.gyms[text].add(gym_id)
+
+    def discard(self, text: str, gym_id: str) -> None:
+        gyms = self.gyms.get(text)
+        if gyms is None:
+            return
+        gyms.discard(gym_id)
+        if not gyms:
+            del self.gyms[text]
+            for gram in self.grams.pop(text):
+                self._postings[gram].discard(text)
+                if not self._postings[gram]:
+                    del self._postings[gram]
+
+    def containing(self, needle: str) -> Set[str]:
+        """Values containing needle as a substring."""
+        # Every unpadded trigram inside the needle's words must appear in a
+        # matching value, so intersect those postings before comparing
+        required = {word[i:i + 3] for word in needle.split() for i in range(len(word) - 2)}
+        if required:
+            lists = sorted((self._postings.get(gram, set()) for gram in required), key=len)
+            candidates = lists[0].intersection(*lists[1:])
+        else:
+            candidates = self.gyms.keys()
+        return {text for text in candidates if needle in text}
+
+    def sharing(self, query_grams: Set[str], needed: int) -> Set[str]:
+        """Values sharing at least `needed` of the query's trigrams."""
+        # Any such value shares one of the len(query_grams) - needed + 1
+        # rarest query trigrams, so only those postings need probing
+        rarest = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:len(query_grams) - needed + 1]:
+            candidates |= self._postings.get(gram, set())
+        return {text for text in candidates if len(query_grams & self.grams[text]) >= needed}
+
+
+class NgramIndex:
+    """
+    In-memory trigram index over gym names and addresses.
+
+    Chains repeat the same name across many gyms, so postings and scoring
+    work on distinct normalized values and fan out to gym ids at the end.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._names = _TextPostings()
+        self._addresses = _TextPostings()
+        self._docs: Dict[str, Tuple[str, str]] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        result = await db.execute(select(Gym.id, Gym.name, Gym.address))
+        for gym_id, name, address in result.all():
+            self.add(gym_id, name, address)
+        self.loaded = True
+
+    def add(self, gym_id: str, name: str, address: str) -> None:
+        self.remove(gym_id)
+        doc = (normalize(name), normalize(address or ""))
+        self._docs[gym_id] = doc
+        self._names.add(doc[0], gym_id)
+        self._addresses.add(doc[1], gym_id)
+
+    def remove(self, gym_id: str) -> None:
+        doc = self._docs.pop(gym_id, None)
+        if doc is not None:
+            self._names.discard(doc[0], gym_id)
+            self._addresses.discard(doc[1], gym_id)
+
+    def search(self, query: str, limit: int = NGRAM_CANDIDATE_LIMIT) -> List[Tuple[str, float]]:
+        """Matching gym ids with relevance scores, best first."""
+        needle = normalize(query)
+        query_grams = trigrams(query)
+        if not needle or not query_grams:
+            return []
+
+        needed = math.ceil(round(WORD_SIMILARITY_THRESHOLD * len(query_grams), 9))
+        names = self._names.containing(needle) | self._names.sharing(query_grams, needed)
+        addresses = self._addresses.containing(needle)
+
+        # Gyms grouped by name: every gym with a matching name, plus gyms
+        # whose address alone matched
+        groups: Dict[str, Set[str]] = {name: self._names.gyms[name] for name in names}
+        for text in addresses:
+            for gym_id in self._addresses.gyms[text]:
+                name = self._docs[gym_id][0]
+                if name not in names:
+                    groups.setdefault(name, set()).add(gym_id)
+
+        ranked_names = []
+        for name in groups:
+            bonus = 3.0 if name.startswith(needle) else 1.0 if needle in name else 0.0
+            similarity = len(query_grams & self._names.grams[name]) / len(query_grams)
+            # The address can lift a gym by at most ADDRESS_WEIGHT
+            ceiling = bonus + max(similarity, ADDRESS_WEIGHT)
+            ranked_names.append((-ceiling, name, bonus, similarity))
+        ranked_names.sort()
+
+        address_scores: Dict[str, float] = {}
+        scored = []
+        cutoff = None  # sort key of the worst gym in the best `limit` seen
+        for negative_ceiling, name, bonus, similarity in ranked_names:
+            # Stop once no remaining name can beat the current top `limit`
+            if cutoff is not None and cutoff < (negative_ceiling, name):
+                break
+            for gym_id in groups[name]:
+                address = self._docs[gym_id][1]
+                if address not in address_scores:
+                    grams = self._addresses.grams[address]
+                    address_scores[address] = len(query_grams & grams) / len(query_grams | grams)
+                score = bonus + max(similarity, address_scores[address] * ADDRESS_WEIGHT)
+                scored.append((-score, name, gym_id))
+            if len(scored) >= (limit if cutoff is None else 2 * limit):
+                scored = heapq.nsmallest(limit, scored)
+                cutoff = scored[-1][:2]
+
+        return [(gym_id, -negative) for negative, _, gym_id in heapq.nsmallest(limit, scored)]
+
+
+class NgramSearchBackend(GymSearchBackend):
+    """Fallback for databases without pg_trgm (SQLite test runs)."""
+
+    def __init__(self):
+        self.index = NgramIndex()
+
+    async def apply(self, db: AsyncSession, stmt: Select, query: str, limit: Optional[int] = None) -> Select:
+        if not self.index.loaded:
+            await self.index.load(db)
+        ranked = self.index.search(query, limit or NGRAM_CANDIDATE_LIMIT)
+        if not ranked:
+            return stmt.where(false())
+        ranks = {gym_id: position for position, (gym_id, _) in enumerate(ranked)}
+        return stmt.where(Gym.id.in_(list(ranks))).order_by(case(ranks, value=Gym.id))
+
+    def on_gym_changed(self, gym: Gym) -> None:
+        if self.index.loaded:
+            self.index.add(gym.id, gym.name, gym.address)
+
+
+# One backend per engine, so separate databases never share an n-gram index
+_backends: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_search_backend(db: AsyncSession) -> GymSearchBackend:
+    engine = db.get_bind()
+    backend = _backends.get(engine)
+    if backend is None:
+        kind = get_settings().gym_search_backend
+        if kind == "auto":
+            kind = "trigram" if engine.dialect.name == "postgresql" else "ngram"
+        backend = TrigramSearchBackend() if kind == "trigram" else NgramSearchBackend()
+        _backends[engine] = backend
+    return backend
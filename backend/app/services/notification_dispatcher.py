@@ -0,0 +1,157 @@
+"""
+Background delivery of queued push notifications.
+
+Request handlers only write notification_outbox rows (crud.outbox) in their
+own transaction and return; this dispatcher drains the table. Each pass
+claims a batch of due rows, resolves the recipients' active device tokens in
+one query, sends everything as one chunked Expo push and marks the rows
+sent. Rows with a message in a failed chunk are put back with exponential
+backoff, and if some of their devices did get the push the retry goes
+only to the others, so no device is pushed twice.
+The claim's lease is extended when the batch could take longer to send.
+
+Like the receipt poller, the dispatcher runs as an asyncio task inside the
+API process (NOTIFICATION_DISPATCHER=asyncio, the default) or as its own
+process via `python -m scripts.dispatch_notifications`
+(NOTIFICATION_DISPATCHER=external).
+Several dispatchers can run at once; claims use SKIP LOCKED.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.crud.notification import get_tokens_for_users
+from app.crud.outbox import (
+    claim_due_notifications, extend_lease, mark_notifications_sent,
+    reschedule_notifications, set_pending_tokens, purge_sent_notifications
+)
+from app.db.session import AsyncSessionLocal
+from app.services.push import PushMessage, send_push_notification, handle_tickets
+from app.services.push_transport import push_transport
+from app.services.worker import PollingWorker
+
+logger = logging.getLogger(__name__)
+
+# Time left on the lease for the database work around the send
+LEASE_MARGIN_SECONDS = 15.0
+
+
+class NotificationDispatcher(PollingWorker):
+    """Drains the notification outbox in batches."""
+
+    name = "Notification dispatch"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: int = 500,
+        poll_seconds: float = 1.0,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 8,
+        backoff_base_seconds: float = 2.0,
+        backoff_max_seconds: float = 600.0,
+        retention_hours: int = 24
+    ):
+        super().__init__(batch_size, poll_seconds)
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.retention = timedelta(hours=retention_hours)
+        self._last_purge = datetime.min
+
+    async def run_once(self) -> int:
+        """Claim and send one batch; returns the number of rows claimed."""
+        async with self.session_factory() as db:
+            rows = await claim_due_notifications(db, self.batch_size, self.lease_seconds)
+            if not rows:
+                await db.commit()
+                return 0
+            tokens = await get_tokens_for_users(db, list({row.user_id for row in rows}))
+            tokens_by_user: Dict[str, List[str]] = {}
+            for token in tokens:
+                tokens_by_user.setdefault(token.user_id, []).append(token.token)
+            targets = [
+                (row, token)
+                for row in rows
+                for token in tokens_by_user.get(row.user_id, [])
+                if row.pending_tokens is None or token in row.pending_tokens
+            ]
+            # Another dispatcher mustn't reclaim rows that are still being sent
+            lease = push_transport.max_send_seconds(len(targets)) + LEASE_MARGIN_SECONDS
+            if lease > self.lease_seconds:
+                await extend_lease(db, [row.id for row in rows], lease)
+            await db.commit()
+
+        messages = [
+            PushMessage(
+                to=token,
+                title=row.title,
+                body=row.body,
+                data=row.data,
+                channel_id=row.channel_id
+            )
+            for row, token in targets
+        ]
+
+        # No connection is held while waiting on Expo
+        result = await send_push_notification(messages) if messages else {"data": []}
+        tickets = list(result.get("data") or [])
+        tickets += [None] * (len(messages) - len(tickets))
+        delivered: Dict[str, List[str]] = {}
+        missed: Dict[str, List[str]] = {}
+        for (row, token), ticket in zip(targets, tickets):
+            (delivered if ticket is not None else missed).setdefault(row.id, []).append(token)
+
+        async with self.session_factory() as db:
+            if missed:
+                # Expo can also just return fewer tickets than messages
+                error = result.get("error", "missing ticket")
+                logger.warning(f"Push failed for {len(missed)} of {len(rows)} notifications, rescheduling: {error}")
+                await reschedule_notifications(
+                    db,
+                    [row for row in rows if row.id in missed],
+                    error=error,
+                    max_attempts=self.max_attempts,
+                    base_seconds=self.backoff_base_seconds,
+                    max_seconds=self.backoff_max_seconds
+                )
+                await set_pending_tokens(db, {
+                    row_id: tokens for row_id, tokens in missed.items() if row_id in delivered
+                })
+            await handle_tickets(db, [m.to for m in messages], tickets)
+            await mark_notifications_sent(db, [row.id for row in rows if row.id not in missed])
+            await db.commit()
+        return len(rows)
+
+    async def purge(self) -> int:
+        async with self.session_factory() as db:
+            removed = await purge_sent_notifications(db, datetime.utcnow() - self.retention)
+            await db.commit()
+        self._last_purge = datetime.utcnow()
+        return removed
+
+    async def on_idle(self) -> None:
+        if datetime.utcnow() - self._last_purge > timedelta(hours=1):
+            await self.purge()
+
+
+def _build_dispatcher() -> NotificationDispatcher:
+    settings = get_settings()
+    return NotificationDispatcher(
+        AsyncSessionLocal,
+        batch_size=settings.outbox_batch_size,
+        poll_seconds=settings.outbox_poll_seconds,
+        lease_seconds=settings.outbox_lease_seconds,
+        max_attempts=settings.outbox_max_attempts,
+        backoff_base_seconds=settings.outbox_backoff_base_seconds,
+        backoff_max_seconds=settings.outbox_backoff_max_seconds,
+        retention_hours=settings.outbox_retention_hours
+    )
+
+
+notification_dispatcher = _build_dispatcher()
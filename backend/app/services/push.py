@@ -10,11 +10,31 @@ from dataclasses import dataclass
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.notification import get_user_tokens, deactivate_token
+from app.crud.notification import get_user_tokens, deactivate_tokens, record_push_tickets
+from app.crud.outbox import enqueue_notifications
+from app.services.push_transport import push_transport
 
 logger = logging.getLogger(__name__)
 
-EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+# Ticket and receipt errors meaning the device token will never work again.
+# Not InvalidCredentials: that is our push credentials being wrong, and
+# would deactivate every user's token at once.
+INVALID_TOKEN_ERRORS = ("DeviceNotRegistered",)
+
+
+@dataclass
+class PushStats:
+    """Running totals of push sends and token hygiene, for logs and /metrics."""
+    messages_sent: int = 0  # Handed to Expo
+    messages_failed: int = 0  # In a send that errored (not delivered to Expo)
+    messages_rejected: int = 0  # Error tickets
+    tickets_recorded: int = 0
+    receipts_checked: int = 0
+    tokens_pruned_on_send: int = 0
+    tokens_pruned_on_receipt: int = 0
+
+
+push_stats = PushStats()
 
 
 @dataclass
@@ -36,7 +56,9 @@ async def send_push_notification(messages: List[PushMessage]) -> Dict[str, Any]:
         messages: List of PushMessage objects to send
         
     Returns:
-        Response from Expo Push API
+        {"data": tickets} with one ticket per message, in order. If any
+        chunk failed, its messages' tickets are None and "error" is set;
+        the other messages were delivered.
     """
     if not messages:
         return {"status": "no_messages"}
@@ -55,57 +77,94 @@ async def send_push_notification(messages: List[PushMessage]) -> Dict[str, Any]:
     ]
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                EXPO_PUSH_URL,
-                json=payload,
-                headers={
-                    "Accept": "application/json",
-                    "Content-Type": "application/json",
-                },
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPStatusError as e:
-        logger.error(f"Expo Push API error: {e.response.status_code} - {e.response.text}")
-        return {"error": str(e)}
+        chunks = await push_transport.send(payload)
     except Exception as e:
+        push_stats.messages_failed += len(messages)
         logger.error(f"Failed to send push notification: {e}")
         return {"error": str(e)}
+    
+    result: Dict[str, Any] = {"data": [None] * len(messages)}
+    for chunk in chunks:
+        if chunk.error is None:
+            for index, ticket in zip(range(chunk.start, chunk.end), chunk.data or []):
+                result["data"][index] = ticket
+            push_stats.messages_sent += chunk.end - chunk.start
+            continue
+        push_stats.messages_failed += chunk.end - chunk.start
+        if isinstance(chunk.error, httpx.HTTPStatusError):
+            response = chunk.error.response
+            logger.error(f"Expo Push API error: {response.status_code} - {response.text}")
+        else:
+            logger.error(f"Failed to send push notification: {chunk.error!r}")
+        result.setdefault("error", str(chunk.error) or type(chunk.error).__name__)
+    return result
 
 
-async def send_push_to_user(
+def invalid_tokens(tokens: List[str], tickets: List[Optional[Dict[str, Any]]]) -> List[str]:
+    """Tokens whose ticket (same position) says the device is gone."""
+    return [
+        token
+        for token, ticket in zip(tokens, tickets)
+        if ticket is not None
+        and ticket.get("status") == "error"
+        and ticket.get("details", {}).get("error") in INVALID_TOKEN_ERRORS
+    ]
+
+
+async def handle_tickets(
     db: AsyncSession,
-    user_id: str,
+    tokens: List[str],
+    tickets: List[Optional[Dict[str, Any]]]
+) -> int:
+    """
+    Act on the tickets from a send (same order as `tokens`).
+    
+    Tokens rejected outright are deactivated in one UPDATE; accepted
+    tickets are stored for the receipt poller. Tokens whose chunk failed
+    (ticket None) are skipped. Returns the number of tokens deactivated.
+    Does not commit.
+    """
+    pruned = await deactivate_tokens(db, invalid_tokens(tokens, tickets))
+    accepted = [
+        (ticket["id"], token)
+        for token, ticket in zip(tokens, tickets)
+        if ticket is not None and ticket.get("status") == "ok" and ticket.get("id")
+    ]
+    await record_push_tickets(db, accepted)
+    push_stats.messages_rejected += sum(
+        1 for ticket in tickets if ticket is not None and ticket.get("status") == "error"
+    )
+    push_stats.tokens_pruned_on_send += pruned
+    push_stats.tickets_recorded += len(accepted)
+    if pruned:
+        logger.info(f"Deactivated {pruned} invalid push tokens")
+    return pruned
+
+
+async def send_push_to_tokens(
+    db: AsyncSession,
+    tokens: List[str],
     title: str,
     body: str,
     data: Optional[Dict[str, Any]] = None,
     channel_id: str = "default"
 ) -> bool:
     """
-    Send a push notification to all devices of a specific user.
+    Send the same notification to a set of device tokens.
+    
+    Messages go out in Expo-sized chunks; tokens Expo reports as
+    unregistered are deactivated and the rest are tracked for receipts;
+    those writes are left for the caller to commit.
     
-    Args:
-        db: Database session
-        user_id: ID of the user to notify
-        title: Notification title
-        body: Notification body text
-        data: Optional data payload
-        channel_id: Android notification channel
-        
     Returns:
-        True if at least one notification was sent successfully
+        True if every notification was accepted by Expo
     """
-    tokens = await get_user_tokens(db, user_id)
-    
     if not tokens:
-        logger.info(f"No push tokens found for user {user_id}")
         return False
     
     messages = [
         PushMessage(
-            to=token.token,
+            to=token,
             title=title,
             body=body,
             data=data,
@@ -116,19 +175,50 @@ async def send_push_to_user(
     
     result = await send_push_notification(messages)
     
-    # Handle failed tokens
     if "data" in result:
-        for i, ticket in enumerate(result["data"]):
-            if ticket.get("status") == "error":
-                error_type = ticket.get("details", {}).get("error")
-                if error_type in ("DeviceNotRegistered", "InvalidCredentials"):
-                    # Token is invalid, deactivate it
-                    await deactivate_token(db, tokens[i].token)
-                    logger.info(f"Deactivated invalid token: {tokens[i].token[:20]}...")
+        await handle_tickets(db, tokens, result["data"])
     
     return "error" not in result
 
 
+async def send_push_to_user(
+    db: AsyncSession,
+    user_id: str,
+    title: str,
+    body: str,
+    data: Optional[Dict[str, Any]] = None,
+    channel_id: str = "default"
+) -> bool:
+    """
+    Send a push notification to all devices of a specific user.
+    
+    Args:
+        db: Database session
+        user_id: ID of the user to notify
+        title: Notification title
+        body: Notification body text
+        data: Optional data payload
+        channel_id: Android notification channel
+        
+    Returns:
+        True if at least one notification was sent successfully
+    """
+    tokens = await get_user_tokens(db, user_id)
+    
+    if not tokens:
+        logger.info(f"No push tokens found for user {user_id}")
+        return False
+    
+    return await send_push_to_tokens(
+        db,
+        [token.token for token in tokens],
+        title=title,
+        body=body,
+        data=data,
+        channel_id=channel_id
+    )
+
+
 async def send_session_invite_notification(
     db: AsyncSession,
     invitee_id: str,
@@ -168,3 +258,50 @@ async def send_friend_request_notification(
         },
         channel_id="social"
     )
+
+
+# Queued notifications: written to the outbox in the request's transaction
+# and delivered by services.notification_dispatcher.
+
+async def queue_session_invite_notifications(
+    db: AsyncSession,
+    invites: Dict[str, str],
+    inviter_name: str,
+    session_title: str,
+    session_id: str
+) -> None:
+    """
+    Queue a session invite push for each invitee.
+
+    invites maps user IDs to their new participant row IDs. The push is
+    keyed by the row, so someone who leaves and is invited again gets
+    notified again.
+    """
+    await enqueue_notifications(db, [
+        {
+            "idempotency_key": f"session_invite:{session_id}:{participant_id}",
+            "user_id": user_id,
+            "title": "Session Invite 🏋️",
+            "body": f"{inviter_name} invited you to: {session_title}",
+            "data": {"type": "session_invite", "session_id": session_id},
+            "channel_id": "sessions",
+        }
+        for user_id, participant_id in invites.items()
+    ])
+
+
+async def queue_friend_request_notification(
+    db: AsyncSession,
+    addressee_id: str,
+    requester_name: str,
+    friendship_id: str
+) -> None:
+    """Queue a friend request push for the addressee."""
+    await enqueue_notifications(db, [{
+        "idempotency_key": f"friend_request:{friendship_id}",
+        "user_id": addressee_id,
+        "title": "New Friend Request 👋",
+        "body": f"{requester_name} wants to be your gym buddy!",
+        "data": {"type": "friend_request", "friendship_id": friendship_id},
+        "channel_id": "social",
+    }])
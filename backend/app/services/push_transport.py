@@ -0,0 +1,191 @@
+"""
+Pooled HTTP transport for the Expo Push API.
+
+One httpx client is shared for the lifetime of the app, so push sends reuse
+warm HTTP/2 (or keep-alive HTTP/1.1) connections instead of paying for a TCP
+and TLS handshake on every notification. Message lists are split into
+Expo's 100-message request limit and the chunks are posted concurrently, up
+to a fixed number in flight; receipt lookups are chunked the same way.
+Large bodies are gzip-compressed.
+
+Each chunk succeeds or fails on its own. send() returns one ChunkResult per
+chunk, so the messages of accepted chunks are known to be delivered and
+only the failed ones need to go out again.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+EXPO_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
+# Expo accepts at most 100 messages per request
+EXPO_MAX_MESSAGES_PER_REQUEST = 100
+# ... and at most 1000 receipt IDs per request
+EXPO_MAX_RECEIPTS_PER_REQUEST = 1000
+
+
+@dataclass
+class ChunkResult:
+    """Outcome of posting items[start:end]: Expo's data for them, or the error that lost them."""
+    start: int
+    end: int
+    data: Any = None
+    error: Optional[Exception] = None
+
+
+class PushTransport:
+    """Posts push payloads to Expo over a shared connection pool."""
+
+    def __init__(
+        self,
+        url: str = EXPO_PUSH_URL,
+        receipts_url: str = EXPO_RECEIPTS_URL,
+        http2: bool = True,
+        max_connections: int = 10,
+        keepalive_seconds: float = 60.0,
+        concurrency: int = 6,
+        gzip_min_bytes: int = 1024,
+        timeout_seconds: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.url = url
+        self.receipts_url = receipts_url
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.keepalive_seconds = keepalive_seconds
+        self.concurrency = concurrency
+        self.gzip_min_bytes = gzip_min_bytes
+        self.timeout_seconds = timeout_seconds
+        # Injected transport (e.g. a fake Expo app) replaces the network
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def started(self) -> bool:
+        return self._client is not None
+
+    async def start(self) -> None:
+        """Open the shared client. Called from the app lifespan."""
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            transport=self._transport,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_seconds
+            ),
+            timeout=self.timeout_seconds,
+            headers={
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "Content-Type": "application/json",
+            }
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+    def _encode(self, chunk: List[Dict[str, Any]]) -> tuple:
+        body = json.dumps(chunk).encode()
+        if len(body) >= self.gzip_min_bytes:
+            return gzip.compress(body), {"Content-Encoding": "gzip"}
+        return body, {}
+
+    async def _post(self, url: str, payload: Any) -> Any:
+        body, headers = self._encode(payload)
+        async with self._semaphore:
+            # timeout_seconds bounds the whole request, not each phase of it
+            response = await asyncio.wait_for(
+                self._client.post(url, content=body, headers=headers), self.timeout_seconds
+            )
+        response.raise_for_status()
+        return response.json().get("data")
+
+    async def _post_chunk(self, url: str, items: List[Any], start: int, end: int, wrap) -> ChunkResult:
+        try:
+            return ChunkResult(start, end, data=await self._post(url, wrap(items[start:end])))
+        except Exception as e:
+            return ChunkResult(start, end, error=e)
+
+    async def _post_chunks(self, url: str, items: List[Any], chunk_size: int, wrap) -> List[ChunkResult]:
+        if not self.started:
+            # Outside the app lifespan (scripts, workers) open on first use
+            await self.start()
+        return await asyncio.gather(*(
+            self._post_chunk(url, items, start, min(start + chunk_size, len(items)), wrap)
+            for start in range(0, len(items), chunk_size)
+        ))
+
+    def max_send_seconds(self, messages: int) -> float:
+        """
+        Longest a send() of this many messages can take on an idle transport.
+
+        Chunks go out `concurrency` at a time and each request is cut off
+        after timeout_seconds.
+        """
+        chunks = math.ceil(messages / EXPO_MAX_MESSAGES_PER_REQUEST)
+        return math.ceil(chunks / self.concurrency) * self.timeout_seconds
+
+    async def send(self, payload: List[Dict[str, Any]]) -> List[ChunkResult]:
+        """
+        Post messages to Expo; returns one result per chunk, in message order.
+
+        A successful chunk's data is the tickets for payload[start:end]. A
+        failed chunk has its error set and doesn't affect the others.
+        """
+        return await self._post_chunks(
+            self.url, payload, EXPO_MAX_MESSAGES_PER_REQUEST, lambda chunk: chunk
+        )
+
+    async def get_receipts(self, ticket_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch receipts for ticket IDs, keyed by ID.
+
+        IDs whose receipts aren't ready yet are absent from the result.
+
+        Raises:
+            httpx.HTTPError or asyncio.TimeoutError: if any chunk failed
+        """
+        chunks = await self._post_chunks(
+            self.receipts_url, ticket_ids, EXPO_MAX_RECEIPTS_PER_REQUEST, lambda chunk: {"ids": chunk}
+        )
+        receipts: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks:
+            if chunk.error is not None:
+                raise chunk.error
+            receipts.update(chunk.data or {})
+        return receipts
+
+
+def _build_transport() -> PushTransport:
+    settings = get_settings()
+    return PushTransport(
+        url=settings.expo_push_url,
+        receipts_url=settings.expo_receipts_url,
+        http2=settings.push_http2,
+        max_connections=settings.push_max_connections,
+        keepalive_seconds=settings.push_keepalive_seconds,
+        concurrency=settings.push_concurrency,
+        gzip_min_bytes=settings.push_gzip_min_bytes,
+        timeout_seconds=settings.push_timeout_seconds
+    )
+
+
+push_transport = _build_transport()
@@ -0,0 +1,95 @@
+"""
+Expo push receipt polling.
+
+A ticket only says Expo accepted a message; whether it reached the device
+is reported later in a receipt. Uninstalled apps show up there as
+DeviceNotRegistered, so without reading receipts dead tokens keep getting
+sends indefinitely. This worker takes tickets old enough to have a receipt
+(push_tickets, written by services.push.handle_tickets), fetches their
+receipts in bulk and deactivates every dead token in a single UPDATE.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.crud.notification import get_due_push_tickets, deactivate_tokens, delete_push_tickets
+from app.db.session import AsyncSessionLocal
+from app.services.push import INVALID_TOKEN_ERRORS, push_stats
+from app.services.push_transport import push_transport
+from app.services.worker import PollingWorker
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptPoller(PollingWorker):
+    """Checks push receipts in batches and prunes dead tokens."""
+
+    name = "Push receipt poll"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: int = 3000,
+        poll_seconds: float = 60.0,
+        receipt_delay_seconds: float = 900.0,
+        ticket_retention_hours: int = 24
+    ):
+        super().__init__(batch_size, poll_seconds)
+        self.session_factory = session_factory
+        self.receipt_delay = timedelta(seconds=receipt_delay_seconds)
+        # Expo keeps receipts for about a day; tickets past this are dropped
+        self.ticket_retention = timedelta(hours=ticket_retention_hours)
+
+    async def run_once(self) -> int:
+        """Check one batch of due tickets; returns how many were settled."""
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            tickets = await get_due_push_tickets(db, now - self.receipt_delay, self.batch_size)
+            await db.commit()
+        if not tickets:
+            return 0
+
+        receipts = await push_transport.get_receipts([ticket.id for ticket in tickets])
+
+        dead = [
+            ticket.token
+            for ticket in tickets
+            if receipts.get(ticket.id, {}).get("status") == "error"
+            and receipts[ticket.id].get("details", {}).get("error") in INVALID_TOKEN_ERRORS
+        ]
+        # Tickets without a receipt yet are kept until it shows up or they expire
+        finished = [
+            ticket.id
+            for ticket in tickets
+            if ticket.id in receipts or ticket.created_at < now - self.ticket_retention
+        ]
+        async with self.session_factory() as db:
+            pruned = await deactivate_tokens(db, dead)
+            await delete_push_tickets(db, finished)
+            await db.commit()
+
+        push_stats.receipts_checked += len(receipts)
+        push_stats.tokens_pruned_on_receipt += pruned
+        logger.info(
+            f"Checked {len(receipts)} push receipts ({len(tickets) - len(receipts)} pending), "
+            f"deactivated {pruned} tokens"
+        )
+        # A batch of receipts that aren't ready yet counts as caught up
+        return len(finished)
+
+
+def _build_poller() -> ReceiptPoller:
+    settings = get_settings()
+    return ReceiptPoller(
+        AsyncSessionLocal,
+        batch_size=settings.push_receipt_batch_size,
+        poll_seconds=settings.push_receipt_poll_seconds,
+        receipt_delay_seconds=settings.push_receipt_delay_seconds,
+        ticket_retention_hours=settings.push_ticket_retention_hours
+    )
+
+
+receipt_poller = _build_poller()
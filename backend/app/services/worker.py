@@ -0,0 +1,64 @@
+"""
+Base class for the background push workers.
+
+A worker processes work in batches: run_once() handles one batch and
+returns how many items it took. While batches come back full it loops
+straight away; once it has caught up it sleeps for poll_seconds (or until
+stopped). Workers run as asyncio tasks in the API lifespan, or under
+`python -m scripts.dispatch_notifications` in their own process.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PollingWorker:
+    """Loops run_once() until stopped, sleeping when there's nothing to do."""
+
+    name = "worker"
+
+    def __init__(self, batch_size: int, poll_seconds: float):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def run_once(self) -> int:
+        raise NotImplementedError
+
+    async def on_idle(self) -> None:
+        """Housekeeping run whenever the worker has caught up."""
+
+    async def run(self) -> None:
+        """Work until stop() is called, sleeping between passes when idle."""
+        if self._stopping is None:
+            self._stopping = asyncio.Event()
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+                if processed < self.batch_size:
+                    await self.on_idle()
+            except Exception as e:
+                processed = 0
+                logger.error(f"{self.name} pass failed: {e}")
+            if processed < self.batch_size:
+                # Caught up: wait for the next poll (or shutdown)
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        """Run the worker as a task on the current event loop."""
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+            self._stopping = None
@@ -0,0 +1 @@
+# GymBuddy Backend Benchmarks
@@ -0,0 +1,468 @@
+"""
+Throughput and latency of the main API endpoints on a realistic dataset.
+
+Seeds a synthetic, reproducible (--seed) dataset:
+
+- users, all with the same password (hashed once, so seeding is quick);
+- a friendship graph grown by preferential attachment, so friend counts
+  follow a power law: most users have a handful, a few have dozens or more;
+- gyms scattered around one metro area;
+- sessions at those gyms over the next month, some weekly recurring, with
+  the creator's friends as participants, and their feed entries.
+
+It then drives the real app in-process through httpx.ASGITransport.
+Everything between the HTTP request and the database runs: auth,
+middleware, dependencies, the unit of work. Each scenario sends a fixed
+number of requests from --concurrency workers and reports req/s and
+p50/p95/p99 latency:
+
+- login:          POST /auth/login (bcrypt in the hashing pool)
+- feed:           GET /sessions for two weeks of the reader's feed
+- gym search:     GET /gyms, alternating name typeahead and radius search
+- session detail: GET /sessions/{id}
+- join:           POST /sessions/{id}/join on public sessions
+- invite:         POST /sessions/{id}/invite, five friends at a time
+
+Results are written as JSON (--output). Pass --compare with an earlier
+file to print the change per scenario. The exit status is 1 if any
+scenario's req/s or p95 got worse by more than --tolerance.
+
+The default database is a fresh SQLite file in WAL mode. SQLite allows
+one writer at a time, so join and invite are serialized there: their
+transactions start with BEGIN IMMEDIATE, so concurrent writers queue
+instead of failing. Pass --database-url to run against PostgreSQL (its
+tables are dropped and recreated).
+
+Usage (from backend/):
+    python -m benchmarks.api_load --users 2000 --requests 500 --concurrency 10
+    python -m benchmarks.api_load --output before.json
+    python -m benchmarks.api_load --compare before.json --tolerance 15
+    python -m benchmarks.api_load --database-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+from uuid import UUID
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import event, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.core.config import get_settings
+from app.core.geo import encode_geohash
+from app.core.hashing import hashing_executor
+from app.core.security import create_access_token, hash_password
+from app.crud.feed import backfill_feed
+from app.db import session as db_session
+from app.db.session import Base, UnitOfWorkSession, engine_options, replica_router
+from app.main import app
+from app.models.gym import Gym
+from app.models.notification import NotificationToken
+from app.models.session import RSVPStatus, Session, SessionParticipant, SessionVisibility
+from app.models.social import Friendship, FriendshipStatus
+from app.models.user import User
+from benchmarks.stats import summarize
+
+PASSWORD = "LoadTestPassword123!"
+BASE_TIME = datetime(2026, 3, 1, 0, 0)
+FEED_WINDOW = timedelta(days=14)
+METRO = (40.7128, -74.0060)  # New York
+METRO_SPREAD_DEG = 0.12  # ~13 km
+EDGES_PER_USER = 3  # Friendships each new user adds when the graph is grown
+INVITES_PER_REQUEST = 5
+BATCH_SIZE = 5000
+
+NAME_WORDS = ("Iron", "Steel", "Titan", "Urban", "Peak", "Apex", "Summit", "Power", "Forge", "Atlas")
+NAME_KINDS = ("Gym", "Fitness", "Athletics", "Barbell Club", "Strength", "Boxing", "Climbing", "Yoga")
+NEIGHBORHOODS = ("Chelsea", "Harlem", "Astoria", "Williamsburg", "Midtown", "Tribeca", "Flushing", "Bushwick")
+SESSION_TITLES = ("Leg day", "Push day", "Pull day", "Morning run", "Deadlift PRs", "Mobility", "HIIT", "Climb")
+RECURRENCE_RULES = ("FREQ=WEEKLY;BYDAY=MO,WE,FR", "FREQ=WEEKLY;BYDAY=TU,TH", "FREQ=WEEKLY;BYDAY=SA")
+
+
+@dataclass
+class Dataset:
+    """What the scenarios need to know about the seeded rows."""
+    user_ids: List[str]
+    emails: List[str]
+    friends: Dict[str, List[str]]
+    session_ids: List[str]
+    public_session_ids: List[str]
+    # Sessions whose creator has friends to invite, with that creator
+    invitable: List[Tuple[str, str]]
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+def friendship_pairs(rng: random.Random, user_count: int) -> List[Tuple[int, int]]:
+    """
+    Barabási–Albert graph: each new user befriends EDGES_PER_USER existing
+    users picked in proportion to how many friends they already have.
+    """
+    pairs = []
+    # Every friendship adds both ends; sampling from this is degree-proportional
+    endpoints: List[int] = []
+    for new in range(1, user_count):
+        chosen = set()
+        while len(chosen) < min(EDGES_PER_USER, new):
+            chosen.add(rng.choice(endpoints) if endpoints and rng.random() < 0.9 else rng.randrange(new))
+        for other in chosen:
+            pairs.append((new, other))
+            endpoints += [new, other]
+    return pairs
+
+
+# Set while a write scenario's request runs (the app runs in the caller's task)
+_writing: ContextVar[bool] = ContextVar("writing", default=False)
+
+
+def create_engine(database_url: str) -> AsyncEngine:
+    if make_url(database_url).get_backend_name() != "sqlite":
+        return create_async_engine(database_url, **engine_options(get_settings(), database_url))
+
+    engine = create_async_engine(database_url, connect_args={"timeout": 60})
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin(conn):
+        # Writers queue for the lock up front rather than failing to upgrade
+        # a read snapshot; readers never block under WAL
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if _writing.get() else "BEGIN")
+
+    return engine
+
+
+async def seed(engine: AsyncEngine, rng: random.Random, user_count: int, gym_count: int) -> Dataset:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    hashed = hash_password(PASSWORD)
+    user_ids = [_uuid(rng) for _ in range(user_count)]
+    emails = [f"lifter{i}@bench.example" for i in range(user_count)]
+    users = [
+        dict(id=user_id, email=email, hashed_password=hashed, name=f"Lifter {i}")
+        for i, (user_id, email) in enumerate(zip(user_ids, emails))
+    ]
+    tokens = [
+        dict(
+            id=_uuid(rng), user_id=user_id, token=f"ExponentPushToken[{user_id}]", device_type="ios",
+            is_active=True, created_at=BASE_TIME, updated_at=BASE_TIME
+        )
+        for user_id in user_ids if rng.random() < 0.6
+    ]
+
+    friends: Dict[str, List[str]] = {user_id: [] for user_id in user_ids}
+    friendships = []
+    for a, b in friendship_pairs(rng, user_count):
+        accepted = rng.random() < 0.9
+        requester, addressee = (user_ids[a], user_ids[b]) if rng.random() < 0.5 else (user_ids[b], user_ids[a])
+        friendships.append(dict(
+            id=_uuid(rng), requester_id=requester, addressee_id=addressee,
+            status=FriendshipStatus.ACCEPTED if accepted else FriendshipStatus.PENDING
+        ))
+        if accepted:
+            friends[requester].append(addressee)
+            friends[addressee].append(requester)
+
+    gyms = []
+    for i in range(gym_count):
+        lat = METRO[0] + rng.gauss(0, METRO_SPREAD_DEG / 2)
+        lon = METRO[1] + rng.gauss(0, METRO_SPREAD_DEG / 2)
+        gyms.append(dict(
+            id=_uuid(rng),
+            name=f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_KINDS)} {rng.choice(NEIGHBORHOODS)}",
+            address=f"{rng.randint(1, 999)} {rng.choice(NEIGHBORHOODS)} Ave",
+            latitude=lat, longitude=lon, geohash=encode_geohash(lat, lon), is_custom=False
+        ))
+
+    sessions, participants = [], []
+    public_session_ids, invitable = [], []
+    for user_id in user_ids:
+        home_gym = rng.choice(gyms)["id"]
+        for _ in range(rng.choices((0, 1, 2, 3, 5), weights=(30, 30, 20, 12, 8))[0]):
+            session_id = _uuid(rng)
+            visibility = rng.choices(
+                (SessionVisibility.PUBLIC, SessionVisibility.FRIENDS, SessionVisibility.PRIVATE),
+                weights=(30, 60, 10)
+            )[0]
+            recurring = rng.random() < 0.05
+            seats = rng.choice((None, None, 4, 6, 10))
+            going = [user_id] + rng.sample(friends[user_id], min(len(friends[user_id]), rng.randint(0, 4)))
+            if seats:
+                going = going[:seats]
+            maybe = [f for f in rng.sample(friends[user_id], min(len(friends[user_id]), 2)) if f not in going]
+            sessions.append(dict(
+                id=session_id, title=rng.choice(SESSION_TITLES),
+                gym_id=home_gym if rng.random() < 0.8 else rng.choice(gyms)["id"],
+                scheduled_at=BASE_TIME + timedelta(minutes=15 * rng.randrange(30 * 24 * 4)),
+                duration_minutes=rng.choice((45, 60, 90)), visibility=visibility,
+                max_participants=seats, creator_id=user_id, is_recurring=recurring,
+                recurrence_rule=rng.choice(RECURRENCE_RULES) if recurring else None,
+                is_cancelled=False, participant_count=len(going) + len(maybe), going_count=len(going)
+            ))
+            participants += [
+                dict(id=_uuid(rng), session_id=session_id, user_id=participant, rsvp_status=status)
+                for status, group in ((RSVPStatus.GOING, going), (RSVPStatus.MAYBE, maybe))
+                for participant in group
+            ]
+            if visibility == SessionVisibility.PUBLIC:
+                public_session_ids.append(session_id)
+            if friends[user_id]:
+                invitable.append((session_id, user_id))
+
+    async with factory() as db:
+        for model, rows in (
+            (User, users), (NotificationToken, tokens), (Friendship, friendships), (Gym, gyms),
+            (Session, sessions), (SessionParticipant, participants)
+        ):
+            for offset in range(0, len(rows), BATCH_SIZE):
+                await db.execute(insert(model), rows[offset:offset + BATCH_SIZE])
+        await db.commit()
+        feed_sessions = await backfill_feed(db)
+
+    return Dataset(
+        user_ids=user_ids, emails=emails, friends=friends,
+        session_ids=[row["id"] for row in sessions],
+        public_session_ids=public_session_ids, invitable=invitable,
+        counts={
+            "users": len(users), "friendships": len(friendships), "gyms": len(gyms),
+            "sessions": len(sessions), "participants": len(participants), "feed_sessions": feed_sessions,
+            "max_friends": max(len(f) for f in friends.values()),
+        }
+    )
+
+
+Scenario = Callable[[AsyncClient, random.Random], Awaitable[Response]]
+
+
+def scenarios(data: Dataset) -> Dict[str, Tuple[Scenario, Tuple[int, ...], bool]]:
+    """Name -> (one request, acceptable statuses, whether it writes)."""
+    headers = {
+        user_id: {"Authorization": f"Bearer {create_access_token(data={'sub': user_id})}"}
+        for user_id in data.user_ids
+    }
+    readers = [user_id for user_id in data.user_ids if data.friends[user_id]] or data.user_ids
+    search_terms = [word.lower()[:4] for word in NAME_WORDS + NEIGHBORHOODS]
+
+    async def login(client, rng):
+        return await client.post(
+            "/api/v1/auth/login", data={"username": rng.choice(data.emails), "password": PASSWORD}
+        )
+
+    async def feed(client, rng):
+        params = {"from_date": BASE_TIME.isoformat(), "to_date": (BASE_TIME + FEED_WINDOW).isoformat()}
+        return await client.get("/api/v1/sessions", params=params, headers=headers[rng.choice(readers)])
+
+    async def gym_search(client, rng):
+        if rng.random() < 0.5:
+            params = {"q": rng.choice(search_terms)}
+        else:
+            lat = METRO[0] + rng.gauss(0, METRO_SPREAD_DEG / 2)
+            lon = METRO[1] + rng.gauss(0, METRO_SPREAD_DEG / 2)
+            params = {"lat": lat, "lon": lon, "radius": 3}
+        return await client.get("/api/v1/gyms", params=params)
+
+    async def session_detail(client, rng):
+        return await client.get(
+            f"/api/v1/sessions/{rng.choice(data.session_ids)}", headers=headers[rng.choice(data.user_ids)]
+        )
+
+    async def join(client, rng):
+        return await client.post(
+            f"/api/v1/sessions/{rng.choice(data.public_session_ids)}/join",
+            headers=headers[rng.choice(data.user_ids)]
+        )
+
+    async def invite(client, rng):
+        session_id, creator = rng.choice(data.invitable)
+        friends = data.friends[creator]
+        return await client.post(
+            f"/api/v1/sessions/{session_id}/invite",
+            json={"user_ids": rng.sample(friends, min(len(friends), INVITES_PER_REQUEST))},
+            headers=headers[creator]
+        )
+
+    return {
+        "login": (login, (200,), False),
+        "feed": (feed, (200,), False),
+        "gym search": (gym_search, (200,), False),
+        "session detail": (session_detail, (200,), False),
+        "join": (join, (200,), True),
+        "invite": (invite, (204,), True),
+    }
+
+
+async def drive(client: AsyncClient, scenario: Scenario, ok: Tuple[int, ...], writes: bool,
+                requests: int, concurrency: int, rng: random.Random) -> Dict:
+    """Send `requests` requests from `concurrency` workers; latency from send to response."""
+    samples: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+    # One generator per worker, so request choices don't depend on interleaving
+    worker_rngs = [random.Random(rng.getrandbits(64)) for _ in range(concurrency)]
+
+    async def worker(worker_rng: random.Random) -> None:
+        _writing.set(writes)
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, worker_rng)
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            samples.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(worker_rng) for worker_rng in worker_rngs))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "req_per_s": round(requests / elapsed, 1),
+        **summarize(samples),
+        "errors": sum(count for status, count in statuses.items() if status not in ok),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'api_load.db')}"
+    engine = create_engine(url)
+    started = time.perf_counter()
+    data = await seed(engine, random.Random(args.seed), args.users, args.gyms)
+    seed_seconds = time.perf_counter() - started
+
+    # The app's own session factories, pointed at the benchmark database
+    factory = async_sessionmaker(
+        engine, class_=AsyncSession, sync_session_class=UnitOfWorkSession, expire_on_commit=False
+    )
+    rng = random.Random(args.seed + 1)
+    results = {}
+    with patch.object(db_session, "AsyncSessionLocal", factory), patch.object(replica_router, "primary", factory):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for name, (scenario, ok, writes) in scenarios(data).items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                requests = args.login_requests if name == "login" else args.requests
+                # Warm caches (search index, token cache, connection pool) outside the measurement
+                await drive(client, scenario, ok, writes, min(args.warmup, requests), args.concurrency, rng)
+                results[name] = await drive(client, scenario, ok, writes, requests, args.concurrency, rng)
+
+    hashing_executor.shutdown()
+    await engine.dispose()
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": make_url(url).get_backend_name(),
+            "seed": args.seed,
+            "seed_seconds": round(seed_seconds, 1),
+            "dataset": data.counts,
+        },
+        "results": results,
+    }
+
+
+def compare(previous: Dict, current: Dict, tolerance: float) -> List[str]:
+    """Print each scenario against the earlier run; returns the regressed scenarios."""
+    regressions = []
+    print(f"\nAgainst {previous['meta'].get('git_commit')} ({previous['meta'].get('created_at')}):")
+    for key in ("database", "dataset"):
+        if previous["meta"].get(key) != current["meta"][key]:
+            print(f"  (runs differ in {key}: {previous['meta'].get(key)} vs. {current['meta'][key]})")
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        throughput = (result["req_per_s"] - before["req_per_s"]) / before["req_per_s"] * 100
+        p95 = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        regressed = throughput < -tolerance or p95 > tolerance
+        if regressed:
+            regressions.append(name)
+        print(
+            f"  {name:16} req/s {before['req_per_s']:>8} -> {result['req_per_s']:<8} ({throughput:+.1f}%)  "
+            f"p95 {before['p95_ms']:>8} -> {result['p95_ms']:<8} ({p95:+.1f}%)"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--gyms", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="Logins are bcrypt-bound; fewer by default")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=None,
+                        help="Comma-separated subset, e.g. feed,join")
+    parser.add_argument("--output", default=None, help="JSON results path (default benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=15.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    meta = report["meta"]
+    print(f"Dataset ({meta['database']}, seeded in {meta['seed_seconds']}s): {meta['dataset']}")
+    for name, result in report["results"].items():
+        print(
+            f"  {name:16} {result['req_per_s']:>8} req/s  p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+            f"p99={result['p99_ms']}ms  errors={result['errors']} {result['statuses']}"
+        )
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"api_load-{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        if regressions:
+            print(f"Regressed by more than {args.tolerance}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Typeahead gym search latency as the gym table grows.
+
+For each table size, seeds realistic gym names and times keystroke-by-
+keystroke typeahead queries through the leading-wildcard ILIKE the API used
+to run versus search_gyms' search backend (pg_trgm on PostgreSQL, the
+in-process n-gram index elsewhere).
+
+Usage (from backend/):
+    python -m benchmarks.gym_name_search --sizes 1000 10000 100000
+    python -m benchmarks.gym_name_search --database-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 - register all tables
+from app.crud.gym import search_gyms
+from app.db.session import Base
+from app.models.gym import Gym
+from benchmarks.stats import summarize
+
+BRANDS = [
+    "Iron", "Planet", "Gold's", "Crunch", "Anytime", "Equinox", "Titan", "Summit",
+    "Urban", "Peak", "Forge", "Apex", "Core", "Pulse", "Elevate", "Momentum",
+]
+KINDS = ["Gym", "Fitness", "Athletics", "Strength Lab", "CrossFit", "Yoga Studio", "Boxing Club", "Health Club"]
+AREAS = ["Downtown", "Midtown", "Harbor", "Eastside", "Westside", "Uptown", "Riverside", "Old Town"]
+STREETS = ["Main St", "Broadway", "Park Ave", "Elm St", "Oak Rd", "Market St", "Lake Dr", "Hill Rd"]
+TYPEAHEAD = ["Iron Paradise", "Summit Fit", "riverside", "Broadway"]
+BATCH_SIZE = 20000
+
+
+def gym_name(rng: random.Random) -> str:
+    return f"{rng.choice(BRANDS)} {rng.choice(KINDS)} {rng.choice(AREAS)}"
+
+
+async def seed(engine, count: int, rng: random.Random) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    for offset in range(0, count, BATCH_SIZE):
+        rows = [
+            {
+                "id": str(uuid4()),
+                "name": gym_name(rng),
+                "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+                "latitude": 40.7 + rng.uniform(-0.3, 0.3),
+                "longitude": -74.0 + rng.uniform(-0.3, 0.3),
+                "is_custom": False,
+            }
+            for _ in range(offset, min(offset + BATCH_SIZE, count))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(Gym.__table__), rows)
+
+
+async def ilike_search(db: AsyncSession, query: str):
+    """The pre-backend query: leading-wildcard ILIKE on name."""
+    result = await db.execute(select(Gym).where(Gym.name.ilike(f"%{query}%")).limit(20))
+    return result.scalars().all()
+
+
+async def backend_search(db: AsyncSession, query: str):
+    return await search_gyms(db, query=query)
+
+
+async def time_typeahead(session_factory, search) -> dict:
+    samples = []
+    async with session_factory() as db:
+        # Warm up (builds the n-gram index on backends that need one)
+        await search(db, "warm")
+        for phrase in TYPEAHEAD:
+            for end in range(2, len(phrase) + 1):
+                started = time.perf_counter()
+                await search(db, phrase[:end])
+                samples.append((time.perf_counter() - started) * 1000)
+                db.expunge_all()
+    return summarize(samples)
+
+
+async def main(database_url: str, sizes: list) -> None:
+    rng = random.Random(7)
+    print("gyms      ILIKE p50 / p99        backend p50 / p99")
+    for size in sizes:
+        engine = create_async_engine(database_url)
+        await seed(engine, size, rng)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        before = await time_typeahead(session_factory, ilike_search)
+        after = await time_typeahead(session_factory, backend_search)
+        await engine.dispose()
+        print(
+            f"{size:<9} {before['p50_ms']:>7}ms / {before['p99_ms']:>7}ms"
+            f"    {after['p50_ms']:>7}ms / {after['p99_ms']:>7}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        path = os.path.join(tempfile.gettempdir(), "gymbuddy_bench_gym_names.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(url, args.sizes))
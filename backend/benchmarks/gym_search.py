@@ -0,0 +1,139 @@
+"""
+Radius search over a large synthetic gym table.
+
+Seeds N gyms (default 1M) clustered around a handful of metro areas, then
+times nearby searches using the old unindexed lat/lon bounding box versus
+the geohash-indexed search_gyms.
+
+Usage (from backend/):
+    python -m benchmarks.gym_search --gyms 1000000 --queries 200
+    python -m benchmarks.gym_search --database-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 - register all tables
+from app.core.geo import encode_geohash
+from app.crud.gym import search_gyms
+from app.db.session import Base
+from app.models.gym import Gym
+from benchmarks.stats import summarize
+
+METROS = [
+    (40.7128, -74.0060),   # New York
+    (34.0522, -118.2437),  # Los Angeles
+    (51.5074, -0.1278),    # London
+    (52.5200, 13.4050),    # Berlin
+    (35.6762, 139.6503),   # Tokyo
+    (-33.8688, 151.2093),  # Sydney
+]
+METRO_SPREAD_DEG = 0.5
+BATCH_SIZE = 20000
+
+
+async def seed(engine, count: int, rng: random.Random) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    started = time.perf_counter()
+    for offset in range(0, count, BATCH_SIZE):
+        rows = []
+        for i in range(offset, min(offset + BATCH_SIZE, count)):
+            center_lat, center_lon = rng.choice(METROS)
+            lat = center_lat + rng.gauss(0, METRO_SPREAD_DEG / 2)
+            lon = center_lon + rng.gauss(0, METRO_SPREAD_DEG / 2)
+            rows.append({
+                "id": str(uuid4()),
+                "name": f"Gym {i}",
+                "address": f"{i} Synthetic Ave",
+                "latitude": lat,
+                "longitude": lon,
+                "geohash": encode_geohash(lat, lon),
+                "is_custom": False,
+            })
+        async with engine.begin() as conn:
+            await conn.execute(insert(Gym.__table__), rows)
+    print(f"Seeded {count} gyms in {time.perf_counter() - started:.1f}s")
+
+
+async def bbox_search(db: AsyncSession, lat: float, lon: float, radius_km: float):
+    """The pre-index query: an unindexed bounding box, ranked by distance."""
+    lat_range = radius_km / 111.0
+    lon_range = radius_km / 111.0
+    d_lat = Gym.latitude - lat
+    d_lon = Gym.longitude - lon
+    result = await db.execute(
+        select(Gym)
+        .where(
+            Gym.latitude.between(lat - lat_range, lat + lat_range),
+            Gym.longitude.between(lon - lon_range, lon + lon_range)
+        )
+        .order_by(d_lat * d_lat + d_lon * d_lon)
+        .limit(20)
+    )
+    return result.scalars().all()
+
+
+async def time_queries(session_factory, search, points, radius_km: float) -> dict:
+    samples = []
+    async with session_factory() as db:
+        for lat, lon in points:
+            started = time.perf_counter()
+            await search(db, lat, lon, radius_km)
+            samples.append((time.perf_counter() - started) * 1000)
+            db.expunge_all()
+    return summarize(samples)
+
+
+async def main(database_url: str, gyms: int, queries: int, radius_km: float, skip_seed: bool) -> None:
+    rng = random.Random(42)
+    engine = create_async_engine(database_url)
+    if not skip_seed:
+        await seed(engine, gyms, rng)
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    points = []
+    for _ in range(queries):
+        center_lat, center_lon = rng.choice(METROS)
+        points.append((
+            center_lat + rng.uniform(-METRO_SPREAD_DEG, METRO_SPREAD_DEG),
+            center_lon + rng.uniform(-METRO_SPREAD_DEG, METRO_SPREAD_DEG)
+        ))
+
+    async def geohash_search(db, lat, lon, radius):
+        return await search_gyms(db, latitude=lat, longitude=lon, radius_km=radius)
+
+    results = {
+        "bbox (unindexed)": await time_queries(session_factory, bbox_search, points, radius_km),
+        "geohash index": await time_queries(session_factory, geohash_search, points, radius_km),
+    }
+    await engine.dispose()
+
+    print(f"{queries} searches, radius {radius_km} km")
+    for label, summary in results.items():
+        print(f"  {label:<17} p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--gyms", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded database")
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        path = os.path.join(tempfile.gettempdir(), "gymbuddy_bench_gyms.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(url, args.gyms, args.queries, args.radius_km, args.skip_seed))
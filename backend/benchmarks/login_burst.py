@@ -0,0 +1,114 @@
+"""
+Latency of unrelated endpoints during a concurrent login burst.
+
+Fires a burst of real bcrypt logins at the in-process app while probing
+/health, and reports probe latency with bcrypt run inline on the event loop
+versus through the hashing executor.
+
+Usage (from backend/):
+    python -m benchmarks.login_burst --logins 40 --probes 200
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.hashing import hashing_executor
+from app.core.security import hash_password
+from app.db.session import get_db
+from app.main import app
+from benchmarks.stats import summarize
+
+PASSWORD = "BurstPassword123!"
+
+
+async def _no_db():
+    yield None
+
+
+async def _inline(func, *args):
+    return func(*args)
+
+
+async def _probe(client: AsyncClient, count: int, samples: list) -> None:
+    """Issue /health on a fixed schedule, timing each from its planned start.
+
+    Measuring from the planned start (not from when the loop got round to
+    sending it) is what exposes event-loop stalls.
+    """
+    interval = 0.01
+    start = time.perf_counter()
+
+    async def one(planned: float) -> None:
+        await client.get("/health")
+        samples.append((time.perf_counter() - planned) * 1000)
+
+    tasks = []
+    for i in range(count):
+        planned = start + i * interval
+        await asyncio.sleep(max(0.0, planned - time.perf_counter()))
+        tasks.append(asyncio.create_task(one(planned)))
+    await asyncio.gather(*tasks)
+
+
+async def run_burst(logins: int, probes: int) -> dict:
+    samples: list = []
+    statuses: dict = {}
+
+    async def login(client: AsyncClient) -> None:
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={"username": "bench@example.com", "password": PASSWORD}
+        )
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            _probe(client, probes, samples),
+            *(login(client) for _ in range(logins))
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "health": summarize(samples),
+        "login_statuses": statuses,
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+async def main(logins: int, probes: int) -> None:
+    app.dependency_overrides[get_db] = _no_db
+    user = SimpleNamespace(id="bench-user", hashed_password=hash_password(PASSWORD))
+
+    async def fake_get_user_by_email(db, email):
+        return user
+
+    with patch("app.api.v1.auth.get_user_by_email", fake_get_user_by_email):
+        with patch.object(hashing_executor, "run", _inline):
+            inline = await run_burst(logins, probes)
+        pooled = await run_burst(logins, probes)
+
+    hashing_executor.shutdown()
+    app.dependency_overrides.clear()
+
+    print(f"Concurrent logins: {logins}, /health probes: {probes}")
+    for label, result in (("inline bcrypt", inline), ("hashing executor", pooled)):
+        health = result["health"]
+        print(
+            f"  {label:<17} /health p50={health['p50_ms']}ms p99={health['p99_ms']}ms "
+            f"max={health['max_ms']}ms  logins={result['login_statuses']} "
+            f"total={result['elapsed_s']}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.probes))
@@ -0,0 +1,172 @@
+"""
+Friend request latency with a slow Expo, inline push vs. the outbox.
+
+Sends a wave of POST /api/v1/friends/request through the in-process app
+while the push transport points at tests.fake_expo with a configurable
+response delay. Inline mode awaits the Expo send inside the handler (the
+pre-outbox behaviour); outbox mode only queues a row and a dispatcher task
+delivers it in the background. Reports handler p50/p99 and, for the outbox,
+how long the dispatcher took to drain the queue.
+
+On SQLite sessions are serialised (single writer), so the inline handlers,
+which hold their transaction open across the Expo call, also queue behind
+each other.
+
+Usage (from backend/):
+    python -m benchmarks.notification_outbox --requests 100 --expo-latency-ms 500
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import patch
+from uuid import uuid4
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 - register all tables
+from app.core.security import get_current_user
+from app.db.session import Base, get_db
+from app.main import app
+from app.models.notification import NotificationOutbox, NotificationToken, OutboxStatus
+from app.models.user import User
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.push import send_friend_request_notification
+from app.services.push_transport import PushTransport
+from benchmarks.stats import summarize
+from tests.fake_expo import FakeExpo
+
+
+def locked(session_factory, lock: asyncio.Lock):
+    """Session factory that allows one open session at a time.
+
+    SQLite has a single writer; queueing sessions on an asyncio lock models
+    that without the driver's busy-wait polling.
+    """
+    @asynccontextmanager
+    async def factory():
+        async with lock:
+            async with session_factory() as session:
+                yield session
+    return factory
+
+
+async def seed(engine, count: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.utcnow()
+    users = [
+        {"id": str(uuid4()), "email": f"bench{i}@example.com", "name": f"Bench {i}"}
+        for i in range(count + 1)
+    ]
+    tokens = [
+        {
+            "id": str(uuid4()), "user_id": user["id"], "token": f"ExponentPushToken[{user['id']}]",
+            "is_active": True, "created_at": now, "updated_at": now,
+        }
+        for user in users
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(User.__table__), users)
+        await conn.execute(insert(NotificationToken.__table__), tokens)
+    return users[0]["id"], [user["id"] for user in users[1:]]
+
+
+async def send_inline(db, addressee_id, requester_name, friendship_id):
+    """The pre-outbox handler behaviour: push to Expo before responding."""
+    await send_friend_request_notification(db, addressee_id, requester_name, friendship_id)
+
+
+async def fire(client: AsyncClient, addressees, concurrency: int) -> dict:
+    gate = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(addressee_id: str) -> None:
+        async with gate:
+            started = time.perf_counter()
+            response = await client.post("/api/v1/friends/request", json={"addressee_id": addressee_id})
+            response.raise_for_status()
+            samples.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(addressee_id) for addressee_id in addressees))
+    return summarize(samples)
+
+
+async def pending(session_factory) -> int:
+    async with session_factory() as db:
+        return await db.scalar(
+            select(func.count()).select_from(NotificationOutbox)
+            .where(NotificationOutbox.status == OutboxStatus.PENDING)
+        )
+
+
+async def run(mode: str, database_url: str, requests: int, concurrency: int, expo_latency_ms: float) -> dict:
+    engine = create_async_engine(database_url)
+    requester_id, addressees = await seed(engine, requests)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    if database_url.startswith("sqlite"):
+        session_factory = locked(session_factory, asyncio.Lock())
+
+    async def bench_get_db():
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+
+    async with session_factory() as db:
+        requester = await db.get(User, requester_id)
+    app.dependency_overrides[get_db] = bench_get_db
+    app.dependency_overrides[get_current_user] = lambda: requester
+
+    transport = PushTransport(http2=False, transport=ASGITransport(app=FakeExpo(expo_latency_ms / 1000)))
+    await transport.start()
+    dispatcher = NotificationDispatcher(session_factory, poll_seconds=0.05)
+    result = {}
+    try:
+        with patch("app.services.push.push_transport", transport):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+                if mode == "inline":
+                    with patch("app.api.v1.social.queue_friend_request_notification", send_inline):
+                        result["latency"] = await fire(client, addressees, concurrency)
+                else:
+                    dispatcher.start()
+                    result["latency"] = await fire(client, addressees, concurrency)
+                    started = time.perf_counter()
+                    while await pending(session_factory):
+                        await asyncio.sleep(0.05)
+                    result["drain_s"] = round(time.perf_counter() - started, 2)
+    finally:
+        await dispatcher.stop()
+        await transport.close()
+        app.dependency_overrides.clear()
+        await engine.dispose()
+    return result
+
+
+async def main(database_url: str, requests: int, concurrency: int, expo_latency_ms: float) -> None:
+    print(f"{requests} friend requests, {concurrency} concurrent, fake Expo latency {expo_latency_ms}ms")
+    for mode in ("inline", "outbox"):
+        result = await run(mode, database_url, requests, concurrency, expo_latency_ms)
+        latency = result["latency"]
+        drained = f"  queue drained in {result['drain_s']}s" if "drain_s" in result else ""
+        print(f"  {mode:<7} p50={latency['p50_ms']}ms p99={latency['p99_ms']}ms max={latency['max_ms']}ms{drained}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--expo-latency-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        path = os.path.join(tempfile.gettempdir(), "gymbuddy_bench_outbox.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(url, args.requests, args.concurrency, args.expo_latency_ms))
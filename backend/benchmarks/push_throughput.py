@@ -0,0 +1,96 @@
+"""
+Push throughput against a local fake Expo server.
+
+Serves tests.fake_expo over a real localhost socket and measures messages
+per second for a small-notification workload (many sends of a few messages,
+like friend requests and invites) and a bulk workload (a few large fan-outs),
+comparing a fresh httpx client per send with sequential chunks (the old
+send_push_notification) against the shared PushTransport.
+
+Plain-HTTP localhost has no TLS handshake and no HTTP/2 negotiation, so the
+numbers understate the gain against exp.host; use --latency-ms to model
+Expo's response time.
+
+Usage (from backend/):
+    python -m benchmarks.push_throughput --latency-ms 20
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+import httpx
+import uvicorn
+
+from app.services.push_transport import EXPO_MAX_MESSAGES_PER_REQUEST, PushTransport
+from tests.fake_expo import FakeExpo
+
+WORKLOADS = {
+    "small (300 x 3 msgs)": (300, 3),
+    "bulk (4 x 2500 msgs)": (4, 2500),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _payload(count: int):
+    return [{"to": f"ExponentPushToken[{i}]", "title": "Session Invite", "body": "Leg day!"} for i in range(count)]
+
+
+async def per_call_client(url: str, payload) -> None:
+    """The pre-transport behaviour: new client, chunks one after another."""
+    async with httpx.AsyncClient() as client:
+        for start in range(0, len(payload), EXPO_MAX_MESSAGES_PER_REQUEST):
+            response = await client.post(url, json=payload[start:start + EXPO_MAX_MESSAGES_PER_REQUEST])
+            response.raise_for_status()
+
+
+async def run_workload(send, sends: int, batch: int, concurrent_sends: int) -> float:
+    """Messages per second for `sends` notifications of `batch` messages each."""
+    payload = _payload(batch)
+    gate = asyncio.Semaphore(concurrent_sends)
+
+    async def one() -> None:
+        async with gate:
+            await send(payload)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(sends)))
+    return sends * batch / (time.perf_counter() - started)
+
+
+async def main(latency_ms: float, concurrent_sends: int) -> None:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/--/api/v2/push/send"
+    server = uvicorn.Server(uvicorn.Config(
+        FakeExpo(latency_seconds=latency_ms / 1000), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    transport = PushTransport(url=url)
+    await transport.start()
+    try:
+        print(f"fake Expo latency {latency_ms}ms, {concurrent_sends} concurrent sends")
+        print("workload                 per-call client     pooled transport")
+        for name, (sends, batch) in WORKLOADS.items():
+            before = await run_workload(lambda p: per_call_client(url, p), sends, batch, concurrent_sends)
+            after = await run_workload(transport.send, sends, batch, concurrent_sends)
+            print(f"{name:<24} {before:>10.0f} msg/s     {after:>10.0f} msg/s")
+    finally:
+        await transport.close()
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrent-sends", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency_ms, args.concurrent_sends))
@@ -0,0 +1,159 @@
+"""
+Expanding recurring series over a 90-day feed window.
+
+Builds N series with a mix of daily, weekly and monthly rules whose
+first occurrence was about two years ago (a user following long-running
+classes), then times expanding all of them over the next 90 days:
+
+- parse + step:  rrulestr per request, then between() from the first occurrence
+- engine (cold): app.core.recurrence with its rule caches cleared
+- engine (warm): the same with the caches filled by a previous request
+
+and the whole feed read (get_session_summaries, first page of the window)
+against an in-memory SQLite database holding those series.
+
+Usage (from backend/):
+    python -m benchmarks.recurrence_expansion --repeat 20
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from uuid import uuid4
+
+from dateutil.rrule import rrulestr
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.core import recurrence
+from app.core.recurrence import occurrences
+from app.crud.projections import get_session_summaries
+from app.db.session import Base
+from app.models.feed import FeedEntry
+from app.models.gym import Gym
+from app.models.session import Session, SessionVisibility
+from app.models.user import User
+from benchmarks.stats import summarize
+
+SIZES = (100, 300, 1000)
+WINDOW = timedelta(days=90)
+NOW = datetime(2026, 3, 1, 0, 0)
+RULES = (
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "FREQ=WEEKLY;BYDAY=TU,TH",
+    "FREQ=DAILY",
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=SA",
+    "FREQ=DAILY;INTERVAL=2;BYHOUR=6,18",
+    "FREQ=MONTHLY;BYDAY=1SU",
+)
+
+Series = Tuple[str, datetime]
+
+
+def build_series(count: int) -> List[Series]:
+    return [
+        (RULES[i % len(RULES)], NOW - timedelta(days=700 - i % 60, hours=-(6 + i % 12)))
+        for i in range(count)
+    ]
+
+
+def parse_and_step(series: List[Series]) -> int:
+    total = 0
+    for rule, first in series:
+        total += len(rrulestr(rule, dtstart=first).between(NOW, NOW + WINDOW, inc=True))
+    return total
+
+
+def engine(series: List[Series]) -> int:
+    return sum(sum(1 for _ in occurrences(rule, first, NOW, NOW + WINDOW)) for rule, first in series)
+
+
+def clear_caches() -> None:
+    recurrence.parse_rule.cache_clear()
+    recurrence._anchored.cache_clear()
+
+
+def time_ms(func, series: List[Series], repeat: int, before=None) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        func(series)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def feed_ms(series: List[Series], repeat: int) -> List[float]:
+    engine_ = create_async_engine("sqlite+aiosqlite://")
+    async with engine_.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine_, class_=AsyncSession, expire_on_commit=False)
+    user_id, gym_id = str(uuid4()), str(uuid4())
+    session_rows = [
+        dict(
+            id=str(uuid4()), title=rule, gym_id=gym_id, scheduled_at=first, duration_minutes=60,
+            visibility=SessionVisibility.FRIENDS, creator_id=user_id, is_recurring=True,
+            recurrence_rule=rule, is_cancelled=False, participant_count=1, going_count=1,
+            created_at=NOW, updated_at=NOW
+        )
+        for rule, first in series
+    ]
+    async with factory() as db:
+        await db.execute(insert(User), [dict(
+            id=user_id, email="follower@example.com", name="Follower", created_at=NOW, updated_at=NOW
+        )])
+        await db.execute(insert(Gym), [dict(
+            id=gym_id, name="Iron Paradise", address="1 Main St", latitude=40.7, longitude=-74.0,
+            is_custom=False, created_at=NOW, updated_at=NOW
+        )])
+        await db.execute(insert(Session), session_rows)
+        await db.execute(insert(FeedEntry), [
+            dict(user_id=user_id, session_id=row["id"], scheduled_at=row["scheduled_at"], is_recurring=True)
+            for row in session_rows
+        ])
+        await db.commit()
+
+    samples = []
+    for _ in range(repeat):
+        async with factory() as db:
+            started = time.perf_counter()
+            await get_session_summaries(db, user_id, from_date=NOW, to_date=NOW + WINDOW, limit=51)
+            samples.append((time.perf_counter() - started) * 1000)
+    await engine_.dispose()
+    return samples
+
+
+def run(repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for size in SIZES:
+        series = build_series(size)
+        assert parse_and_step(series) == engine(series)
+        occurrences_per_window = engine(series)
+        results[f"{size} series ({occurrences_per_window} occ.) / parse + step"] = summarize(
+            time_ms(parse_and_step, series, repeat)
+        )
+        results[f"{size} series ({occurrences_per_window} occ.) / engine (cold)"] = summarize(
+            time_ms(engine, series, repeat, before=clear_caches)
+        )
+        engine(series)
+        results[f"{size} series ({occurrences_per_window} occ.) / engine (warm)"] = summarize(
+            time_ms(engine, series, repeat)
+        )
+        results[f"{size} series / feed page (warm)"] = summarize(asyncio.run(feed_ms(series, repeat)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, summary in run(args.repeat).items():
+        print(f"{name:50} p50={summary['p50_ms']}ms p99={summary['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Serialization cost of the session list and detail responses.
+
+Starts from the models the handlers build (SessionResponse items for
+list_sessions, a SessionDetailResponse with N participants for
+get_session) and times turning them into response bytes: FastAPI's
+response_model path (dump, re-validate, serialize, stdlib json) versus
+returning them in ORJSONResponse directly.
+
+Usage (from backend/):
+    python -m benchmarks.response_serialization --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import ORJSONResponse
+from app.models.session import RSVPStatus, SessionVisibility
+from app.models.user import TrainingLevel
+from app.schemas.session import SessionDetailResponse, SessionResponse
+from benchmarks.stats import summarize
+
+SIZES = (50, 500, 5000)
+
+NOW = datetime(2026, 3, 1, 7, 30)
+GYM = SimpleNamespace(
+    id="gym-1", name="Iron Paradise", address="1 Main St", latitude=40.7, longitude=-74.0,
+    phone=None, website="https://example.com", photo_url=None, is_custom=False,
+    created_at=NOW, distance_km=None
+)
+
+
+def _user(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=f"user-{i}", name=f"User {i}", photo_url=None, bio="Lifting since 2019",
+        training_level=TrainingLevel.INTERMEDIATE
+    )
+
+
+def _session_fields(i: int) -> dict:
+    return dict(
+        id=f"session-{i}", title="Leg day", description="Squats and lunges", gym=GYM,
+        scheduled_at=NOW, duration_minutes=60, visibility=SessionVisibility.PUBLIC,
+        max_participants=None, creator=_user(0), is_recurring=False, is_cancelled=False,
+        participant_count=3, created_at=NOW
+    )
+
+
+def session_list(size: int) -> List[SessionResponse]:
+    return [SessionResponse(**_session_fields(i)) for i in range(size)]
+
+
+def session_detail(size: int) -> SessionDetailResponse:
+    participants = [
+        SimpleNamespace(
+            id=f"participant-{i}", user=_user(i), rsvp_status=RSVPStatus.GOING,
+            checked_in=False, checked_in_at=None
+        )
+        for i in range(size)
+    ]
+    return SessionDetailResponse(**_session_fields(0), participants=participants)
+
+
+def fastapi_path(field, content) -> bytes:
+    """What FastAPI does with a response_model and the stdlib JSONResponse."""
+    data = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=True))
+    return JSONResponse(data).body
+
+
+def direct(field, content) -> bytes:
+    return ORJSONResponse(content).body
+
+
+def time_ms(func, field, content, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(field, content)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def run(repeat: int) -> dict:
+    cases = {
+        "list_sessions": (List[SessionResponse], session_list),
+        "get_session": (SessionDetailResponse, session_detail),
+    }
+    results = {}
+    for endpoint, (response_model, build) in cases.items():
+        field = create_response_field(name="response", type_=response_model, mode="serialization")
+        for size in SIZES:
+            content = build(size)
+            assert json.loads(fastapi_path(field, content)) == json.loads(direct(field, content))
+            for label, func in (("response_model + json", fastapi_path), ("ORJSONResponse", direct)):
+                results[f"{endpoint} x{size} / {label}"] = summarize(time_ms(func, field, content, repeat))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, summary in run(args.repeat).items():
+        print(f"{name:50} p50={summary['p50_ms']}ms p99={summary['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+A burst of concurrent joins on one capped session.
+
+Seeds a session with max_participants seats and fires N joins at it at
+once, each in its own session/transaction like separate requests. The
+baseline is the previous endpoint: read going_count, reject if full,
+then insert the participant and bump the count. The seat claim is
+join_session, which takes the seat with a conditional UPDATE and
+waitlists whoever finds the session full. Reports joins/s and whether
+the session ended up overbooked.
+
+SQLite runs one write transaction at a time (BEGIN IMMEDIATE below), so
+the baseline cannot race there; pass --database-url to see it overbook
+on PostgreSQL.
+
+Usage (from backend/):
+    python -m benchmarks.session_capacity --joins 200 --seats 20
+    python -m benchmarks.session_capacity --database-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.crud.session import adjust_participant_counts, get_session_by_id, join_session
+from app.db.session import Base
+from app.models.gym import Gym
+from app.models.session import RSVPStatus, Session, SessionParticipant, SessionVisibility
+from app.models.user import User
+
+
+async def check_then_join(db: AsyncSession, session_id: str, user_id: str) -> str:
+    """The previous join endpoint: capacity checked in Python before the insert."""
+    session = await get_session_by_id(db, session_id, load_relations=False)
+    if session.max_participants and session.going_count >= session.max_participants:
+        return "rejected"
+    db.add(SessionParticipant(
+        id=str(uuid4()), session_id=session_id, user_id=user_id, rsvp_status=RSVPStatus.GOING
+    ))
+    await db.flush()
+    await adjust_participant_counts(db, session_id, participants=1, going=1)
+    return RSVPStatus.GOING.value
+
+
+async def claim_and_join(db: AsyncSession, session_id: str, user_id: str) -> str:
+    return (await join_session(db, session_id, user_id)).rsvp_status.value
+
+
+async def seed(factory, joins: int, seats: int) -> tuple:
+    now = datetime(2026, 3, 1, 7, 0)
+    user_ids = [str(uuid4()) for _ in range(joins)]
+    gym_id, session_id = str(uuid4()), str(uuid4())
+    async with factory() as db:
+        await db.execute(insert(User), [
+            dict(id=user_id, email=f"{user_id}@example.com", name="Lifter", created_at=now, updated_at=now)
+            for user_id in user_ids
+        ])
+        await db.execute(insert(Gym), [dict(
+            id=gym_id, name="Iron Paradise", address="1 Main St", latitude=40.7, longitude=-74.0,
+            is_custom=False, created_at=now, updated_at=now
+        )])
+        await db.execute(insert(Session), [dict(
+            id=session_id, title="Leg day", gym_id=gym_id, scheduled_at=now, duration_minutes=60,
+            visibility=SessionVisibility.PUBLIC, max_participants=seats, creator_id=user_ids[0],
+            is_recurring=False, is_cancelled=False, participant_count=0, going_count=0,
+            created_at=now, updated_at=now
+        )])
+        await db.commit()
+    return session_id, user_ids
+
+
+async def run(database_url: str, join, joins: int, seats: int) -> dict:
+    engine = create_async_engine(database_url, **(
+        {"connect_args": {"timeout": 120}} if database_url.startswith("sqlite") else {"pool_size": 50}
+    ))
+    if database_url.startswith("sqlite"):
+        @event.listens_for(engine.sync_engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def _begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    session_id, user_ids = await seed(factory, joins, seats)
+
+    async def one(user_id):
+        async with factory() as db:
+            outcome = await join(db, session_id, user_id)
+            await db.commit()
+            return outcome
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(user_id) for user_id in user_ids), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    async with factory() as db:
+        going_rows = await db.scalar(
+            select(func.count()).select_from(SessionParticipant).where(
+                SessionParticipant.session_id == session_id,
+                SessionParticipant.rsvp_status == RSVPStatus.GOING
+            )
+        )
+        going_count = await db.scalar(select(Session.going_count).where(Session.id == session_id))
+    await engine.dispose()
+    return {
+        "joins_per_s": round(joins / elapsed, 1),
+        "outcomes": dict(Counter(
+            type(outcome).__name__ if isinstance(outcome, Exception) else outcome for outcome in outcomes
+        )),
+        "going_rows": going_rows,
+        "going_count": going_count,
+        "overbooked": going_rows > seats,
+    }
+
+
+async def main(database_url: str, joins: int, seats: int) -> None:
+    print(f"{joins} concurrent joins, {seats} seats")
+    for label, join in (("check then join", check_then_join), ("seat claim", claim_and_join)):
+        print(f"  {label:16} {await run(database_url, join, joins, seats)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--joins", type=int, default=200)
+    parser.add_argument("--seats", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        path = os.path.join(tempfile.mkdtemp(), "capacity.db")
+        url = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(url, args.joins, args.seats))
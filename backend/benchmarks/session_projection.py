@@ -0,0 +1,176 @@
+"""
+Session feed and detail: ORM loading + validation vs. column projections.
+
+Seeds an in-memory SQLite database with public sessions that each have
+a few participants and exercises, then times a 50-item feed page and a
+session detail both ways, split into stages:
+
+- fetch:  the queries (and ORM object loading)
+- build:  turning the rows into response models
+- render: ORJSONResponse body
+
+Before: get_session_feed / get_session_by_id plus SessionResponse /
+SessionDetailResponse validated from the ORM objects. After:
+app.crud.projections, one joined SELECT of just the response columns
+(counts come from the sessions row), built with model_construct.
+
+Usage (from backend/):
+    python -m benchmarks.session_projection --repeat 50
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from uuid import uuid4
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.core.responses import ORJSONResponse
+from app.crud.projections import get_session_detail, get_session_summaries
+from app.crud.session import get_session_by_id, get_session_feed
+from app.db.session import Base
+from app.models.gym import Gym
+from app.models.session import RSVPStatus, Session, SessionExercise, SessionParticipant, SessionVisibility
+from app.models.user import TrainingLevel, User
+from app.schemas.session import SessionDetailResponse, SessionResponse
+from benchmarks.stats import summarize
+
+FEED_SIZE = 50
+PARTICIPANTS = 8
+EXERCISES = 5
+
+
+async def seed(db: AsyncSession, sessions: int) -> str:
+    now = datetime(2026, 3, 1, 7, 0)
+    users = [
+        dict(id=str(uuid4()), email=f"user{i}@example.com", name=f"User {i}", is_active=True,
+             is_verified=False, training_level=TrainingLevel.INTERMEDIATE, created_at=now, updated_at=now)
+        for i in range(PARTICIPANTS + 1)
+    ]
+    gym_id = str(uuid4())
+    await db.execute(insert(User), users)
+    await db.execute(insert(Gym), [dict(
+        id=gym_id, name="Iron Paradise", address="1 Main St", latitude=40.7, longitude=-74.0,
+        is_custom=False, created_at=now, updated_at=now
+    )])
+    session_rows, participant_rows, exercise_rows = [], [], []
+    for i in range(sessions):
+        session_id = str(uuid4())
+        session_rows.append(dict(
+            id=session_id, title=f"Session {i}", description="Push day", gym_id=gym_id,
+            scheduled_at=now + timedelta(hours=i), duration_minutes=60,
+            visibility=SessionVisibility.PUBLIC, creator_id=users[0]["id"], is_recurring=False,
+            is_cancelled=False, participant_count=PARTICIPANTS, going_count=PARTICIPANTS,
+            created_at=now, updated_at=now
+        ))
+        participant_rows += [
+            dict(id=str(uuid4()), session_id=session_id, user_id=user["id"], rsvp_status=RSVPStatus.GOING,
+                 checked_in=False, created_at=now)
+            for user in users[:PARTICIPANTS]
+        ]
+        exercise_rows += [
+            dict(id=str(uuid4()), session_id=session_id, name=f"Exercise {n}", sets=4, reps="8-12",
+                 order=n, created_at=now)
+            for n in range(EXERCISES)
+        ]
+    await db.execute(insert(Session), session_rows)
+    await db.execute(insert(SessionParticipant), participant_rows)
+    await db.execute(insert(SessionExercise), exercise_rows)
+    await db.commit()
+    return users[0]["id"]
+
+
+def _feed_before(sessions) -> List[SessionResponse]:
+    return [
+        SessionResponse(
+            id=session.id, title=session.title, description=session.description, gym=session.gym,
+            scheduled_at=session.scheduled_at, duration_minutes=session.duration_minutes,
+            visibility=session.visibility, max_participants=session.max_participants,
+            creator=session.creator, is_recurring=session.is_recurring,
+            is_cancelled=session.is_cancelled, participant_count=session.participant_count,
+            going_count=session.going_count, created_at=session.created_at
+        )
+        for session in sessions
+    ]
+
+
+def _detail_before(session) -> SessionDetailResponse:
+    return SessionDetailResponse(
+        id=session.id, title=session.title, description=session.description, gym=session.gym,
+        scheduled_at=session.scheduled_at, duration_minutes=session.duration_minutes,
+        visibility=session.visibility, max_participants=session.max_participants,
+        creator=session.creator, is_recurring=session.is_recurring, is_cancelled=session.is_cancelled,
+        participant_count=session.participant_count, going_count=session.going_count,
+        created_at=session.created_at,
+        participants=session.participants, exercises=session.exercises, group_id=session.group_id
+    )
+
+
+async def measure(factory, fetch: Callable, build: Callable, repeat: int, statements: list) -> Dict:
+    stages = {"fetch": [], "build": [], "render": [], "total": []}
+    for _ in range(repeat):
+        async with factory() as db:
+            statements.clear()
+            started = time.perf_counter()
+            rows = await fetch(db)
+            fetched = time.perf_counter()
+            models = build(rows)
+            built = time.perf_counter()
+            ORJSONResponse(models)
+            rendered = time.perf_counter()
+        stages["fetch"].append((fetched - started) * 1000)
+        stages["build"].append((built - fetched) * 1000)
+        stages["render"].append((rendered - built) * 1000)
+        stages["total"].append((rendered - started) * 1000)
+    result = {stage: summarize(samples)["p50_ms"] for stage, samples in stages.items()}
+    result["queries"] = len(statements)
+    return result
+
+
+async def run(sessions: int, repeat: int) -> Dict[str, Dict]:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        user_id = await seed(db, sessions)
+        detail_id = (await get_session_summaries(db, user_id, limit=1))[0].id
+
+    statements: list = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def identity(rows):
+        return rows
+
+    cases = {
+        f"feed x{FEED_SIZE} / ORM + validate": (
+            lambda db: get_session_feed(db, user_id, limit=FEED_SIZE), _feed_before
+        ),
+        f"feed x{FEED_SIZE} / projection": (
+            lambda db: get_session_summaries(db, user_id, limit=FEED_SIZE), identity
+        ),
+        "detail / ORM + validate": (lambda db: get_session_by_id(db, detail_id), _detail_before),
+        "detail / projection": (lambda db: get_session_detail(db, detail_id), identity),
+    }
+    results = {}
+    for name, (fetch, build) in cases.items():
+        results[name] = await measure(factory, fetch, build, repeat, statements)
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for name, result in asyncio.run(run(args.sessions, args.repeat)).items():
+        print(f"{name:32} {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Database round trips per request, always-commit vs. unit-of-work get_db.
+
+Drives the in-process app against a file SQLite database and counts what
+each request sends to the database: statements, COMMITs and ROLLBACKs.
+(The pool's rollback on checkin is left out: after a COMMIT or ROLLBACK
+the drivers treat it as a no-op.) The baseline commits after every
+request, and its token registration commits and refreshes inside the CRUD
+function as well; the unit of work commits once, only when the request
+wrote.
+
+Usage (from backend/):
+    python -m benchmarks.unit_of_work --requests 200
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import Counter
+from unittest.mock import patch
+from uuid import uuid4
+
+from fastapi import Request
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.api.v1 import notifications
+from app.core.security import create_access_token
+from app.core.token_cache import token_cache
+from app.crud.notification import register_token
+from app.db import session as db_session
+from app.db.session import Base, UnitOfWorkSession, get_db
+from app.main import app
+from app.models.user import User
+from benchmarks.stats import summarize
+
+
+async def _always_commit(request: Request) -> AsyncSession:
+    """The previous get_db: commit after every request."""
+    async with db_session.AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def _register_and_commit(db, user_id, token_in):
+    """The previous register_token: commit and refresh mid-request."""
+    token = await register_token(db, user_id, token_in)
+    await db.commit()
+    await db.refresh(token)
+    return token
+
+
+def _count_round_trips(engine, counts: Counter) -> None:
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", lambda *args: counts.update(["statement"]))
+    event.listen(sync_engine, "commit", lambda conn: counts.update(["commit"]))
+    event.listen(sync_engine, "rollback", lambda conn: counts.update(["rollback"]))
+
+
+
+async def run(requests: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "uow.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(
+        engine, class_=AsyncSession, sync_session_class=UnitOfWorkSession, expire_on_commit=False
+    )
+    # Tokens are registered by a second user so the reader's token list stays the same size
+    users = [
+        User(id=str(uuid4()), email=f"{name}@example.com", hashed_password="x", name=name)
+        for name in ("reader", "writer")
+    ]
+    async with factory() as db:
+        db.add_all(users)
+        await db.commit()
+    headers, writer_headers = (
+        {"Authorization": f"Bearer {create_access_token(data={'sub': user.id})}"} for user in users
+    )
+
+    async def read(client):
+        token_cache.clear()
+        return await client.get("/api/v1/notifications/tokens", headers=headers)
+
+    async def read_cached(client):
+        return await client.get("/api/v1/notifications/tokens", headers=headers)
+
+    async def rejected(client):
+        return await client.get("/api/v1/notifications/tokens", headers={"Authorization": "Bearer bad"})
+
+    async def write(client):
+        return await client.post(
+            "/api/v1/notifications/token",
+            json={"token": f"ExponentPushToken[{uuid4()}]", "device_type": "ios"},
+            headers=writer_headers
+        )
+
+    scenarios = {
+        "read (auth SELECT)": read,
+        "read (cached auth)": read_cached,
+        "rejected (401)": rejected,
+        "write (register token)": write,
+    }
+    counts = Counter()
+    _count_round_trips(engine, counts)
+    results = {}
+    transport = ASGITransport(app=app)
+    with patch("app.db.session.AsyncSessionLocal", factory):
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            for label, baseline in (("always commit", True), ("unit of work", False)):
+                if baseline:
+                    app.dependency_overrides[get_db] = _always_commit
+                else:
+                    app.dependency_overrides.pop(get_db, None)
+                for scenario, call in scenarios.items():
+                    await read_cached(client)
+                    counts.clear()
+                    samples = []
+                    register = _register_and_commit if baseline else register_token
+                    with patch.object(notifications, "register_token", register):
+                        for _ in range(requests):
+                            started = time.perf_counter()
+                            await call(client)
+                            samples.append((time.perf_counter() - started) * 1000)
+                    per_request = {key: round(value / requests, 2) for key, value in counts.items()}
+                    per_request["round_trips"] = round(sum(counts.values()) / requests, 2)
+                    results[f"{label} / {scenario}"] = {**per_request, "latency": summarize(samples)}
+    app.dependency_overrides.pop(get_db, None)
+    await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests))
+    for name, result in results.items():
+        latency = result.pop("latency")
+        print(f"{name:40} {result}  p50={latency['p50_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
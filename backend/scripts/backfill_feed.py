@@ -0,0 +1,28 @@
+"""
+Rebuild feed entries for every session.
+
+Run once after migration 005, or any time feeds need repairing. Each
+session's entries are rewritten in place, so re-running is safe.
+
+Usage (from backend/):
+    python -m scripts.backfill_feed --batch-size 500
+"""
+import argparse
+import asyncio
+
+from app.crud.feed import backfill_feed
+from app.db.session import AsyncSessionLocal, engine
+
+
+async def main(batch_size: int) -> None:
+    async with AsyncSessionLocal() as db:
+        processed = await backfill_feed(db, batch_size=batch_size)
+    await engine.dispose()
+    print(f"Fanned out {processed} sessions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
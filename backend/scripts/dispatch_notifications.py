@@ -0,0 +1,41 @@
+"""
+Deliver queued push notifications and poll their Expo receipts.
+
+Use this when the API runs with NOTIFICATION_DISPATCHER=external, so push
+delivery and dead-token pruning run in their own process. Any number of copies can run side by
+side; each claims its own batches.
+
+Usage (from backend/):
+    python -m scripts.dispatch_notifications
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.db.session import engine
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.receipt_poller import receipt_poller
+from app.services.push_transport import push_transport
+
+
+async def main() -> None:
+    loop = asyncio.get_running_loop()
+    await push_transport.start()
+    notification_dispatcher.start()
+    receipt_poller.start()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    await notification_dispatcher.stop()
+    await receipt_poller.stop()
+    await push_transport.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -6,13 +6,20 @@ from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime
 from uuid import uuid4
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.main import app
+from app.db.session import Base
 from app.models.user import User, TrainingLevel, ProfileVisibility
 from app.models.gym import Gym
 from app.models.session import Session, SessionVisibility, SessionExercise
 from app.models.social import Friendship, FriendshipStatus, Group
+from app.core.query_audit import QueryAuditMiddleware
 from app.core.security import create_access_token
+from app.core.token_cache import token_cache
+from app.services.gym_cache import gym_cache
+from app.services.push_transport import PushTransport
+from tests.fake_expo import FakeExpo
 
 
 # ============== User Fixtures ==============
@@ -169,11 +176,69 @@ def mock_db():
     return db
 
 
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """Keep verified-token cache entries from leaking between tests."""
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_gym_cache():
+    """Keep cached gym responses from leaking between tests (each has its own database)."""
+    gym_cache.clear()
+    yield
+    gym_cache.clear()
+
+
+@pytest.fixture
+async def db_engine():
+    """In-memory SQLite engine with all tables created."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db_session(db_engine) -> AsyncSession:
+    """Real database session for tests that need to run SQL."""
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+
 # ============== Client Fixtures ==============
 
 @pytest.fixture
-async def async_client():
-    """Create an async HTTP client for API testing."""
-    transport = ASGITransport(app=app)
+async def async_client(request):
+    """
+    Create an async HTTP client for API testing.
+
+    In tests marked @pytest.mark.max_queries(n), a request that sends more
+    than n statements raises QueryBudgetExceeded with its top statements.
+    """
+    marker = request.node.get_closest_marker("max_queries")
+    asgi_app = QueryAuditMiddleware(app, budget=marker.args[0], enforce=True) if marker else app
+    transport = ASGITransport(app=asgi_app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
+
+
+# ============== Push Fixtures ==============
+
+@pytest.fixture
+def fake_expo() -> FakeExpo:
+    """In-process fake of the Expo Push API."""
+    return FakeExpo()
+
+
+@pytest.fixture
+async def push_transport(fake_expo):
+    """Push transport wired to the fake Expo app instead of the network."""
+    transport = PushTransport(http2=False, transport=ASGITransport(app=fake_expo))
+    await transport.start()
+    yield transport
+    await transport.close()
@@ -0,0 +1,53 @@
+"""
+Shared builders for tests that need users, a gym and sessions in the database.
+
+All of them only flush, so they work on the db_session fixture or any
+session the test manages itself.
+"""
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Sessions are scheduled relative to this, so feed windows are deterministic
+BASE_TIME = datetime(2026, 3, 1, 7, 0, 0)
+
+
+async def seed_users(db: AsyncSession, user_count: int = 5) -> Tuple[List[str], str]:
+    """Add user_count users and one gym; returns (user_ids, gym_id)."""
+    from app.models.gym import Gym
+    from app.models.user import User
+
+    users = [
+        User(id=str(uuid4()), email=f"user{i}@example.com", name=f"User {i}")
+        for i in range(user_count)
+    ]
+    gym = Gym(id=str(uuid4()), name="Iron Paradise", address="1 Main St", latitude=40.7, longitude=-74.0)
+    db.add_all(users + [gym])
+    await db.flush()
+    return [u.id for u in users], gym.id
+
+
+async def befriend(db: AsyncSession, requester_id: str, addressee_id: str, accept: bool = True):
+    from app.crud.social import create_friend_request, update_friendship_status
+    from app.models.social import FriendshipStatus
+
+    friendship = await create_friend_request(db, requester_id, addressee_id)
+    if accept:
+        await update_friendship_status(db, friendship, FriendshipStatus.ACCEPTED)
+    return friendship
+
+
+async def create_session_at(db: AsyncSession, creator_id: str, gym_id: str, hours: float, visibility, **kwargs):
+    """Create a session through the CRUD layer, `hours` after BASE_TIME."""
+    from app.crud.session import create_session
+    from app.schemas.session import SessionCreate
+
+    return await create_session(db, creator_id, SessionCreate(
+        title=f"Session +{hours}h",
+        gym_id=gym_id,
+        scheduled_at=BASE_TIME + timedelta(hours=hours),
+        visibility=visibility,
+        **kwargs
+    ))
@@ -0,0 +1,105 @@
+"""
+In-process stand-in for the Expo Push API.
+
+A bare ASGI app that accepts push batches (plain or gzip-encoded), answers
+with one ticket per message, serves receipts for those tickets and records
+what it saw, so tests and the push benchmarks can run without the network.
+"""
+import asyncio
+import gzip
+import json
+from typing import List, Optional
+
+
+class FakeExpo:
+    """ASGI app answering Expo's push/send and push/getReceipts endpoints.
+
+    Tokens in dead_tokens are rejected in the ticket; tokens in
+    unregistered_tokens get an ok ticket but a DeviceNotRegistered receipt,
+    like an app uninstalled after its token was registered. A batch with a
+    token in failing_tokens is answered with a 500, like an outage that
+    only hits some requests.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        dead_tokens: Optional[set] = None,
+        unregistered_tokens: Optional[set] = None,
+        failing_tokens: Optional[set] = None
+    ):
+        self.latency_seconds = latency_seconds
+        self.dead_tokens = dead_tokens or set()
+        self.unregistered_tokens = unregistered_tokens or set()
+        self.failing_tokens = failing_tokens or set()
+        self.receipt_requests: List[int] = []
+        self.batch_sizes: List[int] = []
+        self.encodings: List[Optional[str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def messages(self) -> int:
+        return sum(self.batch_sizes)
+
+    def _ticket(self, message: dict) -> dict:
+        if message["to"] in self.dead_tokens:
+            return {
+                "status": "error",
+                "message": f"{message['to']} is not a registered push notification recipient",
+                "details": {"error": "DeviceNotRegistered"},
+            }
+        return {"status": "ok", "id": f"ticket-{message['to']}"}
+
+    def _receipt(self, ticket_id: str) -> dict:
+        token = ticket_id[len("ticket-"):]
+        if token in self.unregistered_tokens:
+            return {"status": "error", "details": {"error": "DeviceNotRegistered"}}
+        return {"status": "ok"}
+
+    def _receipts(self, ids: List[str]) -> dict:
+        self.receipt_requests.append(len(ids))
+        return {"data": {ticket_id: self._receipt(ticket_id) for ticket_id in ids}}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        headers = dict(scope["headers"])
+        body = b""
+        while True:
+            event = await receive()
+            body += event.get("body", b"")
+            if not event.get("more_body"):
+                break
+
+        encoding = headers.get(b"content-encoding")
+        self.encodings.append(encoding.decode() if encoding else None)
+        if encoding == b"gzip":
+            body = gzip.decompress(body)
+        batch = json.loads(body)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency_seconds:
+                await asyncio.sleep(self.latency_seconds)
+        finally:
+            self.in_flight -= 1
+
+        if scope["path"].endswith("/getReceipts"):
+            status, payload = 200, self._receipts(batch["ids"])
+        elif len(batch) > 100:
+            status, payload = 400, {"errors": [{"code": "PUSH_TOO_MANY_NOTIFICATIONS"}]}
+        elif any(message["to"] in self.failing_tokens for message in batch):
+            status, payload = 500, {"errors": [{"code": "INTERNAL_SERVER_ERROR"}]}
+        else:
+            self.batch_sizes.append(len(batch))
+            status, payload = 200, {"data": [self._ticket(message) for message in batch]}
+
+        response = json.dumps(payload).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": response})
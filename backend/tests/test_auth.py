@@ -256,3 +256,173 @@ class TestGetCurrentUser:
         )
         
         assert response.status_code == 401
+
+
+class TestHashingExecutor:
+    """Test the bounded password hashing pool."""
+    
+    @pytest.mark.asyncio
+    async def test_runs_function_in_pool(self):
+        """Hashing calls should run off the event loop and return their result."""
+        import threading
+        from app.core.hashing import HashingExecutor
+        
+        executor = HashingExecutor(max_workers=1, max_queue=1)
+        try:
+            thread_name = await executor.run(lambda: threading.current_thread().name)
+            assert thread_name.startswith("password-hash")
+            assert executor.pending == 0
+        finally:
+            executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_saturated_pool_returns_503(self):
+        """A full backlog should be rejected with 503 and Retry-After."""
+        import asyncio
+        import threading
+        from fastapi import HTTPException
+        from app.core.hashing import HashingExecutor
+        
+        executor = HashingExecutor(max_workers=1, max_queue=0, retry_after_seconds=3)
+        release = threading.Event()
+        try:
+            blocked = asyncio.create_task(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            
+            with pytest.raises(HTTPException) as exc_info:
+                await executor.run(lambda: True)
+            
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.headers["Retry-After"] == "3"
+            
+            release.set()
+            await blocked
+        finally:
+            release.set()
+            executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_login_when_pool_saturated(self, async_client, mock_user):
+        """Login should surface backpressure as 503."""
+        from fastapi import HTTPException
+        
+        async def saturated(func, *args):
+            raise HTTPException(status_code=503, detail="busy", headers={"Retry-After": "2"})
+        
+        with patch("app.api.v1.auth.get_user_by_email") as mock_get_user, \
+             patch("app.api.v1.auth.hashing_executor.run", saturated):
+            mock_get_user.return_value = mock_user
+            
+            response = await async_client.post(
+                "/api/v1/auth/login",
+                data={"username": "test@example.com", "password": "TestPass123!"}
+            )
+            
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "2"
+
+
+class TestTokenCache:
+    """Test the verified-token cache used by get_current_user."""
+    
+    @staticmethod
+    def _user(user_id: str = "user-123") -> User:
+        return User(
+            id=user_id,
+            email="cached@example.com",
+            name="Cached User",
+            training_level=TrainingLevel.BEGINNER,
+            visibility=ProfileVisibility.PRIVATE,
+            is_active=True,
+            is_verified=False,
+            created_at=datetime.utcnow()
+        )
+    
+    def test_hit_and_miss_counters(self):
+        """Lookups should be counted as hits or misses."""
+        from app.core.token_cache import TokenCache
+        
+        cache = TokenCache(ttl_seconds=60)
+        token = create_access_token(data={"sub": "user-123"})
+        
+        assert cache.get(token) is None
+        cache.set(token, {"sub": "user-123"}, self._user())
+        entry = cache.get(token)
+        
+        assert entry.user.id == "user-123"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+    
+    def test_respects_token_exp(self):
+        """Entries should not outlive the token's exp claim."""
+        import time
+        from app.core.token_cache import TokenCache
+        
+        cache = TokenCache(ttl_seconds=600)
+        cache.set("a.b.expired", {"sub": "user-123", "exp": time.time() - 1}, self._user())
+        
+        assert cache.get("a.b.expired") is None
+    
+    def test_invalidate_user(self):
+        """Invalidating a user should drop all of their tokens."""
+        from app.core.token_cache import TokenCache
+        
+        cache = TokenCache(ttl_seconds=60)
+        cache.set("a.b.one", {"sub": "user-123"}, self._user())
+        cache.set("a.b.two", {"sub": "user-123"}, self._user())
+        cache.set("a.b.other", {"sub": "user-456"}, self._user("user-456"))
+        
+        cache.invalidate_user("user-123")
+        
+        assert cache.get("a.b.one") is None
+        assert cache.get("a.b.two") is None
+        assert cache.get("a.b.other") is not None
+    
+    def test_lru_eviction(self):
+        """The least recently used entry should be evicted at capacity."""
+        from app.core.token_cache import TokenCache
+        
+        cache = TokenCache(ttl_seconds=60, max_entries=2)
+        cache.set("a.b.one", {"sub": "user-1"}, self._user("user-1"))
+        cache.set("a.b.two", {"sub": "user-2"}, self._user("user-2"))
+        cache.get("a.b.one")
+        cache.set("a.b.three", {"sub": "user-3"}, self._user("user-3"))
+        
+        assert cache.get("a.b.two") is None
+        assert cache.get("a.b.one") is not None
+        assert cache.get("a.b.three") is not None
+    
+    @pytest.mark.asyncio
+    async def test_get_current_user_skips_lookup_on_hit(self, mock_db):
+        """A cached token should not trigger a user SELECT."""
+        from unittest.mock import AsyncMock
+        from app.core.security import get_current_user
+        
+        user = self._user()
+        token = create_access_token(data={"sub": user.id})
+        mock_db.merge = AsyncMock(side_effect=lambda obj, load=True: obj)
+        
+        with patch("app.crud.user.get_user_by_id", new=AsyncMock(return_value=user)) as mock_get:
+            first = await get_current_user(token=token, db=mock_db)
+            second = await get_current_user(token=token, db=mock_db)
+        
+        assert first.id == second.id == user.id
+        assert mock_get.await_count == 1
+        mock_db.merge.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_get_current_user_rejects_inactive(self, mock_db):
+        """Deactivated users should not authenticate."""
+        from unittest.mock import AsyncMock
+        from fastapi import HTTPException
+        from app.core.security import get_current_user
+        
+        user = self._user()
+        user.is_active = False
+        token = create_access_token(data={"sub": user.id})
+        
+        with patch("app.crud.user.get_user_by_id", new=AsyncMock(return_value=user)):
+            with pytest.raises(HTTPException) as exc_info:
+                await get_current_user(token=token, db=mock_db)
+        
+        assert exc_info.value.status_code == 401
@@ -0,0 +1,358 @@
+"""
+Tests for database engine configuration and pool health.
+"""
+import pytest
+from unittest.mock import patch
+
+from app.core.config import Settings
+from app.db.session import engine_options
+
+
+class TestEngineOptions:
+    """Test how settings map onto create_async_engine arguments."""
+
+    def test_echo_is_independent_of_debug(self):
+        """Debug mode alone must not turn on SQL logging."""
+        options = engine_options(Settings(debug=True))
+        assert options["echo"] is False
+
+    def test_postgres_pool_settings(self):
+        options = engine_options(Settings(
+            database_url="postgresql+asyncpg://u:p@db/gymbuddy",
+            db_pool_size=20,
+            db_max_overflow=5,
+            db_pool_recycle=600,
+            db_statement_cache_size=250
+        ))
+
+        assert options["pool_size"] == 20
+        assert options["max_overflow"] == 5
+        assert options["pool_recycle"] == 600
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"] == {"statement_cache_size": 250}
+
+    def test_pgbouncer_disables_prepared_statement_caching(self):
+        """Transaction pooling needs uncached, uniquely named prepared statements."""
+        options = engine_options(Settings(
+            database_url="postgresql+asyncpg://u:p@pgbouncer/gymbuddy",
+            db_pgbouncer=True
+        ))
+        connect_args = options["connect_args"]
+        name = connect_args["prepared_statement_name_func"]
+
+        assert connect_args["statement_cache_size"] == 0
+        assert connect_args["prepared_statement_cache_size"] == 0
+        assert name() != name()
+
+    def test_sqlite_gets_no_pool_arguments(self):
+        options = engine_options(Settings(database_url="sqlite+aiosqlite://", sql_echo=True))
+        assert options == {"echo": True}
+
+
+class TestPoolHealth:
+    """Test pool warm-up and the /health/db endpoint."""
+
+    @pytest.fixture
+    async def file_engine(self, tmp_path):
+        """SQLite file engine on the same queue pool PostgreSQL gets."""
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=AsyncAdaptedQueuePool, pool_size=4
+        )
+        yield engine
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_fills_pool(self, file_engine):
+        from app.db.session import warm_up_pool, pool_status
+
+        opened = await warm_up_pool(file_engine, 3)
+
+        status = pool_status(file_engine)
+        assert opened == 3
+        assert status["checkedin"] == 3
+        assert status["checkedout"] == 0
+
+    @pytest.mark.asyncio
+    async def test_health_db_reports_pool_gauges(self, async_client, file_engine):
+        with patch("app.main.engine", file_engine):
+            response = await async_client.get("/health/db")
+
+        body = response.json()
+        assert response.status_code == 200
+        assert body["status"] == "healthy"
+        assert {"size", "checkedin", "checkedout", "overflow", "latency_ms"} <= set(body)
+
+    @pytest.mark.asyncio
+    async def test_health_db_unavailable(self, async_client, caplog):
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        broken = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/db.sqlite")
+        with patch("app.main.engine", broken), caplog.at_level("ERROR", logger="app.main"):
+            response = await async_client.get("/health/db")
+        await broken.dispose()
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+        assert response.json()["error"] == "database unreachable"
+        assert "nonexistent" not in response.text
+        assert "unable to open database file" in caplog.text
+
+
+class TestReplicaRouting:
+    """Test read routing across a primary and replicas."""
+
+    @pytest.fixture
+    async def databases(self, tmp_path):
+        """A primary and two replicas as separate SQLite files, all with the schema."""
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+        from app.db.session import Base
+
+        engines = [
+            create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+            for name in ("primary", "replica1", "replica2")
+        ]
+        for engine in engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        primary = async_sessionmaker(engines[0], class_=AsyncSession, expire_on_commit=False)
+        yield primary, engines
+        for engine in engines:
+            await engine.dispose()
+
+    async def _add_gym(self, engine, name):
+        from uuid import uuid4
+        from sqlalchemy import insert
+        from app.models.gym import Gym
+
+        gym_id = str(uuid4())
+        async with engine.begin() as conn:
+            await conn.execute(insert(Gym.__table__).values(
+                id=gym_id, name=name, address="1 Main St", latitude=40.7, longitude=-74.0, is_custom=False
+            ))
+        return gym_id
+
+    def test_round_robin_with_primary_last(self, databases):
+        from app.db.session import ReplicaRouter
+
+        primary, engines = databases
+        router = ReplicaRouter(primary, engines[1:])
+        first, second = router.candidates(), router.candidates()
+
+        assert first[0] is router.replicas[0]
+        assert second[0] is router.replicas[1]
+        assert first[-1] is primary and second[-1] is primary
+
+    def test_down_replica_is_skipped(self, databases):
+        from app.db.session import ReplicaRouter
+
+        primary, engines = databases
+        router = ReplicaRouter(primary, engines[1:], retry_seconds=60)
+        router.mark_down(router.replicas[0])
+
+        assert [router.candidates()[0] for _ in range(3)] == [router.replicas[1]] * 3
+        assert router.status() == {"replicas": 2, "replicas_healthy": 1}
+
+    @pytest.mark.asyncio
+    async def test_writer_reads_from_primary_while_sticky(self, databases):
+        """A POST that writes marks the client sticky; its reads then skip replicas."""
+        from uuid import uuid4
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+        from starlette.requests import Request
+        from app.db.session import ReplicaRouter, UnitOfWorkSession, get_db
+        from app.models.gym import Gym
+
+        primary, engines = databases
+        router = ReplicaRouter(primary, engines[1:], sticky_seconds=60)
+        factory = async_sessionmaker(engines[0], class_=AsyncSession, sync_session_class=UnitOfWorkSession)
+
+        async def post(client_key, write):
+            request = Request({
+                "type": "http", "method": "POST", "headers": [(b"authorization", client_key)]
+            })
+            dependency = get_db(request)
+            session = await dependency.__anext__()
+            if write:
+                session.add(Gym(id=str(uuid4()), name="New Gym", address="1 Main St", latitude=40.7, longitude=-74.0))
+            with pytest.raises(StopAsyncIteration):
+                await dependency.__anext__()
+
+        with patch("app.db.session.replica_router", router), patch("app.db.session.AsyncSessionLocal", factory):
+            await post(b"Bearer writer", write=True)
+            await post(b"Bearer noop", write=False)
+
+        assert router.candidates("Bearer writer") == [primary]
+        assert router.candidates("Bearer noop")[0] in router.replicas
+        assert router.candidates("Bearer reader")[0] in router.replicas
+
+    @pytest.mark.asyncio
+    async def test_get_gym_served_by_replica(self, async_client, databases):
+        from app.db.session import ReplicaRouter
+
+        primary, engines = databases
+        gym_id = await self._add_gym(engines[1], "Replica Gym")
+        router = ReplicaRouter(primary, engines[1:2])
+
+        with patch("app.db.session.replica_router", router):
+            response = await async_client.get(f"/api/v1/gyms/{gym_id}")
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "Replica Gym"
+
+    @pytest.mark.asyncio
+    async def test_unreachable_replica_fails_over_to_primary(self, async_client, databases):
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from app.db.session import ReplicaRouter
+
+        primary, engines = databases
+        gym_id = await self._add_gym(engines[0], "Primary Gym")
+        broken = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/replica.db")
+        router = ReplicaRouter(primary, [broken])
+
+        with patch("app.db.session.replica_router", router):
+            response = await async_client.get(f"/api/v1/gyms/{gym_id}")
+        await broken.dispose()
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "Primary Gym"
+        assert router.status()["replicas_healthy"] == 0
+
+
+class TestUnitOfWork:
+    """Test that get_db commits once, and only when the request wrote."""
+
+    @pytest.fixture
+    async def commits(self, db_engine):
+        """Route get_db to the test engine and count COMMITs sent to it."""
+        from sqlalchemy import event
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+        from app.db.session import UnitOfWorkSession
+
+        factory = async_sessionmaker(
+            db_engine, class_=AsyncSession, sync_session_class=UnitOfWorkSession, expire_on_commit=False
+        )
+        count = []
+
+        def listener(conn):
+            count.append(1)
+
+        event.listen(db_engine.sync_engine, "commit", listener)
+        with patch("app.db.session.AsyncSessionLocal", factory):
+            yield count, factory
+        event.remove(db_engine.sync_engine, "commit", listener)
+
+    async def _seed_user(self, factory):
+        from uuid import uuid4
+        from app.core.security import create_access_token
+        from app.models.user import User
+
+        async with factory() as db:
+            user = User(id=str(uuid4()), email=f"{uuid4()}@example.com", hashed_password="x", name="Lifter")
+            db.add(user)
+            await db.commit()
+        return {"Authorization": f"Bearer {create_access_token(data={'sub': user.id})}"}
+
+    @pytest.mark.asyncio
+    async def test_read_only_request_skips_commit(self, async_client, commits):
+        count, factory = commits
+        headers = await self._seed_user(factory)
+        count.clear()
+
+        first = await async_client.get("/api/v1/notifications/tokens", headers=headers)
+        cached = await async_client.get("/api/v1/notifications/tokens", headers=headers)
+
+        assert first.status_code == cached.status_code == 200
+        assert count == []
+
+    @pytest.mark.asyncio
+    async def test_rejected_request_skips_commit(self, async_client, commits):
+        count, _ = commits
+
+        response = await async_client.get(
+            "/api/v1/notifications/tokens", headers={"Authorization": "Bearer not-a-jwt"}
+        )
+
+        assert response.status_code == 401
+        assert count == []
+
+    @pytest.mark.asyncio
+    async def test_write_commits_once(self, async_client, commits):
+        from app.crud.notification import get_token_by_value
+
+        count, factory = commits
+        headers = await self._seed_user(factory)
+        count.clear()
+
+        response = await async_client.post(
+            "/api/v1/notifications/token",
+            json={"token": "ExponentPushToken[uow]", "device_type": "ios"},
+            headers=headers
+        )
+
+        assert response.status_code == 201
+        assert len(count) == 1
+        async with factory() as db:
+            assert await get_token_by_value(db, "ExponentPushToken[uow]") is not None
+
+    @pytest.mark.asyncio
+    async def test_register_token_leaves_commit_to_caller(self, db_session):
+        from uuid import uuid4
+        from app.crud.notification import register_token, get_token_by_value
+        from app.models.user import User
+        from app.schemas.notification import NotificationTokenCreate
+
+        user = User(id=str(uuid4()), email=f"{uuid4()}@example.com", hashed_password="x", name="Lifter")
+        db_session.add(user)
+        await db_session.commit()
+
+        token_in = NotificationTokenCreate(token="ExponentPushToken[x]", device_type="ios")
+        await register_token(db_session, user.id, token_in)
+        await db_session.rollback()
+
+        assert await get_token_by_value(db_session, "ExponentPushToken[x]") is None
+
+    @pytest.mark.asyncio
+    async def test_after_commit_callbacks_wait_for_commit(self, db_session):
+        from sqlalchemy import text
+        from app.db.session import after_commit
+
+        calls = []
+
+        async def invalidate():
+            calls.append("async")
+
+        after_commit(db_session, lambda: calls.append("sync"))
+        after_commit(db_session, invalidate)
+        await db_session.flush()
+        assert calls == []
+        await db_session.commit()
+        assert calls == ["sync", "async"]
+
+        # Rolled back: dropped, and not run by the next commit
+        await db_session.execute(text("SELECT 1"))
+        after_commit(db_session, lambda: calls.append("rolled back"))
+        await db_session.rollback()
+        await db_session.commit()
+        assert calls == ["sync", "async"]
+
+    @pytest.mark.asyncio
+    async def test_user_update_invalidates_token_cache_on_commit(self, db_session):
+        """Invalidating at flush would let a concurrent request re-cache the old committed row."""
+        from uuid import uuid4
+        from app.core.security import create_access_token
+        from app.core.token_cache import token_cache
+        from app.crud.user import deactivate_user
+        from app.models.user import User
+
+        user = User(id=str(uuid4()), email=f"{uuid4()}@example.com", hashed_password="x", name="Lifter")
+        db_session.add(user)
+        await db_session.commit()
+        token = create_access_token(data={"sub": user.id})
+        token_cache.set(token, {"sub": user.id}, user)
+
+        await deactivate_user(db_session, user)
+        assert token_cache.get(token) is not None
+        await db_session.commit()
+        assert token_cache.get(token) is None
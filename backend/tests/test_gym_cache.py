@@ -0,0 +1,258 @@
+"""
+Tests for the gym response cache, ETags and invalidation.
+"""
+import pytest
+
+
+class TestCacheBackends:
+    """Test the cache backends and ETag helpers."""
+
+    @pytest.mark.asyncio
+    async def test_memory_backend_expiry_and_lru(self, monkeypatch):
+        from app.core import response_cache
+        from app.core.response_cache import MemoryCacheBackend
+
+        now = [1000.0]
+        monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+        backend = MemoryCacheBackend(max_entries=2)
+        await backend.set("a", b"1", 10)
+        await backend.set("forever", b"2", None)
+        assert await backend.get("a") == b"1"
+
+        now[0] += 11
+        assert await backend.get("a") is None
+        assert await backend.get("forever") == b"2"
+
+        await backend.set("b", b"3", 10)
+        await backend.set("c", b"4", 10)
+        assert await backend.get("forever") is None  # least recently used
+        assert await backend.get("b") == b"3"
+        await backend.delete("b", "missing")
+        assert await backend.get("b") is None
+
+    @pytest.mark.asyncio
+    async def test_redis_backend(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        from app.core.response_cache import RedisCacheBackend
+        from app.services.gym_cache import GymCache
+
+        backend = RedisCacheBackend(fakeredis.FakeAsyncRedis())
+        cache = GymCache(backend, ttl_seconds=30)
+        cached = await cache.set_detail("gym-1", b'{"name":"Iron"}')
+        assert await cache.get_detail("gym-1") == cached
+        assert 0 < await backend.client.ttl("gymbuddy:gym:gym-1") <= 30
+
+        search = cache.normalize_search("Iron", None, None, 10.0)
+        key = await cache.search_key(search, 20)
+        await cache.set_search(key, b"[]")
+        await cache.invalidate("gym-1")
+
+        assert await cache.get_detail("gym-1") is None
+        assert await cache.search_key(search, 20) != key
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_nothing_stored_while_replicas_settle(self, monkeypatch):
+        """Right after an invalidation, responses are served but not cached."""
+        from app.services import gym_cache as gym_cache_module
+        from app.core.response_cache import MemoryCacheBackend
+        from app.services.gym_cache import GymCache
+
+        now = [10**18]
+        monkeypatch.setattr(gym_cache_module.time, "time_ns", lambda: now[0])
+        cache = GymCache(MemoryCacheBackend(), settle_seconds=5)
+        await cache.invalidate("gym-1")
+
+        cached = await cache.set_detail("gym-1", b'{"name":"Iron"}')
+        assert cached.body == b'{"name":"Iron"}'
+        assert await cache.get_detail("gym-1") is None
+
+        now[0] += 6 * 10**9
+        await cache.set_detail("gym-1", b'{"name":"Iron"}')
+        assert await cache.get_detail("gym-1") == cached
+
+    def test_etag_matching(self):
+        from app.core.response_cache import etag_for, etag_matches
+
+        etag = etag_for(b"[]")
+        assert etag == etag_for(b"[]") != etag_for(b"[1]")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('"other"', etag)
+
+    @pytest.mark.asyncio
+    async def test_search_normalized(self):
+        from app.core.geo import cell_size_degrees, geohash_center, haversine_km
+        from app.services.gym_cache import GymCache
+        from app.core.response_cache import MemoryCacheBackend
+
+        cache = GymCache(MemoryCacheBackend(), geohash_precision=7)
+        first = cache.normalize_search("  Iron   PARADISE ", 40.71281, -74.00601, 5.0)
+        second = cache.normalize_search("iron paradise", 40.71275, -74.00595, 5.0)
+
+        assert await cache.search_key(first, 20) == await cache.search_key(second, 20)
+        assert first.query == "iron paradise"
+        assert (first.latitude, first.longitude) == (40.71281, -74.00601)
+        assert first.center == geohash_center(first.cell)
+        assert cache.normalize_search("  ", None, None, 5.0).query is None
+
+        # slack_km reaches every point of the cell from its centre
+        height, width = cell_size_degrees(7)
+        for d_lat in (-height / 2, height / 2):
+            for d_lon in (-width / 2, width / 2):
+                corner = (first.center[0] + d_lat, first.center[1] + d_lon)
+                assert haversine_km(*first.center, *corner) <= first.slack_km + 1e-9
+
+
+class TestGymEndpointsCached:
+    """Test caching, revalidation and invalidation through the API."""
+
+    @pytest.fixture
+    async def client(self, async_client, db_session):
+        from app.main import app
+        from app.db.session import get_db, get_read_db
+
+        async def override_get_db():
+            yield db_session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        yield async_client
+        app.dependency_overrides.clear()
+
+    async def _add(self, db, name, latitude=40.7128, longitude=-74.0060):
+        from app.crud.gym import create_gym
+        from app.schemas.gym import GymCreate
+
+        return await create_gym(db, GymCreate(
+            name=name, address="1 Main St", latitude=latitude, longitude=longitude
+        ))
+
+    @pytest.mark.asyncio
+    async def test_detail_etag_and_304(self, client, db_session):
+        gym = await self._add(db_session, "Iron Paradise")
+
+        response = await client.get(f"/api/v1/gyms/{gym.id}")
+        assert response.status_code == 200
+        assert response.json()["name"] == "Iron Paradise"
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "public, max-age=60"
+
+        revalidated = await client.get(f"/api/v1/gyms/{gym.id}", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+        missing = await client.get("/api/v1/gyms/nope")
+        assert missing.status_code == 404
+        assert "etag" not in missing.headers
+
+    @pytest.mark.asyncio
+    async def test_detail_served_from_cache_until_updated(self, client, db_session):
+        from sqlalchemy import update
+        from app.crud.gym import update_gym
+        from app.models.gym import Gym
+        from app.schemas.gym import GymUpdate
+
+        gym = await self._add(db_session, "Iron Paradise")
+        etag = (await client.get(f"/api/v1/gyms/{gym.id}")).headers["etag"]
+
+        # Changed behind the cache's back: still served from the cache
+        await db_session.execute(update(Gym).where(Gym.id == gym.id).values(name="Sneaky"))
+        cached = await client.get(f"/api/v1/gyms/{gym.id}")
+        assert cached.json()["name"] == "Iron Paradise"
+
+        # Dropped when the update commits, not at flush
+        await update_gym(db_session, gym, GymUpdate(name="Iron Paradise II"))
+        assert (await client.get(f"/api/v1/gyms/{gym.id}")).json()["name"] == "Iron Paradise"
+        await db_session.commit()
+        response = await client.get(f"/api/v1/gyms/{gym.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["name"] == "Iron Paradise II"
+        assert response.headers["etag"] != etag
+
+    @pytest.mark.asyncio
+    async def test_search_invalidated_by_new_gym(self, client, db_session):
+        await self._add(db_session, "Iron Paradise")
+
+        first = await client.get("/api/v1/gyms", params={"q": "Iron"})
+        again = await client.get("/api/v1/gyms", params={"q": " iron "}, headers={"If-None-Match": first.headers["etag"]})
+        assert [g["name"] for g in first.json()] == ["Iron Paradise"]
+        assert again.status_code == 304
+
+        await self._add(db_session, "Ironworks")
+        await db_session.commit()
+        response = await client.get("/api/v1/gyms", params={"q": "iron"}, headers={"If-None-Match": first.headers["etag"]})
+        assert response.status_code == 200
+        assert sorted(g["name"] for g in response.json()) == ["Iron Paradise", "Ironworks"]
+
+    @pytest.fixture
+    def searches(self, monkeypatch):
+        """Records the (latitude, longitude, radius_km, limit) of each search that reached the database."""
+        from app.api.v1 import gyms
+        from app.crud.gym import search_gyms
+
+        calls = []
+
+        async def recording_search(db, **kwargs):
+            calls.append((kwargs.get("latitude"), kwargs.get("longitude"), kwargs.get("radius_km"), kwargs.get("limit")))
+            return await search_gyms(db, **kwargs)
+
+        monkeypatch.setattr(gyms, "search_gyms", recording_search)
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_nearby_searches_share_candidates(self, client, db_session, searches):
+        from app.core.geo import haversine_km
+
+        await self._add(db_session, "Iron Paradise", 40.7218, -74.0060)
+        points = [(40.71281, -74.00601), (40.71275, -74.00595)]
+        responses = [
+            await client.get("/api/v1/gyms", params={"lat": lat, "lon": lon, "radius": 5})
+            for lat, lon in points
+        ]
+
+        assert len(searches) == 1
+        for (lat, lon), response in zip(points, responses):
+            (gym,) = response.json()
+            assert gym["distance_km"] == pytest.approx(haversine_km(lat, lon, 40.7218, -74.0060), abs=0.001)
+        assert responses[0].headers["etag"] != responses[1].headers["etag"]
+
+        again = await client.get(
+            "/api/v1/gyms",
+            params={"lat": 40.71281, "lon": -74.00601, "radius": 5},
+            headers={"If-None-Match": responses[0].headers["etag"]}
+        )
+        assert again.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_radius_measured_from_the_point(self, client, db_session):
+        from app.core.geo import KM_PER_DEGREE
+        from app.services.gym_cache import gym_cache
+
+        lat, lon = 40.71281, -74.00601
+        center_lat = gym_cache.normalize_search(None, lat, lon, 1.0).center[0]
+        # On the far side of the point from the cell centre, so both are
+        # over 1 km from the centre: one just inside 1 km of the point, one just outside
+        away = 1 if lat > center_lat else -1
+        await self._add(db_session, "Inside", lat + away * 0.999 / KM_PER_DEGREE, lon)
+        await self._add(db_session, "Outside", lat + away * 1.001 / KM_PER_DEGREE, lon)
+
+        response = await client.get("/api/v1/gyms", params={"lat": lat, "lon": lon, "radius": 1})
+        assert [g["name"] for g in response.json()] == ["Inside"]
+
+    @pytest.mark.asyncio
+    async def test_unsettled_page_searched_from_the_point(self, client, db_session, searches):
+        from app.core.geo import KM_PER_DEGREE
+
+        lat, lon = 40.71281, -74.00601
+        # Closer together than a cell: the cached candidates can't order them for every point
+        for i, km in enumerate((1.0, 1.02, 1.04)):
+            await self._add(db_session, f"Gym {i}", lat + km / KM_PER_DEGREE, lon)
+
+        response = await client.get("/api/v1/gyms", params={"lat": lat, "lon": lon, "radius": 5, "limit": 1})
+        assert [g["name"] for g in response.json()] == ["Gym 0"]
+        assert searches[-1] == (lat, lon, 5.0, 1)
+        assert len(searches) == 2
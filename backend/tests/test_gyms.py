@@ -194,3 +194,244 @@ class TestGetGymById:
         # The endpoint is publicly accessible
         assert mock_gym.id is not None  # Gym ID exists
         # No 401 would be returned for public endpoints
+
+
+class TestGeo:
+    """Test geohash and distance helpers."""
+    
+    def test_encode_geohash_known_value(self):
+        """Encoding should match the reference geohash implementation."""
+        from app.core.geo import encode_geohash
+        
+        assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    
+    def test_haversine_known_distance(self):
+        """New York to Los Angeles is roughly 3936 km."""
+        from app.core.geo import haversine_km
+        
+        distance = haversine_km(40.7128, -74.0060, 34.0522, -118.2437)
+        assert 3900 < distance < 3970
+    
+    def test_covering_cells_contain_nearby_points(self):
+        """Every point inside the radius should fall in a covering cell."""
+        import math
+        from app.core.geo import KM_PER_DEGREE, covering_cells, encode_geohash, haversine_km
+        
+        lat, lon, radius = 40.7128, -74.0060, 10.0
+        cells = covering_cells(lat, lon, radius)
+        
+        for bearing in range(0, 360, 15):
+            d_lat = (radius * 0.99 / KM_PER_DEGREE) * math.cos(math.radians(bearing))
+            d_lon = (radius * 0.99 / (KM_PER_DEGREE * math.cos(math.radians(lat)))) * math.sin(math.radians(bearing))
+            point_hash = encode_geohash(lat + d_lat, lon + d_lon)
+            assert haversine_km(lat, lon, lat + d_lat, lon + d_lon) <= radius
+            assert any(point_hash.startswith(cell) for cell in cells)
+    
+    def test_next_prefix(self):
+        """next_prefix should carry over the last base32 character."""
+        from app.core.geo import next_prefix
+        
+        assert next_prefix("dr5r") == "dr5s"
+        assert next_prefix("dr5z") == "dr6"
+        assert next_prefix("zz") is None
+
+
+class TestSearchGymsRadius:
+    """Test search_gyms location filtering against a real database."""
+    
+    @pytest.mark.asyncio
+    async def test_radius_search_ranks_by_distance(self, db_session):
+        """Only gyms inside the radius should be returned, nearest first."""
+        from app.core.geo import KM_PER_DEGREE
+        from app.crud.gym import create_gym, search_gyms
+        from app.schemas.gym import GymCreate
+        
+        # Roughly 1 km, 5 km and 30 km north of the search center
+        for name, offset_km in (("Far", 30.0), ("Near", 1.0), ("Mid", 5.0)):
+            await create_gym(db_session, GymCreate(
+                name=name,
+                address=f"{name} St",
+                latitude=40.7128 + offset_km / KM_PER_DEGREE,
+                longitude=-74.0060
+            ))
+        
+        gyms = await search_gyms(db_session, latitude=40.7128, longitude=-74.0060, radius_km=10.0)
+        
+        assert [g.name for g in gyms] == ["Near", "Mid"]
+        assert gyms[0].distance_km == pytest.approx(1.0, abs=0.05)
+        assert gyms[1].distance_km == pytest.approx(5.0, abs=0.05)
+    
+    @pytest.mark.asyncio
+    async def test_radius_edge_not_dropped_by_prefilter(self, db_session):
+        """A gym just inside the radius due north must survive the bounding box."""
+        import math
+        from app.core.geo import EARTH_RADIUS_KM
+        from app.crud.gym import create_gym, search_gyms
+        from app.schemas.gym import GymCreate
+        
+        km_per_degree = math.pi * EARTH_RADIUS_KM / 180
+        await create_gym(db_session, GymCreate(
+            name="Edge", address="Edge St", latitude=40.7128 + 9.995 / km_per_degree, longitude=-74.0060
+        ))
+        
+        gyms = await search_gyms(db_session, latitude=40.7128, longitude=-74.0060, radius_km=10.0)
+        
+        assert [g.name for g in gyms] == ["Edge"]
+    
+    @pytest.mark.asyncio
+    async def test_search_across_antimeridian(self, db_session):
+        """Gyms just across ±180° are found and ordered by their real distance."""
+        from app.crud.gym import create_gym, search_gyms
+        from app.schemas.gym import GymCreate
+        
+        for name, longitude in (("East", -179.995), ("West", 179.97), ("Far", -179.9)):
+            await create_gym(db_session, GymCreate(
+                name=name, address=f"{name} St", latitude=0.0, longitude=longitude
+            ))
+        
+        gyms = await search_gyms(db_session, latitude=0.0, longitude=179.99, radius_km=5.0)
+        nearest = await search_gyms(db_session, latitude=0.0, longitude=179.99, radius_km=5.0, limit=1)
+        
+        assert [g.name for g in gyms] == ["East", "West"]
+        assert gyms[0].distance_km == pytest.approx(1.668, abs=0.01)
+        assert [g.name for g in nearest] == ["East"]
+    
+    @pytest.mark.asyncio
+    async def test_create_gym_sets_geohash(self, db_session):
+        """New gyms should be indexed by geohash."""
+        from app.crud.gym import create_gym
+        from app.core.geo import encode_geohash
+        from app.schemas.gym import GymCreate
+        
+        gym = await create_gym(db_session, GymCreate(
+            name="Iron Paradise", address="123 Fitness St", latitude=40.7128, longitude=-74.0060
+        ))
+        
+        assert gym.geohash == encode_geohash(40.7128, -74.0060)
+
+
+class TestGymTextSearch:
+    """Test relevance-ranked gym name/address search."""
+    
+    def test_ngram_index_ranks_prefix_matches_first(self):
+        """Prefix matches should outrank substring and address matches."""
+        from app.services.gym_search import NgramIndex
+        
+        index = NgramIndex()
+        index.add("1", "Planet Iron", "1 Main St")
+        index.add("2", "Iron Paradise", "2 Main St")
+        index.add("3", "Golds Gym", "3 Iron Works Rd")
+        index.add("4", "Crunch Fitness", "4 Elm St")
+        
+        ranked = [gym_id for gym_id, _ in index.search("iron")]
+        
+        assert ranked == ["2", "1", "3"]
+    
+    def test_ngram_index_fuzzy_match(self):
+        """Small typos should still match by trigram similarity."""
+        from app.services.gym_search import NgramIndex
+        
+        index = NgramIndex()
+        index.add("1", "Iron Paradise", "1 Main St")
+        
+        assert [gym_id for gym_id, _ in index.search("paradse")] == ["1"]
+    
+    def test_ngram_index_remove(self):
+        """Removed gyms should no longer match."""
+        from app.services.gym_search import NgramIndex
+        
+        index = NgramIndex()
+        index.add("1", "Iron Paradise", "1 Main St")
+        index.remove("1")
+        
+        assert index.search("iron") == []
+    
+    def test_trigram_backend_uses_pg_trgm_operators(self):
+        """The PostgreSQL backend should emit index-friendly trigram predicates."""
+        import asyncio
+        from sqlalchemy import select
+        from sqlalchemy.dialects import postgresql
+        from app.models.gym import Gym
+        from app.services.gym_search import TrigramSearchBackend
+        
+        stmt = asyncio.run(TrigramSearchBackend().apply(None, select(Gym.id), "iron"))
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        
+        assert "%>" in sql
+        assert "word_similarity" in sql
+    
+    @pytest.mark.asyncio
+    async def test_search_gyms_by_name_and_address(self, db_session):
+        """search_gyms should rank name matches and include address matches."""
+        from app.crud.gym import create_gym, search_gyms
+        from app.schemas.gym import GymCreate
+        from app.services.gym_search import get_search_backend
+        
+        for name, address in (
+            ("Planet Fitness", "9 Iron Ave"),
+            ("Iron Paradise", "123 Fitness St"),
+            ("Crunch", "4 Elm St"),
+        ):
+            await create_gym(db_session, GymCreate(
+                name=name, address=address, latitude=40.7128, longitude=-74.0060
+            ))
+        
+        gyms = await search_gyms(db_session, query="iron")
+        assert [g.name for g in gyms] == ["Iron Paradise", "Planet Fitness"]
+        
+        # Gyms created after the index was built are searchable once committed
+        await create_gym(db_session, GymCreate(
+            name="Ironworks Gym", address="5 Oak St", latitude=40.7128, longitude=-74.0060
+        ))
+        await db_session.commit()
+        gyms = await search_gyms(db_session, query="ironw")
+        assert gyms[0].name == "Ironworks Gym"
+        
+        # ... and a rolled-back create never reaches the index
+        await create_gym(db_session, GymCreate(
+            name="Ironclad Phantom", address="6 Oak St", latitude=40.7128, longitude=-74.0060
+        ))
+        await db_session.rollback()
+        assert get_search_backend(db_session).index.search("ironclad phantom") == []
+
+
+class TestGymBrowsePagination:
+    """Test cursor pagination of GET /api/v1/gyms without a search."""
+    
+    @pytest.mark.asyncio
+    async def test_browse_pages_with_next_cursor(self, async_client, db_session):
+        """Browsing should page by creation time and hand out X-Next-Cursor."""
+        from app.main import app
+        from app.db.session import get_db, get_read_db
+        from app.crud.gym import create_gym
+        from app.schemas.gym import GymCreate
+        
+        for i in range(5):
+            await create_gym(db_session, GymCreate(
+                name=f"Gym {i}", address=f"{i} Main St", latitude=40.7, longitude=-74.0
+            ))
+        
+        async def override_get_db():
+            yield db_session
+        
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        try:
+            names, cursor = [], None
+            while True:
+                params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+                response = await async_client.get("/api/v1/gyms", params=params)
+                assert response.status_code == 200
+                names.extend(g["name"] for g in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    break
+            
+            bad = await async_client.get("/api/v1/gyms", params={"cursor": "garbage"})
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_read_db, None)
+        
+        assert sorted(names) == [f"Gym {i}" for i in range(5)]
+        assert len(names) == 5
+        assert bad.status_code == 400
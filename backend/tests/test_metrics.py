@@ -0,0 +1,127 @@
+"""
+Tests for request metrics and the /metrics endpoint.
+"""
+import pytest
+
+from app.models.session import SessionVisibility
+
+
+class TestHistogram:
+    """Test the Prometheus histogram primitive."""
+
+    def test_render_is_cumulative(self):
+        from app.core.metrics import Histogram
+
+        histogram = Histogram("test_seconds", "Test.", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(("/a",), value)
+
+        lines = histogram.render()
+        assert lines[:2] == ["# HELP gymbuddy_test_seconds Test.", "# TYPE gymbuddy_test_seconds histogram"]
+        assert 'gymbuddy_test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'gymbuddy_test_seconds_bucket{route="/a",le="1.0"} 3' in lines
+        assert 'gymbuddy_test_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'gymbuddy_test_seconds_sum{route="/a"} 4.05' in lines
+        assert 'gymbuddy_test_seconds_count{route="/a"} 4' in lines
+
+    def test_label_values_escaped(self):
+        from app.core.metrics import Histogram
+
+        histogram = Histogram("test_seconds", "Test.", ("route",), (1.0,))
+        histogram.observe(('say "hi"\n',), 0.5)
+        assert 'gymbuddy_test_seconds_count{route="say \\"hi\\"\\n"} 1' in histogram.render()
+
+
+class TestRequestMetrics:
+    """Test per-route latency and query attribution."""
+
+    @pytest.mark.asyncio
+    async def test_queries_attributed_to_route(self, async_client, db_engine, db_session):
+        """A request's statements should be counted under its route template, nothing else's."""
+        from sqlalchemy import event
+        from app.main import app
+        from app.core.metrics import request_latency, request_queries
+        from app.core.security import get_current_user
+        from app.db.session import get_read_db
+        from app.models.user import User
+        from tests.factories import create_session_at, seed_users
+
+        (creator,), gym_id = await seed_users(db_session, user_count=1)
+        session = await create_session_at(db_session, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        user = await db_session.get(User, creator)
+
+        async def override_get_read_db():
+            yield db_session
+
+        statements = []
+
+        def listener(*args):
+            statements.append(args[2])
+
+        route = ("GET", "/api/v1/sessions/{session_id}")
+        queries_before = request_queries.count(route)
+        latency_before = request_latency.count((*route, "200"))
+
+        app.dependency_overrides[get_read_db] = override_get_read_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        event.listen(db_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            response = await async_client.get(f"/api/v1/sessions/{session.id}")
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", listener)
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert request_queries.count(route) == queries_before + 1
+        assert request_latency.count((*route, "200")) == latency_before + 1
+        counts, totals = request_queries._series[route]
+        assert totals[0] >= len(statements) == 3
+
+    @pytest.mark.asyncio
+    async def test_unmatched_paths_share_a_label(self, async_client):
+        from app.core.metrics import request_latency
+
+        before = request_latency.count(("GET", "unmatched", "404"))
+        for path in ("/nope/1", "/nope/2"):
+            assert (await async_client.get(path)).status_code == 404
+        assert request_latency.count(("GET", "unmatched", "404")) == before + 2
+
+    @pytest.mark.asyncio
+    async def test_queries_outside_requests_not_counted(self, db_session):
+        from sqlalchemy import text
+        from app.core.metrics import RequestQueries, current_queries
+
+        await db_session.execute(text("SELECT 1"))
+        assert current_queries.get() is None
+
+        queries = RequestQueries()
+        token = current_queries.set(queries)
+        try:
+            await db_session.execute(text("SELECT 1"))
+            await db_session.execute(text("SELECT 2"))
+        finally:
+            current_queries.reset(token)
+        assert queries.count == 2
+        assert queries.seconds > 0
+
+
+class TestMetricsEndpoint:
+    """Test GET /metrics."""
+
+    @pytest.mark.asyncio
+    async def test_scrape_format(self, async_client):
+        from app.services.push import push_stats
+
+        await async_client.get("/health")
+        push_stats.messages_failed += 1
+        response = await async_client.get("/metrics")
+        push_stats.messages_failed -= 1
+
+        body = response.text
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'gymbuddy_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+        assert '# TYPE gymbuddy_db_pool_connections gauge' in body
+        assert 'gymbuddy_db_pool_connections{database="primary",state="checkedout"}' in body
+        assert '# TYPE gymbuddy_push_messages_failed_total counter' in body
+        assert body.endswith("\n")
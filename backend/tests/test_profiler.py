@@ -0,0 +1,132 @@
+"""
+Tests for the per-request sampling profiler.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.models.session import SessionVisibility
+
+
+async def _slow_app(scope, receive, send):
+    """Awaits for a while, then burns CPU, so both kinds of sample appear."""
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    while time.perf_counter() - started < 0.05:
+        pass
+    await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"done"})
+
+
+class TestTaskSampler:
+    """Test sampling a task's stack."""
+
+    @pytest.mark.asyncio
+    async def test_samples_awaits_and_running_code(self):
+        from app.core.profiler import TaskSampler
+
+        sampler = TaskSampler(asyncio.current_task(), 0.002)
+        sampler.start()
+        await _slow_app({}, None, lambda message: asyncio.sleep(0))
+        sampler.stop()
+
+        stacks = list(sampler.stacks)
+        assert sampler.samples == sum(sampler.stacks.values()) > 0
+        assert all(stack[0].startswith("test_samples_awaits_and_running_code (tests/test_profiler.py:") for stack in stacks)
+        # Suspended in asyncio.sleep: the await chain down to the future
+        assert any(s[1].startswith("_slow_app") and s[-1].startswith("<await") for s in stacks)
+        # Running: the frame executing on the thread at the time
+        assert any(s[-1].startswith("_slow_app (tests/test_profiler.py:") for s in stacks)
+
+    def test_collapsed_format(self):
+        from app.core.profiler import TaskSampler
+
+        sampler = TaskSampler(None, 0.001)
+        sampler.stacks[("main (a.py:1)", "leaf (b.py:2)")] += 3
+        sampler.stacks[("main (a.py:1)",)] += 1
+        assert sampler.collapsed() == "main (a.py:1);leaf (b.py:2) 3\nmain (a.py:1) 1\n"
+
+
+class TestProfilerMiddleware:
+    """Test the X-Profile request flag."""
+
+    async def _get(self, asgi_app, headers=None, path="/slow"):
+        from httpx import AsyncClient, ASGITransport
+
+        async with AsyncClient(transport=ASGITransport(app=asgi_app), base_url="http://test") as client:
+            return await client.get(path, headers=headers or {})
+
+    @pytest.mark.asyncio
+    async def test_unflagged_and_wrong_token_untouched(self):
+        from app.core.profiler import ProfilerMiddleware
+
+        profiled = ProfilerMiddleware(_slow_app, token="s3cret", interval=0.002)
+        for headers in ({}, {"X-Profile": "guess"}):
+            response = await self._get(profiled, headers)
+            assert response.status_code == 201
+            assert response.text == "done"
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_token(self):
+        from app.core.profiler import ProfilerMiddleware
+
+        response = await self._get(ProfilerMiddleware(_slow_app, token=""), {"X-Profile": ""})
+        assert response.text == "done"
+
+    @pytest.mark.asyncio
+    async def test_profile_returned_in_place_of_body(self):
+        from app.core.profiler import ProfilerMiddleware
+
+        profiled = ProfilerMiddleware(_slow_app, token="s3cret", interval=0.002)
+        response = await self._get(profiled, {"X-Profile": "s3cret"})
+
+        assert response.status_code == 200
+        assert response.headers["x-profiled-status"] == "201"
+        stacks = dict(line.rsplit(" ", 1) for line in response.text.splitlines())
+        assert stacks
+        assert all(int(count) > 0 for count in stacks.values())
+        assert any("_slow_app (tests/test_profiler.py:" in stack for stack in stacks)
+
+    @pytest.mark.asyncio
+    async def test_profile_written_to_directory(self, tmp_path):
+        from app.core.profiler import ProfilerMiddleware
+
+        profiled = ProfilerMiddleware(_slow_app, token="s3cret", interval=0.002, directory=str(tmp_path / "profiles"))
+        response = await self._get(profiled, {"X-Profile": "s3cret"})
+
+        assert response.status_code == 201
+        assert response.text == "done"
+        filename = response.headers["x-profile-file"]
+        assert filename.endswith("-GET-unmatched-" + filename.rsplit("-", 1)[1])
+        assert "_slow_app" in (tmp_path / "profiles" / filename).read_text()
+
+    @pytest.mark.asyncio
+    async def test_database_wait_is_sampled(self, db_session, tmp_path):
+        """A request's profile includes the endpoint's frames while it waits on the database."""
+        from app.main import app
+        from app.core.profiler import ProfilerMiddleware
+        from app.core.security import get_current_user
+        from app.db.session import get_read_db
+        from app.models.user import User
+        from tests.factories import create_session_at, seed_users
+
+        (creator,), gym_id = await seed_users(db_session, user_count=1)
+        session = await create_session_at(db_session, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        user = await db_session.get(User, creator)
+
+        async def override_get_read_db():
+            yield db_session
+
+        app.dependency_overrides[get_read_db] = override_get_read_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        profiled = ProfilerMiddleware(app, token="s3cret", interval=0.0005, directory=str(tmp_path))
+        try:
+            response = await self._get(profiled, {"X-Profile": "s3cret"}, f"/api/v1/sessions/{session.id}")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert "-GET-api_v1_sessions_session_id-" in response.headers["x-profile-file"]
+        collapsed = (tmp_path / response.headers["x-profile-file"]).read_text()
+        assert "get_session (app/api/v1/sessions.py:" in collapsed
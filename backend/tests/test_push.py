@@ -0,0 +1,375 @@
+"""
+Tests for the Expo push transport and push service.
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services.push import PushMessage, send_push_notification, send_push_to_tokens
+from tests.fake_expo import FakeExpo
+
+
+def _payload(count: int, prefix: str = "token"):
+    return [{"to": f"{prefix}-{i}", "title": "t", "body": "b"} for i in range(count)]
+
+
+class TestPushTransport:
+    """Test chunking, concurrency and compression of push sends."""
+
+    @pytest.mark.asyncio
+    async def test_sends_in_expo_sized_chunks(self, push_transport, fake_expo):
+        """250 messages should go out as requests of at most 100, tickets in order."""
+        chunks = await push_transport.send(_payload(250))
+
+        assert sorted(fake_expo.batch_sizes) == [50, 100, 100]
+        assert [(c.start, c.end, c.error) for c in chunks] == [(0, 100, None), (100, 200, None), (200, 250, None)]
+        assert [t["id"] for c in chunks for t in c.data] == [f"ticket-token-{i}" for i in range(250)]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """No more than `concurrency` chunks should be in flight at once."""
+        from httpx import ASGITransport
+        from app.services.push_transport import PushTransport
+
+        fake = FakeExpo(latency_seconds=0.01)
+        transport = PushTransport(http2=False, concurrency=2, transport=ASGITransport(app=fake))
+        try:
+            await transport.send(_payload(1000))
+        finally:
+            await transport.close()
+
+        assert fake.messages == 1000
+        assert fake.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_large_bodies_are_gzipped(self, push_transport, fake_expo):
+        """Bodies past the threshold are compressed; tiny ones are sent as-is."""
+        await push_transport.send(_payload(1))
+        await push_transport.send(_payload(100))
+
+        assert fake_expo.encodings == [None, "gzip"]
+
+    @pytest.mark.asyncio
+    async def test_receipts_fetched_in_chunks(self, push_transport, fake_expo):
+        """Receipt lookups are split at Expo's 1000-ID limit and merged."""
+        ids = [f"ticket-token-{i}" for i in range(2500)]
+
+        receipts = await push_transport.get_receipts(ids)
+
+        assert sorted(fake_expo.receipt_requests) == [500, 1000, 1000]
+        assert set(receipts) == set(ids)
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused_across_sends(self, push_transport):
+        """Sends share the app-lifetime client rather than opening a new one."""
+        client = push_transport._client
+
+        await push_transport.send(_payload(3))
+        await push_transport.send(_payload(3))
+
+        assert push_transport._client is client
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_keeps_other_tickets(self, push_transport, fake_expo):
+        """A rejected chunk is reported without losing the tickets of the chunks Expo accepted."""
+        messages = [PushMessage(to=f"token-{i}", title="t", body="b") for i in range(250)]
+        fake_expo.failing_tokens = {"token-150"}
+
+        with patch("app.services.push.push_transport", push_transport):
+            result = await send_push_notification(messages)
+
+        assert "error" in result
+        tickets = result["data"]
+        assert tickets[100:200] == [None] * 100
+        assert [t["id"] for t in tickets[:100] + tickets[200:]] == [
+            f"ticket-token-{i}" for i in list(range(100)) + list(range(200, 250))
+        ]
+
+    def test_max_send_seconds_counts_waves(self):
+        from app.services.push_transport import PushTransport
+
+        transport = PushTransport(concurrency=6, timeout_seconds=30)
+        assert transport.max_send_seconds(0) == 0
+        assert transport.max_send_seconds(600) == 30
+        assert transport.max_send_seconds(601) == 60
+
+
+async def _seed_user(db, tokens=("ExponentPushToken[a]",)):
+    """A committed user with an active push token for each of tokens."""
+    from datetime import datetime
+    from uuid import uuid4
+    from app.models.user import User
+    from app.models.notification import NotificationToken
+
+    user = User(id=str(uuid4()), email=f"{uuid4()}@example.com", name="Addressee")
+    db.add(user)
+    db.add_all([
+        NotificationToken(
+            id=str(uuid4()), user_id=user.id, token=token, is_active=True,
+            created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+        )
+        for token in tokens
+    ])
+    await db.commit()
+    return user.id
+
+
+class TestPushService:
+    """Test push service helpers on top of the transport."""
+
+    @pytest.mark.asyncio
+    async def test_unregistered_tokens_deactivated(self, push_transport, fake_expo, db_session):
+        """Rejected tokens are deactivated; accepted tickets are kept for receipts."""
+        from sqlalchemy import select
+        from app.crud.notification import get_token_by_value
+        from app.models.notification import PushTicket
+
+        await _seed_user(db_session, tokens=("token-0", "token-1", "token-2"))
+        fake_expo.dead_tokens = {"token-1"}
+
+        with patch("app.services.push.push_transport", push_transport):
+            sent = await send_push_to_tokens(db_session, ["token-0", "token-1", "token-2"], "t", "b")
+
+        tickets = (await db_session.execute(select(PushTicket.token))).scalars().all()
+        assert sent is True
+        assert (await get_token_by_value(db_session, "token-1")).is_active is False
+        assert sorted(tickets) == ["token-0", "token-2"]
+
+    def test_only_unregistered_devices_are_invalid(self):
+        """InvalidCredentials is our misconfiguration, not a dead token."""
+        from app.services.push import invalid_tokens
+
+        tickets = [
+            {"status": "error", "details": {"error": "DeviceNotRegistered"}},
+            {"status": "error", "details": {"error": "InvalidCredentials"}},
+            {"status": "ok", "id": "ticket-2"},
+        ]
+        assert invalid_tokens(["token-0", "token-1", "token-2"], tickets) == ["token-0"]
+
+
+class TestNotificationOutbox:
+    """Test queueing and background dispatch of push notifications."""
+
+    def _dispatcher(self, db_engine, **kwargs):
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+        from app.services.notification_dispatcher import NotificationDispatcher
+
+        factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+        return NotificationDispatcher(factory, **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_enqueue_is_idempotent(self, db_session):
+        """Queueing the same friend request twice leaves one row."""
+        from sqlalchemy import select, func
+        from app.models.notification import NotificationOutbox
+        from app.services.push import queue_friend_request_notification
+
+        user_id = await _seed_user(db_session)
+        for _ in range(2):
+            await queue_friend_request_notification(db_session, user_id, "Sam", "friendship-1")
+
+        count = await db_session.scalar(select(func.count()).select_from(NotificationOutbox))
+        assert count == 1
+
+    @pytest.mark.asyncio
+    async def test_dispatch_sends_batch_and_marks_sent(self, db_engine, db_session, push_transport, fake_expo):
+        """Due rows go out in one push; dead tokens are deactivated."""
+        from app.crud.outbox import get_outbox_entry
+        from app.crud.notification import get_token_by_value
+        from app.models.notification import OutboxStatus
+        from app.services.push import queue_session_invite_notifications
+
+        alive = await _seed_user(db_session, tokens=("ExponentPushToken[a]", "ExponentPushToken[b]"))
+        gone = await _seed_user(db_session, tokens=("ExponentPushToken[dead]",))
+        fake_expo.dead_tokens = {"ExponentPushToken[dead]"}
+        await queue_session_invite_notifications(
+            db_session, {alive: "invite-alive", gone: "invite-gone"}, "Sam", "Leg day", "session-1"
+        )
+        await db_session.commit()
+
+        with patch("app.services.push.push_transport", push_transport):
+            claimed = await self._dispatcher(db_engine).run_once()
+
+        db_session.expire_all()
+        entry = await get_outbox_entry(db_session, "session_invite:session-1:invite-alive")
+        dead = await get_token_by_value(db_session, "ExponentPushToken[dead]")
+        assert claimed == 2
+        assert fake_expo.batch_sizes == [3]
+        assert entry.status == OutboxStatus.SENT
+        assert dead.is_active is False
+
+    @pytest.mark.asyncio
+    async def test_failed_send_backs_off_then_gives_up(self, db_engine, db_session):
+        """A failing send is retried with growing delays until max_attempts."""
+        from datetime import datetime, timedelta
+        from app.crud.outbox import get_outbox_entry
+        from app.models.notification import OutboxStatus
+        from app.services.push import queue_friend_request_notification
+
+        user_id = await _seed_user(db_session)
+        await queue_friend_request_notification(db_session, user_id, "Sam", "friendship-1")
+        await db_session.commit()
+        dispatcher = self._dispatcher(db_engine, max_attempts=2, backoff_base_seconds=30)
+
+        failing = AsyncMock(return_value={"error": "Expo unavailable"})
+        with patch("app.services.notification_dispatcher.send_push_notification", failing):
+            await dispatcher.run_once()
+            db_session.expire_all()
+            entry = await get_outbox_entry(db_session, "friend_request:friendship-1")
+            assert entry.status == OutboxStatus.PENDING
+            assert entry.attempts == 1
+            assert entry.next_attempt_at > datetime.utcnow() + timedelta(seconds=25)
+
+            # Not due yet: nothing is claimed
+            assert await dispatcher.run_once() == 0
+
+            entry.next_attempt_at = datetime.utcnow()
+            await db_session.commit()
+            await dispatcher.run_once()
+
+        db_session.expire_all()
+        entry = await get_outbox_entry(db_session, "friend_request:friendship-1")
+        assert entry.status == OutboxStatus.FAILED
+        assert entry.last_error == "Expo unavailable"
+        assert failing.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_partial_failure_retries_only_missed_devices(self, db_engine, db_session, push_transport, fake_expo):
+        """Devices whose chunk Expo accepted aren't pushed again when the row is retried."""
+        from datetime import datetime
+        from sqlalchemy import select
+        from app.crud.outbox import get_outbox_entry
+        from app.models.notification import OutboxStatus, PushTicket
+        from app.services.push import queue_session_invite_notifications
+
+        split = await _seed_user(db_session, tokens=("token-a", "token-b"))
+        whole = await _seed_user(db_session, tokens=("token-c",))
+        fake_expo.failing_tokens = {"token-b"}
+        await queue_session_invite_notifications(
+            db_session, {split: "invite-split", whole: "invite-whole"}, "Sam", "Leg day", "session-1"
+        )
+        await db_session.commit()
+        dispatcher = self._dispatcher(db_engine)
+
+        with patch("app.services.push.push_transport", push_transport), \
+                patch("app.services.push_transport.EXPO_MAX_MESSAGES_PER_REQUEST", 1):
+            await dispatcher.run_once()
+
+            db_session.expire_all()
+            retried = await get_outbox_entry(db_session, "session_invite:session-1:invite-split")
+            sent = await get_outbox_entry(db_session, "session_invite:session-1:invite-whole")
+            assert sent.status == OutboxStatus.SENT
+            assert retried.status == OutboxStatus.PENDING
+            assert retried.last_error
+            assert retried.pending_tokens == ["token-b"]
+
+            fake_expo.failing_tokens = set()
+            fake_expo.batch_sizes.clear()
+            retried.next_attempt_at = datetime.utcnow()
+            await db_session.commit()
+            await dispatcher.run_once()
+
+        db_session.expire_all()
+        retried = await get_outbox_entry(db_session, "session_invite:session-1:invite-split")
+        tickets = (await db_session.execute(select(PushTicket.token))).scalars().all()
+        assert fake_expo.batch_sizes == [1]
+        assert retried.status == OutboxStatus.SENT
+        assert sorted(tickets) == ["token-a", "token-b", "token-c"]
+
+    @pytest.mark.asyncio
+    async def test_missing_ticket_is_retried(self, db_engine, db_session):
+        """A message Expo returned no ticket for is retried rather than crashing the pass."""
+        from app.crud.outbox import get_outbox_entry
+        from app.models.notification import OutboxStatus
+        from app.services.push import queue_friend_request_notification
+
+        user_id = await _seed_user(db_session)
+        await queue_friend_request_notification(db_session, user_id, "Sam", "friendship-1")
+        await db_session.commit()
+
+        short = AsyncMock(return_value={"data": []})
+        with patch("app.services.notification_dispatcher.send_push_notification", short):
+            await self._dispatcher(db_engine).run_once()
+
+        db_session.expire_all()
+        entry = await get_outbox_entry(db_session, "friend_request:friendship-1")
+        assert entry.status == OutboxStatus.PENDING
+        assert entry.last_error == "missing ticket"
+
+    @pytest.mark.asyncio
+    async def test_lease_covers_slow_batches(self, db_engine, db_session):
+        """A batch that could outlast the lease has it extended before sending."""
+        from datetime import datetime, timedelta
+        from app.crud.outbox import get_outbox_entry
+        from app.services.push import queue_friend_request_notification
+        from app.services.push_transport import push_transport
+
+        user_id = await _seed_user(db_session)
+        await queue_friend_request_notification(db_session, user_id, "Sam", "friendship-1")
+        await db_session.commit()
+        lease_seconds = push_transport.max_send_seconds(1)
+
+        sending = AsyncMock(return_value={"data": [{"status": "ok", "id": "ticket-a"}]})
+        with patch("app.services.notification_dispatcher.send_push_notification", sending):
+            await self._dispatcher(db_engine, lease_seconds=lease_seconds).run_once()
+
+        db_session.expire_all()
+        entry = await get_outbox_entry(db_session, "friend_request:friendship-1")
+        assert entry.next_attempt_at > datetime.utcnow() + timedelta(seconds=lease_seconds)
+
+    def test_retry_delay_is_exponential_and_capped(self):
+        from app.crud.outbox import retry_delay
+
+        assert [retry_delay(n, 2, 10) for n in range(1, 6)] == [2, 4, 8, 10, 10]
+
+
+class TestReceiptPoller:
+    """Test receipt polling and dead-token pruning."""
+
+    @pytest.mark.asyncio
+    async def test_unregistered_receipts_prune_tokens_in_one_update(
+        self, db_engine, db_session, push_transport, fake_expo
+    ):
+        """Dead tokens from receipts are deactivated together and their tickets dropped."""
+        from datetime import datetime, timedelta
+        from sqlalchemy import event, select
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+        from app.crud.notification import get_token_by_value, record_push_tickets
+        from app.models.notification import PushTicket
+        from app.services.push import push_stats
+        from app.services.receipt_poller import ReceiptPoller
+
+        tokens = [f"token-{i}" for i in range(5)]
+        await _seed_user(db_session, tokens=tokens)
+        await record_push_tickets(db_session, [(f"ticket-{token}", token) for token in tokens])
+        # One ticket is too recent for its receipt to be ready
+        await record_push_tickets(db_session, [("ticket-fresh", "token-0")])
+        for ticket in (await db_session.execute(select(PushTicket))).scalars():
+            if ticket.id != "ticket-fresh":
+                ticket.created_at = datetime.utcnow() - timedelta(minutes=30)
+        await db_session.commit()
+        fake_expo.unregistered_tokens = {"token-1", "token-3"}
+        pruned_before = push_stats.tokens_pruned_on_receipt
+
+        factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+        poller = ReceiptPoller(factory, receipt_delay_seconds=900)
+        updates = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE notification_tokens"):
+                updates.append(statement)
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            with patch("app.services.receipt_poller.push_transport", push_transport):
+                settled = await poller.run_once()
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", capture)
+
+        db_session.expire_all()
+        remaining = (await db_session.execute(select(PushTicket.id))).scalars().all()
+        active = {token: (await get_token_by_value(db_session, token)).is_active for token in tokens}
+        assert settled == 5
+        assert len(updates) == 1
+        assert remaining == ["ticket-fresh"]
+        assert [token for token, is_active in active.items() if not is_active] == ["token-1", "token-3"]
+        assert push_stats.tokens_pruned_on_receipt - pruned_before == 2
@@ -0,0 +1,132 @@
+"""
+Tests for the per-request query audit (N+1, slow statements, budgets).
+"""
+import pytest
+
+from app.models.session import SessionVisibility
+
+
+class TestQueryAudit:
+    """Test statement recording and N+1 detection."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_statement_flagged_with_origin(self, db_session):
+        """One SELECT per id is an N+1, reported at the line that issued it."""
+        from sqlalchemy import select
+        from app.core.query_audit import QueryAudit, current_audit, instrument_queries
+        from app.models.user import User
+
+        instrument_queries()
+        audit = QueryAudit({"type": "http", "method": "GET"})
+        token = current_audit.set(audit)
+        try:
+            for i in range(4):
+                await db_session.execute(select(User).where(User.id == f"user-{i}"))
+            await db_session.execute(select(User.id))
+        finally:
+            current_audit.reset(token)
+
+        repeated = audit.repeated(threshold=3)
+        assert audit.count == 5
+        assert len(repeated) == 1
+        (stats,) = repeated.values()
+        assert stats.count == 4
+        assert len(stats.parameter_sets) == 4
+        assert stats.origin.startswith("tests/test_query_audit.py:")
+        assert stats.origin.endswith("in test_repeated_statement_flagged_with_origin")
+        report = audit.report(repeat_threshold=3)
+        assert report.startswith("GET unmatched: 5 statements")
+        assert "N+1: 4x (4 parameter sets)" in report
+
+    @pytest.mark.asyncio
+    async def test_identical_parameters_not_an_n_plus_one(self, db_session):
+        from sqlalchemy import text
+        from app.core.query_audit import QueryAudit, current_audit, instrument_queries
+
+        instrument_queries()
+        audit = QueryAudit({"type": "http", "method": "GET"})
+        token = current_audit.set(audit)
+        try:
+            for _ in range(5):
+                await db_session.execute(text("SELECT 1"))
+        finally:
+            current_audit.reset(token)
+
+        assert audit.count == 5
+        assert audit.repeated(threshold=3) == {}
+        assert audit.slow(seconds=0)
+
+    def test_parse_budgets(self):
+        from app.core.query_audit import parse_budgets
+
+        assert parse_budgets("") == {}
+        assert parse_budgets("get /api/v1/friends=2, POST /api/v1/sessions/{session_id}/invite=6") == {
+            "GET /api/v1/friends": 2,
+            "POST /api/v1/sessions/{session_id}/invite": 6,
+        }
+        with pytest.raises(ValueError):
+            parse_budgets("/api/v1/friends=2")
+        with pytest.raises(ValueError):
+            parse_budgets("GET /api/v1/friends=many")
+
+
+class TestQueryAuditMiddleware:
+    """Test route budgets on real requests."""
+
+    async def _get_session(self, db_session, asgi_app):
+        from httpx import AsyncClient, ASGITransport
+        from app.main import app
+        from app.core.security import get_current_user
+        from app.db.session import get_read_db
+        from app.models.user import User
+        from tests.factories import create_session_at, seed_users
+
+        (creator,), gym_id = await seed_users(db_session, user_count=1)
+        session = await create_session_at(db_session, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        user = await db_session.get(User, creator)
+
+        async def override_get_read_db():
+            yield db_session
+
+        app.dependency_overrides[get_read_db] = override_get_read_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            async with AsyncClient(transport=ASGITransport(app=asgi_app), base_url="http://test") as client:
+                return await client.get(f"/api/v1/sessions/{session.id}")
+        finally:
+            app.dependency_overrides.clear()
+
+    @pytest.mark.asyncio
+    async def test_over_budget_logged(self, db_session, caplog):
+        from app.main import app
+        from app.core.query_audit import QueryAuditMiddleware
+
+        audited = QueryAuditMiddleware(app, budget=10, route_budgets={"GET /api/v1/sessions/{session_id}": 2})
+        with caplog.at_level("WARNING", logger="app.core.query_audit"):
+            response = await self._get_session(db_session, audited)
+
+        assert response.status_code == 200
+        (record,) = caplog.records
+        assert "GET /api/v1/sessions/{session_id}: 3 statements" in record.message
+        assert "(budget 2)" in record.message
+        assert "top: 1x" in record.message
+
+    @pytest.mark.asyncio
+    async def test_within_budget_not_logged(self, db_session, caplog):
+        from app.main import app
+        from app.core.query_audit import QueryAuditMiddleware
+
+        with caplog.at_level("WARNING", logger="app.core.query_audit"):
+            response = await self._get_session(db_session, QueryAuditMiddleware(app, budget=3, enforce=True))
+
+        assert response.status_code == 200
+        assert caplog.records == []
+
+    @pytest.mark.asyncio
+    async def test_enforced_budget_fails_request(self, db_session):
+        """The statement that would go over budget raises instead of running."""
+        from app.main import app
+        from app.core.query_audit import QueryAuditMiddleware, QueryBudgetExceeded
+
+        with pytest.raises(QueryBudgetExceeded, match=r"GET /api/v1/sessions/\{session_id\} sent more than 2"):
+            await self._get_session(db_session, QueryAuditMiddleware(app, budget=2, enforce=True))
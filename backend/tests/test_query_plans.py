@@ -0,0 +1,124 @@
+"""
+Query plan regression tests.
+Runs the hot-path queries against SQLite and fails if any of them reads a
+table without an index (a bare `SCAN <table>` in EXPLAIN QUERY PLAN).
+"""
+import pytest
+from contextlib import contextmanager
+from datetime import datetime
+from uuid import uuid4
+from sqlalchemy import event
+
+from app.db.session import Base
+from app.models.session import SessionVisibility
+from app.models.social import FriendshipStatus
+
+
+@contextmanager
+def _capture_sql(engine):
+    """Collect (statement, parameters) for everything the engine executes."""
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            statements.append((statement, parameters))
+    
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def _explain(db, statements):
+    """EXPLAIN QUERY PLAN each captured statement; map SQL to its plan lines."""
+    conn = await db.connection()
+    plans = {}
+    for statement, parameters in statements:
+        result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        plans[statement] = [row[-1] for row in result.all()]
+    return plans
+
+
+def _full_scans(plan):
+    return [
+        line for line in plan
+        if line.startswith("SCAN ") and line.split()[1] in Base.metadata.tables and "USING" not in line
+    ]
+
+
+class TestHotPathQueryPlans:
+    """Hot-path queries must be served by indexes."""
+    
+    async def _seed(self, db):
+        from app.models.user import User
+        from app.models.gym import Gym
+        from app.crud.session import create_session
+        from app.crud.social import create_friend_request
+        from app.schemas.session import SessionCreate
+        
+        users = [User(id=str(uuid4()), email=f"user{i}@example.com", name=f"User {i}") for i in range(3)]
+        gym = Gym(id=str(uuid4()), name="Iron Paradise", address="1 Main St", latitude=40.7, longitude=-74.0)
+        db.add_all(users + [gym])
+        await db.flush()
+        friendship = await create_friend_request(db, users[0].id, users[1].id)
+        session = await create_session(db, users[1].id, SessionCreate(
+            title="Leg Day", gym_id=gym.id, scheduled_at=datetime(2026, 3, 1, 7, 0),
+            visibility=SessionVisibility.PUBLIC
+        ))
+        return [u.id for u in users], friendship, session
+    
+    @pytest.mark.asyncio
+    async def test_no_full_table_scans(self, db_engine, db_session):
+        """Participant, friendship, feed and projection queries should never seq scan."""
+        from app.crud.session import (
+            join_session, check_in, leave_session, get_session_feed, create_session, set_occurrence_override
+        )
+        from app.crud.projections import get_session_summaries, get_session_detail
+        from app.schemas.session import SessionCreate
+        from app.crud.social import (
+            update_friendship_status, get_friends, get_friends_with_users, get_pending_requests
+        )
+        
+        db = db_session
+        (a, b, c), friendship, session = await self._seed(db)
+        series = await create_session(db, b, SessionCreate(
+            title="Weekly Legs", gym_id=session.gym_id, scheduled_at=datetime(2026, 3, 2, 7, 0),
+            visibility=SessionVisibility.FRIENDS, is_recurring=True, recurrence_rule="FREQ=WEEKLY"
+        ))
+        await set_occurrence_override(db, series.id, datetime(2026, 3, 9, 7, 0), is_cancelled=True)
+        
+        with _capture_sql(db_engine) as statements:
+            await update_friendship_status(db, friendship, FriendshipStatus.ACCEPTED)
+            await join_session(db, session.id, c)
+            await join_session(db, session.id, c, invite_message="again")
+            await check_in(db, session.id, c)
+            await leave_session(db, session.id, c)
+            await get_friends(db, a, limit=20)
+            await get_friends_with_users(db, b, limit=20)
+            await get_pending_requests(db, b)
+            await get_session_feed(db, a, limit=20)
+            await get_session_feed(db, c, include_public=False, limit=20)
+            await get_session_summaries(db, a, limit=20)
+            await get_session_summaries(db, a, from_date=datetime(2026, 3, 5), limit=20)
+            await get_session_detail(db, session.id)
+            await update_friendship_status(db, friendship, FriendshipStatus.BLOCKED)
+        
+        plans = await _explain(db, statements)
+        assert any("session_occurrence_overrides" in sql for sql in plans)
+        offenders = {sql: _full_scans(plan) for sql, plan in plans.items() if _full_scans(plan)}
+        assert offenders == {}
+    
+    @pytest.mark.asyncio
+    async def test_public_feed_uses_partial_index(self, db_engine, db_session):
+        """The public half of the feed should read the live-sessions partial index."""
+        from app.crud.session import get_session_feed
+        
+        db = db_session
+        (a, _, _), _, _ = await self._seed(db)
+        
+        with _capture_sql(db_engine) as statements:
+            await get_session_feed(db, a)
+        
+        plans = await _explain(db, statements[:1])
+        assert any("ix_sessions_live_visibility_scheduled" in line for plan in plans.values() for line in plan)
@@ -7,6 +7,7 @@ from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 
 from app.models.session import SessionVisibility, RSVPStatus
+from tests.factories import BASE_TIME, befriend, create_session_at, seed_users
 
 
 class TestSessionModel:
@@ -31,7 +32,7 @@ class TestSessionModel:
     
     def test_rsvp_status_options(self):
         """Verify all RSVP status options."""
-        expected = ["going", "maybe", "not_going", "invited"]
+        expected = ["going", "maybe", "not_going", "invited", "waitlisted"]
         
         for status in RSVPStatus:
             assert status.value in expected
@@ -107,7 +108,7 @@ class TestGetSessions:
     @pytest.mark.asyncio
     async def test_get_session_feed(self, mock_user, mock_session, mock_db):
         """User should see session feed."""
-        with patch("app.api.v1.sessions.get_session_feed") as mock_feed:
+        with patch("app.crud.session.get_session_feed") as mock_feed:
             mock_feed.return_value = [mock_session]
             
             result = await mock_feed(mock_db, mock_user.id)
@@ -120,7 +121,7 @@ class TestGetSessions:
         from_date = datetime.utcnow()
         to_date = datetime.utcnow() + timedelta(days=7)
         
-        with patch("app.api.v1.sessions.get_session_feed") as mock_feed:
+        with patch("app.crud.session.get_session_feed") as mock_feed:
             mock_feed.return_value = []
             
             await mock_feed(
@@ -381,3 +382,968 @@ class TestDeleteSession:
         )
         
         assert response.status_code == 401
+
+
+async def _reference_feed(db, user_id, from_date=None, to_date=None, include_public=True, limit=50):
+    """The feed query as it ran before feed entries: friend IDs, then an OR over sessions."""
+    from sqlalchemy import select, and_, or_
+    from app.models.session import Session
+    from app.models.social import Friendship, FriendshipStatus
+    
+    friendships = (await db.execute(
+        select(Friendship).where(
+            or_(Friendship.requester_id == user_id, Friendship.addressee_id == user_id),
+            Friendship.status == FriendshipStatus.ACCEPTED
+        )
+    )).scalars().all()
+    friend_ids = [
+        f.addressee_id if f.requester_id == user_id else f.requester_id
+        for f in friendships
+    ]
+    conditions = [Session.creator_id == user_id]
+    if friend_ids:
+        conditions.append(and_(
+            Session.creator_id.in_(friend_ids),
+            Session.visibility.in_([SessionVisibility.FRIENDS, SessionVisibility.PUBLIC])
+        ))
+    if include_public:
+        conditions.append(Session.visibility == SessionVisibility.PUBLIC)
+    stmt = select(Session.id).where(or_(*conditions), Session.is_cancelled.is_(False))
+    if from_date:
+        stmt = stmt.where(Session.scheduled_at >= from_date)
+    if to_date:
+        stmt = stmt.where(Session.scheduled_at <= to_date)
+    result = await db.execute(stmt.order_by(Session.scheduled_at).limit(limit))
+    return result.scalars().all()
+
+
+class TestSessionFeed:
+    """Test the precomputed feed against the original visibility query."""
+    
+    async def _assert_matches_reference(self, db, user_ids, **kwargs):
+        from app.crud.session import get_session_feed
+        
+        for user_id in user_ids:
+            for include_public in (True, False):
+                feed = await get_session_feed(db, user_id, include_public=include_public, **kwargs)
+                expected = await _reference_feed(db, user_id, include_public=include_public, **kwargs)
+                assert [s.id for s in feed] == expected
+    
+    @pytest.mark.asyncio
+    async def test_feed_matches_reference_query(self, db_session):
+        """Fan-out on write should yield exactly what the old query returned."""
+        from app.crud.session import update_session
+        from app.crud.social import update_friendship_status
+        from app.models.social import FriendshipStatus
+        from app.schemas.session import SessionUpdate
+        
+        db = db_session
+        (a, b, c, d, e), gym_id = await seed_users(db)
+        await befriend(db, a, b)
+        await befriend(db, d, a)
+        await befriend(db, a, c, accept=False)
+        
+        visibilities = list(SessionVisibility)
+        sessions = []
+        for i, creator in enumerate([a, b, c, d, e] * 4):
+            sessions.append(await create_session_at(db, creator, gym_id, i, visibilities[i % len(visibilities)]))
+        
+        # Reschedule, cancel and change visibility after fan-out
+        await update_session(db, sessions[1], SessionUpdate(scheduled_at=BASE_TIME - timedelta(hours=5)))
+        await update_session(db, sessions[2], SessionUpdate(is_cancelled=True))
+        await update_session(db, sessions[3], SessionUpdate(visibility=SessionVisibility.PRIVATE))
+        await update_session(db, sessions[6], SessionUpdate(visibility=SessionVisibility.FRIENDS))
+        
+        # Friendship changes after sessions already exist
+        await befriend(db, c, e)
+        friendship = await befriend(db, b, d)
+        await update_friendship_status(db, friendship, FriendshipStatus.BLOCKED)
+        
+        await self._assert_matches_reference(db, [a, b, c, d, e])
+        await self._assert_matches_reference(
+            db, [a, b, d],
+            from_date=BASE_TIME + timedelta(hours=3),
+            to_date=BASE_TIME + timedelta(hours=12),
+            limit=4
+        )
+    
+    @pytest.mark.asyncio
+    async def test_group_session_reaches_members(self, db_session):
+        """Group sessions should be fanned out to the group's members."""
+        from uuid import uuid4
+        from sqlalchemy import insert
+        from app.crud.session import get_session_feed
+        from app.models.social import Group, group_members
+        
+        db = db_session
+        (owner, member, outsider), gym_id = await seed_users(db, user_count=3)
+        group = Group(id=str(uuid4()), name="Morning Lifters", owner_id=owner)
+        db.add(group)
+        await db.flush()
+        await db.execute(insert(group_members).values(group_id=group.id, user_id=member))
+        
+        session = await create_session_at(db, owner, gym_id, 1, SessionVisibility.GROUP, group_id=group.id)
+        
+        assert [s.id for s in await get_session_feed(db, member)] == [session.id]
+        assert await get_session_feed(db, outsider) == []
+    
+    @pytest.mark.asyncio
+    async def test_backfill_rebuilds_entries(self, db_session):
+        """Backfill should reproduce the reference feed for sessions written without fan-out."""
+        from sqlalchemy import delete
+        from app.crud.feed import backfill_feed
+        from app.models.feed import FeedEntry
+        
+        db = db_session
+        users, gym_id = await seed_users(db)
+        await befriend(db, users[0], users[1])
+        await befriend(db, users[2], users[0])
+        for i, creator in enumerate(users * 2):
+            await create_session_at(db, creator, gym_id, i, list(SessionVisibility)[i % 4])
+        await db.execute(delete(FeedEntry))
+        
+        assert await backfill_feed(db, batch_size=3) == 10
+        await self._assert_matches_reference(db, users)
+
+
+class TestFeedPagination:
+    """Test cursor pagination of the session feed."""
+    
+    def test_cursor_round_trip(self):
+        """Cursors should decode to the position they were built from."""
+        from app.core.pagination import encode_cursor, decode_cursor
+        
+        position = (datetime(2026, 3, 1, 7, 30), "session-id")
+        assert decode_cursor(encode_cursor(*position)) == position
+    
+    def test_invalid_cursor_rejected(self):
+        """Tampered cursors should be a 400, not a server error."""
+        from fastapi import HTTPException
+        from app.core.pagination import decode_cursor
+        
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor("not-a-cursor")
+        assert exc_info.value.status_code == 400
+    
+    def test_page_size_capped(self):
+        """Page size should default from settings and never exceed the maximum."""
+        from app.core.config import get_settings
+        from app.core.pagination import page_size
+        
+        settings = get_settings()
+        assert page_size(None) == settings.default_page_size
+        assert page_size(10_000) == settings.max_page_size
+    
+    @pytest.mark.asyncio
+    async def test_pages_cover_feed_without_gaps(self, db_session):
+        """Following next cursors should visit every feed session exactly once, in order."""
+        from app.core.pagination import decode_cursor, split_page
+        from app.crud.session import get_session_feed
+        
+        db = db_session
+        (a, b, c), gym_id = await seed_users(db, user_count=3)
+        await befriend(db, a, b)
+        for i in range(7):
+            # Pairs of sessions share a start time, so ties are broken by id
+            for creator, visibility in ((a, SessionVisibility.PRIVATE), (b, SessionVisibility.FRIENDS), (c, SessionVisibility.PUBLIC)):
+                await create_session_at(db, creator, gym_id, i // 2, visibility)
+        
+        expected = [s.id for s in await get_session_feed(db, a, limit=100)]
+        seen, cursor = [], None
+        while True:
+            rows = await get_session_feed(db, a, limit=5, after=decode_cursor(cursor))
+            page, cursor = split_page(rows, 4, "scheduled_at")
+            seen.extend(s.id for s in page)
+            if cursor is None:
+                break
+        
+        assert len(expected) == 21
+        assert seen == expected
+
+
+class TestSessionResponses:
+    """Test that session endpoints render their already-validated models directly."""
+    
+    def test_models_render_like_fastapi(self):
+        """ORJSONResponse output should match FastAPI's own encoding of the models."""
+        import json
+        from types import SimpleNamespace
+        from fastapi.encoders import jsonable_encoder
+        from app.core.responses import ORJSONResponse
+        from app.models.user import TrainingLevel
+        from app.schemas.session import SessionResponse
+        
+        now = datetime(2026, 3, 1, 7, 30, 15, 123456)
+        gym = SimpleNamespace(
+            id="g1", name="Gym ✓", address="1 Main St", latitude=40.7, longitude=-74.0,
+            phone=None, website=None, photo_url=None, is_custom=False, created_at=now, distance_km=None
+        )
+        creator = SimpleNamespace(id="u1", name="Ana", photo_url=None, bio=None, training_level=TrainingLevel.BEGINNER)
+        models = [
+            SessionResponse(
+                id=str(i), title="Leg day", gym=gym, scheduled_at=now, duration_minutes=60,
+                visibility=SessionVisibility.PUBLIC, creator=creator, is_recurring=False,
+                is_cancelled=False, participant_count=i, created_at=now
+            )
+            for i in range(3)
+        ]
+        
+        assert json.loads(ORJSONResponse(models).body) == jsonable_encoder(models)
+        assert json.loads(ORJSONResponse(models[0]).body) == jsonable_encoder(models[0])
+        assert ORJSONResponse([]).body == b"[]"
+    
+    @pytest.mark.asyncio
+    async def test_list_sessions_keeps_cursor_header(self, async_client, db_session):
+        """The returned response should still carry the next-page cursor."""
+        from app.main import app
+        from app.core.pagination import NEXT_CURSOR_HEADER
+        from app.core.security import get_current_user
+        from app.db.session import get_read_db
+        from app.models.user import User
+        
+        (a,), gym_id = await seed_users(db_session, user_count=1)
+        for hours in range(3):
+            await create_session_at(db_session, a, gym_id, hours, SessionVisibility.PUBLIC)
+        user = await db_session.get(User, a)
+        
+        async def override_get_db():
+            yield db_session
+        
+        app.dependency_overrides[get_read_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            response = await async_client.get("/api/v1/sessions", params={"limit": 2})
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert [s["title"] for s in response.json()] == ["Session +0h", "Session +1h"]
+        assert response.json()[0]["creator"]["id"] == a
+        assert NEXT_CURSOR_HEADER in response.headers
+
+
+class TestSessionProjections:
+    """Test the column projections against responses validated from ORM objects."""
+    
+    async def _seed_sessions(self, db):
+        from app.crud.session import join_session, add_exercise_to_session
+        from app.schemas.session import ExerciseCreate
+        
+        (a, b, c), gym_id = await seed_users(db, user_count=3)
+        await befriend(db, a, b)
+        sessions = [
+            await create_session_at(db, creator, gym_id, hours, visibility)
+            for hours, (creator, visibility) in enumerate((
+                (a, SessionVisibility.PRIVATE), (b, SessionVisibility.FRIENDS), (c, SessionVisibility.PUBLIC)
+            ))
+        ]
+        await join_session(db, sessions[2].id, a)
+        await join_session(db, sessions[2].id, b)
+        await add_exercise_to_session(db, sessions[2].id, ExerciseCreate(name="Squat", sets=5, reps="5"))
+        return a, sessions
+    
+    @pytest.mark.asyncio
+    async def test_summaries_match_orm_feed(self, db_engine, db_session):
+        """Feed summaries should equal SessionResponse validated from the ORM feed; no series, two queries."""
+        from sqlalchemy import event
+        from app.core.responses import ORJSONResponse
+        from app.crud.projections import get_session_summaries
+        from app.crud.session import get_session_feed
+        from app.schemas.session import SessionResponse
+        
+        a, _ = await self._seed_sessions(db_session)
+        db_session.expunge_all()
+        expected = [SessionResponse.model_validate(session) for session in await get_session_feed(db_session, a)]
+        
+        statements = []
+        
+        def listener(*args):
+            statements.append(args[2])
+        
+        event.listen(db_engine.sync_engine, "before_cursor_execute", listener)
+        summaries = await get_session_summaries(db_session, a)
+        event.remove(db_engine.sync_engine, "before_cursor_execute", listener)
+        
+        assert len(statements) == 2
+        assert [s.participant_count for s in summaries] == [1, 1, 3]
+        assert ORJSONResponse(summaries).body == ORJSONResponse(expected).body
+    
+    @pytest.mark.asyncio
+    async def test_detail_matches_orm_session(self, db_session):
+        """The projected detail should equal the detail validated from get_session_by_id."""
+        import json
+        from app.core.responses import ORJSONResponse
+        from app.crud.projections import get_session_detail, session_detail_from_orm
+        from app.crud.session import get_session_by_id
+        from app.schemas.session import SessionDetailResponse
+        
+        _, sessions = await self._seed_sessions(db_session)
+        db_session.expunge_all()
+        session = await get_session_by_id(db_session, sessions[2].id)
+        expected = SessionDetailResponse.model_validate(session)
+        
+        def normalized(model):
+            data = json.loads(ORJSONResponse(model).body)
+            data["participants"].sort(key=lambda p: p["id"])
+            return data
+        
+        detail = await get_session_detail(db_session, session.id)
+        assert detail.participant_count == 3
+        assert detail.exercises[0].name == "Squat"
+        assert normalized(detail) == normalized(expected)
+        assert normalized(session_detail_from_orm(session)) == normalized(expected)
+        assert await get_session_detail(db_session, "missing") is None
+
+
+class TestParticipantUniqueness:
+    """Test the unique (session_id, user_id) participant constraint."""
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_participant_rejected(self, db_session):
+        """The database should refuse a second row for the same user and session."""
+        from uuid import uuid4
+        from sqlalchemy.exc import IntegrityError
+        from app.crud.session import is_participant_conflict
+        from app.models.session import SessionParticipant
+        
+        (creator, joiner), gym_id = await seed_users(db_session, user_count=2)
+        session = await create_session_at(db_session, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        
+        db_session.add(SessionParticipant(id=str(uuid4()), session_id=session.id, user_id=creator))
+        with pytest.raises(IntegrityError) as error:
+            await db_session.flush()
+        assert is_participant_conflict(error.value)
+    
+    @pytest.mark.asyncio
+    async def test_join_other_integrity_error_raised(self, db_session):
+        """Only the unique-participant race is retried; other violations can never clear."""
+        from sqlalchemy.exc import IntegrityError
+        from app.crud.session import is_participant_conflict, join_session
+        
+        (creator,), gym_id = await seed_users(db_session, user_count=1)
+        session = await create_session_at(db_session, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        
+        with pytest.raises(IntegrityError) as error:
+            await join_session(db_session, session.id, None)
+        assert not is_participant_conflict(error.value)
+    
+    @pytest.mark.asyncio
+    async def test_join_twice_updates_existing_row(self, db_session):
+        """Joining again should update the RSVP rather than add a participant."""
+        from sqlalchemy import select, func
+        from app.crud.session import join_session
+        from app.models.session import SessionParticipant
+        
+        (creator, joiner), gym_id = await seed_users(db_session, user_count=2)
+        session = await create_session_at(db_session, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        
+        first = await join_session(db_session, session.id, joiner, RSVPStatus.MAYBE)
+        second = await join_session(db_session, session.id, joiner, RSVPStatus.GOING)
+        
+        count = await db_session.scalar(
+            select(func.count()).select_from(SessionParticipant).where(SessionParticipant.user_id == joiner)
+        )
+        assert second.id == first.id
+        assert second.rsvp_status == RSVPStatus.GOING
+        assert count == 1
+
+
+async def _assert_counts_match(db, session_id):
+    """Stored counts should equal a fresh count of the participant rows."""
+    from sqlalchemy import select, func
+    from app.models.session import Session, SessionParticipant
+    
+    actual = (await db.execute(
+        select(
+            func.count(),
+            func.count().filter(SessionParticipant.rsvp_status == RSVPStatus.GOING)
+        ).where(SessionParticipant.session_id == session_id)
+    )).one()
+    stored = (await db.execute(
+        select(Session.participant_count, Session.going_count).where(Session.id == session_id)
+    )).one()
+    assert tuple(stored) == tuple(actual)
+    return tuple(stored)
+
+
+class TestParticipantCounts:
+    """Test the denormalized participant_count and going_count on sessions."""
+    
+    @pytest.mark.asyncio
+    async def test_counts_follow_join_rsvp_invite_leave(self, db_session):
+        from app.crud.session import join_session, invite_participants, leave_session
+        
+        db = db_session
+        (creator, a, b, c), gym_id = await seed_users(db, user_count=4)
+        session = await create_session_at(db, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        assert await _assert_counts_match(db, session.id) == (1, 1)
+        
+        await join_session(db, session.id, a)
+        assert await _assert_counts_match(db, session.id) == (2, 2)
+        await join_session(db, session.id, a, RSVPStatus.MAYBE)
+        assert await _assert_counts_match(db, session.id) == (2, 1)
+        await join_session(db, session.id, a, RSVPStatus.MAYBE)
+        assert await _assert_counts_match(db, session.id) == (2, 1)
+        await invite_participants(db, session.id, [a, b, c], invited_by_id=creator)
+        assert await _assert_counts_match(db, session.id) == (4, 1)
+        await join_session(db, session.id, b, RSVPStatus.GOING)
+        assert await _assert_counts_match(db, session.id) == (4, 2)
+        await leave_session(db, session.id, b)
+        await leave_session(db, session.id, a)
+        await leave_session(db, session.id, a)
+        assert await _assert_counts_match(db, session.id) == (2, 1)
+    
+    @pytest.mark.asyncio
+    async def test_full_session_waitlists_join(self, async_client, db_session):
+        """Joining a full session should waitlist the user without taking a seat."""
+        from app.main import app
+        from app.core.security import get_current_user
+        from app.db.session import get_db
+        from app.models.user import User
+        
+        (creator, joiner), gym_id = await seed_users(db_session, user_count=2)
+        session = await create_session_at(
+            db_session, creator, gym_id, 1, SessionVisibility.PUBLIC, max_participants=1
+        )
+        user = await db_session.get(User, joiner)
+        
+        async def override_get_db():
+            yield db_session
+        
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            response = await async_client.post(f"/api/v1/sessions/{session.id}/join")
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 200
+        assert response.json() == {"rsvp_status": "waitlisted"}
+        assert await _assert_counts_match(db_session, session.id) == (2, 1)
+
+
+class TestSessionCapacity:
+    """Test atomic seat claims and the waitlist of full sessions."""
+    
+    @pytest.mark.asyncio
+    async def test_claim_seat_stops_at_capacity(self, db_session):
+        from app.crud.session import claim_seat
+        
+        (creator,), gym_id = await seed_users(db_session, user_count=1)
+        full = await create_session_at(
+            db_session, creator, gym_id, 1, SessionVisibility.PUBLIC, max_participants=2
+        )
+        unlimited = await create_session_at(db_session, creator, gym_id, 2, SessionVisibility.PUBLIC)
+        
+        assert await claim_seat(db_session, full.id) is True
+        assert await claim_seat(db_session, full.id) is False
+        assert full.going_count == 2
+        assert await claim_seat(db_session, unlimited.id) is True
+        assert unlimited.going_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_freed_seat_goes_to_longest_waiting(self, db_session):
+        """Leaving or dropping from going should promote the waitlist in join order."""
+        from sqlalchemy import select
+        from app.crud.session import join_session, leave_session
+        from app.models.session import SessionParticipant
+        
+        db = db_session
+        (creator, a, b, c, d), gym_id = await seed_users(db, user_count=5)
+        session = await create_session_at(
+            db, creator, gym_id, 1, SessionVisibility.PUBLIC, max_participants=2
+        )
+        
+        async def status_of(user_id):
+            participant = await db.scalar(
+                select(SessionParticipant).where(
+                    SessionParticipant.session_id == session.id, SessionParticipant.user_id == user_id
+                )
+            )
+            await db.refresh(participant)
+            return participant.rsvp_status
+        
+        assert (await join_session(db, session.id, a)).rsvp_status == RSVPStatus.GOING
+        for user_id in (b, c, d):
+            assert (await join_session(db, session.id, user_id)).rsvp_status == RSVPStatus.WAITLISTED
+        # Asking again keeps the user waiting rather than taking a seat
+        assert (await join_session(db, session.id, d)).rsvp_status == RSVPStatus.WAITLISTED
+        
+        await leave_session(db, session.id, a)
+        assert await status_of(b) == RSVPStatus.GOING
+        assert await status_of(c) == RSVPStatus.WAITLISTED
+        
+        await join_session(db, session.id, creator, RSVPStatus.MAYBE)
+        assert await status_of(c) == RSVPStatus.GOING
+        assert await status_of(d) == RSVPStatus.WAITLISTED
+        
+        # Leaving the waitlist frees no seat
+        await leave_session(db, session.id, d)
+        await leave_session(db, session.id, c)
+        assert await _assert_counts_match(db, session.id) == (2, 1)
+        
+        assert (await join_session(db, session.id, creator)).rsvp_status == RSVPStatus.GOING
+        assert await _assert_counts_match(db, session.id) == (2, 2)
+    
+    @pytest.mark.asyncio
+    async def test_rsvp_cannot_pick_waitlisted(self, async_client, db_session):
+        from app.main import app
+        from app.core.security import get_current_user
+        from app.db.session import get_db
+        from app.models.user import User
+        
+        (creator,), gym_id = await seed_users(db_session, user_count=1)
+        session = await create_session_at(db_session, creator, gym_id, 1, SessionVisibility.PUBLIC)
+        user = await db_session.get(User, creator)
+        
+        async def override_get_db():
+            yield db_session
+        
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            response = await async_client.post(
+                f"/api/v1/sessions/{session.id}/rsvp", json={"status": "waitlisted"}
+            )
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_capacity_change_follows_waitlist(self, db_session):
+        """Raising the cap promotes the waitlist in join order; a cap below going is refused."""
+        from app.crud.session import join_session, update_session
+        from app.schemas.session import SessionUpdate
+        
+        db = db_session
+        (creator, a, b, c, d), gym_id = await seed_users(db, user_count=5)
+        session = await create_session_at(
+            db, creator, gym_id, 1, SessionVisibility.PUBLIC, max_participants=2
+        )
+        for user_id in (a, b, c, d):
+            await join_session(db, session.id, user_id)
+        
+        await update_session(db, session, SessionUpdate(max_participants=4))
+        assert await _assert_counts_match(db, session.id) == (5, 4)
+        # A new joiner doesn't take a seat ahead of the one still waiting
+        assert (await join_session(db, session.id, d)).rsvp_status == RSVPStatus.WAITLISTED
+        
+        with pytest.raises(ValueError):
+            await update_session(db, session, SessionUpdate(max_participants=3))
+        await update_session(db, session, SessionUpdate(max_participants=4, title="Same cap"))
+        assert session.max_participants == 4
+        
+        await update_session(db, session, SessionUpdate(max_participants=None))
+        assert await _assert_counts_match(db, session.id) == (5, 5)
+    
+    @pytest.mark.asyncio
+    async def test_capacity_below_going_rejected(self, async_client, db_session):
+        from app.main import app
+        from app.core.security import get_current_user
+        from app.crud.session import join_session
+        from app.db.session import get_db
+        from app.models.user import User
+        
+        (creator, a), gym_id = await seed_users(db_session, user_count=2)
+        session = await create_session_at(
+            db_session, creator, gym_id, 1, SessionVisibility.PUBLIC, max_participants=5
+        )
+        await join_session(db_session, session.id, a)
+        user = await db_session.get(User, creator)
+        
+        async def override_get_db():
+            yield db_session
+        
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            response = await async_client.patch(f"/api/v1/sessions/{session.id}", json={"max_participants": 1})
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 400
+    
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_concurrent_joins_never_overbook(self, tmp_path):
+        """Concurrent joins, each in its own transaction, fill exactly the seats there are."""
+        import asyncio
+        from collections import Counter
+        from sqlalchemy import event
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+        from app.crud.session import join_session
+        from app.db.session import Base
+        
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'capacity.db'}", connect_args={"timeout": 60})
+        
+        # Take SQLite's write lock at BEGIN so transactions queue instead of failing to upgrade
+        @event.listens_for(engine.sync_engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+            # Durability doesn't matter here, and an fsync per commit would dominate the run
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.close()
+        
+        @event.listens_for(engine.sync_engine, "begin")
+        def _begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        
+        async with factory() as db:
+            (creator, *joiners), gym_id = await seed_users(db, user_count=301)
+            session = await create_session_at(
+                db, creator, gym_id, 1, SessionVisibility.PUBLIC, max_participants=10
+            )
+            await db.commit()
+        
+        async def join(user_id):
+            async with factory() as db:
+                participant = await join_session(db, session.id, user_id)
+                await db.commit()
+                return participant.rsvp_status
+        
+        try:
+            statuses = Counter(await asyncio.gather(*(join(user_id) for user_id in joiners)))
+            async with factory() as db:
+                counts = await _assert_counts_match(db, session.id)
+        finally:
+            await engine.dispose()
+        
+        assert statuses == {RSVPStatus.GOING: 9, RSVPStatus.WAITLISTED: 291}
+        assert counts == (301, 10)
+
+
+class TestRecurringSessions:
+    """Test recurrence expansion, occurrence overrides and recurring series in the feed."""
+    
+    FIRST = datetime(2024, 1, 3, 7, 0)
+    
+    async def _series(self, db, creator, gym_id, rule, visibility=SessionVisibility.PUBLIC, hours=0):
+        from app.crud.session import create_session
+        from app.schemas.session import SessionCreate
+        
+        return await create_session(db, creator, SessionCreate(
+            title=rule, gym_id=gym_id, scheduled_at=self.FIRST + timedelta(hours=hours),
+            visibility=visibility, is_recurring=True, recurrence_rule=rule
+        ))
+    
+    def test_fast_forward_matches_full_expansion(self):
+        """Re-anchored expansion should yield exactly what stepping from the first occurrence does."""
+        from app.core.recurrence import occurrences, parse_rule
+        
+        start, end = datetime(2026, 2, 10, 7, 0), datetime(2026, 5, 11, 7, 0)
+        for rule in (
+            "FREQ=DAILY",
+            "FREQ=DAILY;INTERVAL=3;BYHOUR=7,18",
+            "FREQ=WEEKLY",
+            "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE,SU;WKST=SU",
+            "FREQ=WEEKLY;BYDAY=TU;UNTIL=20260401T000000",
+            "FREQ=WEEKLY;BYDAY=MO;COUNT=200",
+            "FREQ=MONTHLY;BYDAY=1SA",
+        ):
+            expected = parse_rule(rule, self.FIRST).between(start, end, inc=True)
+            assert list(occurrences(rule, self.FIRST, start, end)) == expected, rule
+    
+    def test_rule_edge_cases(self):
+        from app.core.recurrence import last_occurrence, occurrences, parse_rule
+        
+        assert last_occurrence("FREQ=DAILY;COUNT=3", self.FIRST) == self.FIRST + timedelta(days=2)
+        assert last_occurrence("FREQ=WEEKLY", self.FIRST) is None
+        assert last_occurrence(None, self.FIRST) == self.FIRST
+        with pytest.raises(ValueError):
+            parse_rule("FREQ=SOMETIMES", self.FIRST)
+        # A rule stored before validation existed still shows its first occurrence
+        assert list(occurrences("FREQ=SOMETIMES", self.FIRST)) == [self.FIRST]
+    
+    def test_rules_limited_to_bounded_expansion(self):
+        """Rules that would take long to expand on the event loop are refused."""
+        import time
+        from app.core.recurrence import last_occurrence, parse_rule
+        
+        for rule in (
+            "FREQ=SECONDLY;UNTIL=20240104T070000",
+            "FREQ=MINUTELY;COUNT=500000",
+            "FREQ=HOURLY",
+            "FREQ=DAILY;BYHOUR=6,7,8,9,10",
+            "FREQ=DAILY;BYMINUTE=0,30;BYHOUR=6,7,8",
+            "FREQ=DAILY;COUNT=1001",
+            "FREQ=WEEKLY;UNTIL=20340101T000000",
+            "FREQ=WEEKLY;BYDAY=" + ",".join(["MO"] * 40),
+        ):
+            with pytest.raises(ValueError):
+                parse_rule(rule, self.FIRST)
+        
+        started = time.perf_counter()
+        assert last_occurrence("FREQ=DAILY;BYHOUR=7,18;UNTIL=20281231T000000", self.FIRST) == datetime(2028, 12, 31)
+        assert last_occurrence("FREQ=DAILY;COUNT=1000", self.FIRST) == self.FIRST + timedelta(days=999)
+        assert time.perf_counter() - started < 0.5
+    
+    @pytest.mark.asyncio
+    async def test_feed_expands_series_in_window(self, db_session):
+        """Each occurrence in the window should appear in order among the one-off sessions."""
+        from app.crud.projections import get_session_summaries
+        
+        db = db_session
+        (a, b, c), gym_id = await seed_users(db, user_count=3)
+        await befriend(db, a, b)
+        weekly = await self._series(db, b, gym_id, "FREQ=WEEKLY;BYDAY=MO,WE", SessionVisibility.FRIENDS)
+        daily = await self._series(db, c, gym_id, "FREQ=DAILY;INTERVAL=5", hours=1)
+        await self._series(db, c, gym_id, "FREQ=DAILY;UNTIL=20240201T000000")
+        await self._series(db, c, gym_id, "FREQ=DAILY", SessionVisibility.PRIVATE)
+        one_off = await create_session_at(db, a, gym_id, 0, SessionVisibility.PRIVATE)
+        
+        from_date, to_date = BASE_TIME - timedelta(days=7), BASE_TIME + timedelta(days=7)
+        feed = await get_session_summaries(db, a, from_date=from_date, to_date=to_date)
+        
+        assert [(s.id, s.scheduled_at) for s in feed] == [
+            (weekly.id, datetime(2026, 2, 23, 7, 0)),
+            (weekly.id, datetime(2026, 2, 25, 7, 0)),
+            (daily.id, datetime(2026, 2, 26, 8, 0)),
+            (one_off.id, datetime(2026, 3, 1, 7, 0)),
+            (weekly.id, datetime(2026, 3, 2, 7, 0)),
+            (daily.id, datetime(2026, 3, 3, 8, 0)),
+            (weekly.id, datetime(2026, 3, 4, 7, 0)),
+        ]
+        assert all(s.occurrence_start == s.scheduled_at for s in feed if s.is_recurring)
+        assert feed[3].occurrence_start is None
+    
+    @pytest.mark.asyncio
+    async def test_overrides_cancel_and_move_occurrences(self, db_session):
+        from app.crud.projections import get_session_summaries
+        from app.crud.session import set_occurrence_override, delete_occurrence_override
+        
+        db = db_session
+        (a,), gym_id = await seed_users(db, user_count=1)
+        series = await self._series(db, a, gym_id, "FREQ=WEEKLY;BYDAY=MO", SessionVisibility.PRIVATE)
+        mondays = [datetime(2026, 3, 2, 7, 0) + timedelta(weeks=i) for i in range(3)]
+        
+        await set_occurrence_override(db, series.id, mondays[0], is_cancelled=True)
+        await set_occurrence_override(db, series.id, mondays[1], scheduled_at=mondays[2] + timedelta(hours=2))
+        feed = await get_session_summaries(db, a, from_date=mondays[0], to_date=mondays[2] + timedelta(days=1))
+        assert [(s.scheduled_at, s.occurrence_start) for s in feed] == [
+            (mondays[2], mondays[2]),
+            (mondays[2] + timedelta(hours=2), mondays[1]),
+        ]
+        
+        assert await delete_occurrence_override(db, series.id, mondays[0]) is True
+        feed = await get_session_summaries(db, a, from_date=mondays[0], to_date=mondays[0])
+        assert [s.scheduled_at for s in feed] == [mondays[0]]
+    
+    @pytest.mark.asyncio
+    async def test_pages_walk_through_occurrences(self, db_session):
+        """Cursors should page through an open-ended series and one-off sessions without gaps."""
+        from app.core.pagination import decode_cursor, split_page
+        from app.crud.projections import get_session_summaries
+        
+        db = db_session
+        (a,), gym_id = await seed_users(db, user_count=1)
+        series = await self._series(db, a, gym_id, "FREQ=DAILY", SessionVisibility.PRIVATE)
+        for hours in (-1, 24 * 3, 24 * 3 + 1):
+            await create_session_at(db, a, gym_id, hours, SessionVisibility.PRIVATE)
+        
+        from_date = BASE_TIME - timedelta(days=2)
+        to_date = BASE_TIME + timedelta(days=5)
+        expected = [(s.id, s.scheduled_at) for s in await get_session_summaries(db, a, from_date, to_date)]
+        seen, cursor = [], None
+        while True:
+            rows = await get_session_summaries(db, a, from_date, to_date, limit=4, after=decode_cursor(cursor))
+            page, cursor = split_page(rows, 3, "scheduled_at")
+            seen.extend((s.id, s.scheduled_at) for s in page)
+            if cursor is None:
+                break
+        
+        assert len([entry for entry in expected if entry[0] == series.id]) == 8
+        assert len(expected) == 11
+        assert seen == expected
+    
+    @pytest.mark.asyncio
+    async def test_occurrence_endpoints(self, async_client, db_session):
+        """Only real occurrences can be overridden, and invalid rules are refused at creation."""
+        from app.main import app
+        from app.core.security import get_current_user
+        from app.db.session import get_db
+        from app.models.user import User
+        
+        (creator,), gym_id = await seed_users(db_session, user_count=1)
+        series = await self._series(db_session, creator, gym_id, "FREQ=WEEKLY;BYDAY=WE")
+        ending = await self._series(db_session, creator, gym_id, "FREQ=WEEKLY;UNTIL=20260101T000000")
+        user = await db_session.get(User, creator)
+        
+        async def override_get_db():
+            yield db_session
+        
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            created = await async_client.post("/api/v1/sessions", json={
+                "title": "Bad rule", "gym_id": gym_id, "scheduled_at": self.FIRST.isoformat(),
+                "is_recurring": True, "recurrence_rule": "FREQ=SOMETIMES"
+            })
+            too_frequent = await async_client.post("/api/v1/sessions", json={
+                "title": "Every second", "gym_id": gym_id, "scheduled_at": self.FIRST.isoformat(),
+                "is_recurring": True, "recurrence_rule": "FREQ=SECONDLY;UNTIL=20240104T070000"
+            })
+            until_too_far = await async_client.patch(
+                f"/api/v1/sessions/{ending.id}", json={"scheduled_at": "2018-01-03T07:00:00"}
+            )
+            not_an_occurrence = await async_client.put(
+                f"/api/v1/sessions/{series.id}/occurrences",
+                json={"occurrence_start": "2026-03-03T07:00:00", "is_cancelled": True}
+            )
+            cancelled = await async_client.put(
+                f"/api/v1/sessions/{series.id}/occurrences",
+                json={"occurrence_start": "2026-03-04T07:00:00", "is_cancelled": True}
+            )
+            restored = await async_client.delete(
+                f"/api/v1/sessions/{series.id}/occurrences",
+                params={"occurrence_start": "2026-03-04T07:00:00"}
+            )
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert created.status_code == 400
+        assert too_frequent.status_code == 400
+        assert until_too_far.status_code == 400
+        assert not_an_occurrence.status_code == 400
+        assert cancelled.status_code == 200
+        assert cancelled.json()["is_cancelled"] is True
+        assert restored.status_code == 204
+
+
+class TestBulkInvites:
+    """Test the batched session invite path."""
+    
+    async def _seed_invitees(self, db, count, opted_out=()):
+        from uuid import uuid4
+        from app.models.user import User
+        from app.models.notification import NotificationToken
+        
+        from app.models.gym import Gym
+        
+        creator = User(id=str(uuid4()), email=f"{uuid4()}@example.com", name="Creator")
+        gym = Gym(id=str(uuid4()), name="Iron Paradise", address="1 Main St", latitude=40.7, longitude=-74.0)
+        db.add_all([creator, gym])
+        await db.flush()
+        session = await create_session_at(db, creator.id, gym.id, 1, SessionVisibility.PUBLIC)
+        invitees = [
+            User(
+                id=str(uuid4()), email=f"{uuid4()}@example.com", name=f"Invitee {i}",
+                notify_session_invites=i not in opted_out
+            )
+            for i in range(count)
+        ]
+        tokens = [
+            NotificationToken(
+                id=str(uuid4()), user_id=u.id, token=f"ExponentPushToken[{u.id}]",
+                is_active=True, created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+            )
+            for u in invitees
+        ]
+        db.add_all(invitees + tokens)
+        await db.flush()
+        return creator.id, session, [u.id for u in invitees]
+    
+    @pytest.mark.asyncio
+    async def test_invite_participants_skips_existing(self, db_session):
+        """Existing participants keep their RSVP; new invitees are added once as MAYBE."""
+        from sqlalchemy import select
+        from app.crud.session import invite_participants
+        from app.models.session import SessionParticipant
+        
+        creator, session, invitees = await self._seed_invitees(db_session, 3)
+        
+        invited = await invite_participants(
+            db_session, session.id, [creator] + invitees + invitees[:1], invited_by_id=creator
+        )
+        
+        rows = (await db_session.execute(
+            select(SessionParticipant.user_id, SessionParticipant.rsvp_status)
+            .where(SessionParticipant.session_id == session.id)
+        )).all()
+        assert sorted(invited) == sorted(invitees)
+        assert dict(rows) == {creator: RSVPStatus.GOING, **{u: RSVPStatus.MAYBE for u in invitees}}
+    
+    @pytest.mark.asyncio
+    async def test_reinvite_after_leaving_is_notified_again(self, db_session):
+        """Each invite queues its own push, even for a user invited before."""
+        from sqlalchemy import select
+        from app.crud.session import invite_participants, leave_session
+        from app.models.notification import NotificationOutbox
+        from app.services.push import queue_session_invite_notifications
+        
+        creator, session, (invitee,) = await self._seed_invitees(db_session, 1)
+        for _ in range(2):
+            invited = await invite_participants(db_session, session.id, [invitee], invited_by_id=creator)
+            await queue_session_invite_notifications(db_session, invited, "Creator", session.title, session.id)
+            await leave_session(db_session, session.id, invitee)
+        
+        queued = (await db_session.execute(
+            select(NotificationOutbox.user_id).where(NotificationOutbox.user_id == invitee)
+        )).scalars().all()
+        assert len(queued) == 2
+    
+    @pytest.mark.asyncio
+    async def test_notification_targets_respect_preferences(self, db_session):
+        """Opted-out users get no tokens and unknown users are dropped."""
+        from app.crud.notification import get_notification_targets
+        
+        _, _, invitees = await self._seed_invitees(db_session, 3, opted_out={1})
+        
+        targets = await get_notification_targets(
+            db_session, invitees + ["no-such-user"], "notify_session_invites"
+        )
+        
+        assert set(targets) == set(invitees)
+        assert targets[invitees[1]] == []
+        assert targets[invitees[0]] == [f"ExponentPushToken[{invitees[0]}]"]
+    
+    @pytest.mark.asyncio
+    @pytest.mark.max_queries(5)
+    async def test_invite_cost_flat_in_invitee_count(self, async_client, db_engine, db_session):
+        """Inviting 2 or 40 users should run the same statements and queue one push each."""
+        from sqlalchemy import event, select, func
+        from app.models.notification import NotificationOutbox
+        from app.main import app
+        from app.db.session import get_db
+        from app.core.security import get_current_user
+        from app.models.user import User
+        
+        async def invite(count):
+            creator_id, session, invitees = await self._seed_invitees(db_session, count)
+            creator = await db_session.get(User, creator_id)
+            
+            async def override_get_db():
+                yield db_session
+            
+            app.dependency_overrides[get_db] = override_get_db
+            app.dependency_overrides[get_current_user] = lambda: creator
+            statements = []
+            
+            def count_statement(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+            
+            event.listen(db_engine.sync_engine, "before_cursor_execute", count_statement)
+            try:
+                response = await async_client.post(
+                    f"/api/v1/sessions/{session.id}/invite",
+                    json={"user_ids": invitees, "message": "Leg day!"}
+                )
+            finally:
+                event.remove(db_engine.sync_engine, "before_cursor_execute", count_statement)
+                app.dependency_overrides.clear()
+            
+            queued = await db_session.scalar(
+                select(func.count()).select_from(NotificationOutbox)
+                .where(NotificationOutbox.idempotency_key.like(f"session_invite:{session.id}:%"))
+            )
+            assert response.status_code == 204
+            assert queued == count
+            return len(statements)
+        
+        assert await invite(2) == await invite(40)
@@ -90,7 +90,7 @@ class TestListFriends:
     @pytest.mark.asyncio
     async def test_list_friends_empty(self, mock_user, mock_db):
         """New user should have no friends."""
-        with patch("app.api.v1.social.get_friends") as mock_get:
+        with patch("app.api.v1.social.get_friends_with_users") as mock_get:
             mock_get.return_value = []
             
             result = await mock_get(mock_db, mock_user.id)
@@ -101,11 +101,61 @@ class TestListFriends:
         """User with friends should see them listed."""
         mock_friendship.status = FriendshipStatus.ACCEPTED
         
-        with patch("app.api.v1.social.get_friends") as mock_get:
-            mock_get.return_value = [mock_friendship]
+        with patch("app.api.v1.social.get_friends_with_users") as mock_get:
+            mock_get.return_value = [(mock_friendship, mock_user_2)]
             
             result = await mock_get(mock_db, mock_user.id)
             assert len(result) == 1
+            assert result[0][1].id == mock_user_2.id
+    
+    @pytest.mark.asyncio
+    @pytest.mark.max_queries(1)
+    async def test_list_friends_constant_query_count(self, async_client, db_engine, db_session):
+        """Listing friends should cost the same number of statements for 1 or 30 friends."""
+        from uuid import uuid4
+        from sqlalchemy import event
+        from app.main import app
+        from app.db.session import get_db
+        from app.core.security import get_current_user
+        from app.crud.social import create_friend_request, update_friendship_status
+        from app.models.user import User
+        
+        async def list_friends_for(friend_count):
+            user = User(id=str(uuid4()), email=f"{uuid4()}@example.com", name="Me")
+            friends = [
+                User(id=str(uuid4()), email=f"{uuid4()}@example.com", name=f"Friend {i}")
+                for i in range(friend_count)
+            ]
+            db_session.add_all([user] + friends)
+            await db_session.flush()
+            for i, friend in enumerate(friends):
+                # Alternate directions so both sides of the join are exercised
+                pair = (user.id, friend.id) if i % 2 else (friend.id, user.id)
+                friendship = await create_friend_request(db_session, *pair)
+                await update_friendship_status(db_session, friendship, FriendshipStatus.ACCEPTED)
+            
+            async def override_get_db():
+                yield db_session
+            
+            app.dependency_overrides[get_db] = override_get_db
+            app.dependency_overrides[get_current_user] = lambda: user
+            statements = []
+            
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+            
+            event.listen(db_engine.sync_engine, "before_cursor_execute", count)
+            try:
+                response = await async_client.get("/api/v1/friends")
+            finally:
+                event.remove(db_engine.sync_engine, "before_cursor_execute", count)
+                app.dependency_overrides.clear()
+            
+            assert response.status_code == 200
+            assert sorted(f["user"]["name"] for f in response.json()) == sorted(f.name for f in friends)
+            return len(statements)
+        
+        assert await list_friends_for(1) == await list_friends_for(30) == 1
     
     @pytest.mark.asyncio
     async def test_list_friends_requires_auth(self, async_client):